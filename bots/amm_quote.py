@@ -0,0 +1,74 @@
+# bots/amm_quote.py
+"""
+ATOM local Uniswap V2 quotes (getAmountsOut without the router)
+- Pair addresses are derived with CREATE2 from (factory, init code hash,
+  sorted tokens), so a swap path resolves to its pairs with no getPair RPC;
+  token order is known from the sort, so no token0/token1 reads either
+- Quotes compose UniswapV2Library.getAmountOut (trade_sizing.py) over the
+  reserves of a per-block ReserveSnapshot: the router's own integer rounding,
+  zero RPC per quote
+- A hop whose pair is missing from the snapshot (never created, or not
+  loaded) makes the whole quote None, so the caller can fall back to RPC
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from web3 import Web3
+
+from reserve_snapshot import ReserveSnapshot
+from trade_sizing import get_amount_out
+
+
+@dataclass(frozen=True)
+class V2Factory:
+    address: str
+    init_code_hash: bytes     # keccak256 of the pair creation code
+    fee_bps: int = 30
+
+
+def sort_tokens(token_a: str, token_b: str) -> Tuple[str, str]:
+    a, b = Web3.to_checksum_address(token_a), Web3.to_checksum_address(token_b)
+    return (a, b) if int(a, 16) < int(b, 16) else (b, a)
+
+
+@lru_cache(maxsize=65536)
+def pair_address(factory: str, init_code_hash: bytes, token_a: str, token_b: str) -> str:
+    """UniswapV2Library.pairFor: keccak256(0xff ++ factory ++ keccak256(token0 ++ token1) ++ init_code_hash)[12:]."""
+    t0, t1 = sort_tokens(token_a, token_b)
+    salt = Web3.keccak(bytes.fromhex(t0[2:]) + bytes.fromhex(t1[2:]))
+    raw = Web3.keccak(b"\xff" + bytes.fromhex(Web3.to_checksum_address(factory)[2:]) + salt + init_code_hash)
+    return Web3.to_checksum_address(raw[12:])
+
+
+class AmmQuoter:
+    """Path quotes against one ReserveSnapshot; the caller refreshes it once per block with `pairs()`."""
+
+    def __init__(self, snapshot: ReserveSnapshot):
+        self.snapshot = snapshot
+
+    def path_pairs(self, factory: V2Factory, path: Sequence[str]) -> List[str]:
+        """Pair per hop; registers each pair's token order with the snapshot so loading it is a single getReserves."""
+        out: List[str] = []
+        for a, b in zip(path, path[1:]):
+            pair = pair_address(factory.address, factory.init_code_hash, a, b)
+            if self.snapshot.tokens(pair) is None:
+                self.snapshot.seed_tokens(pair, *sort_tokens(a, b))
+            out.append(pair)
+        return out
+
+    def pairs(self, routes: Iterable[Tuple[V2Factory, Sequence[str]]]) -> Set[str]:
+        """Every pair touched by `routes` (for ReserveSnapshot.refresh)."""
+        return {p for factory, path in routes for p in self.path_pairs(factory, path)}
+
+    def amounts_out(self, factory: V2Factory, amount_in: int, path: Sequence[str]) -> Optional[List[int]]:
+        """getAmountsOut(amount_in, path) from the snapshot, or None if any hop's reserves are not in it."""
+        amounts = [amount_in]
+        for pair, (a, b) in zip(self.path_pairs(factory, path), zip(path, path[1:])):
+            st = self.snapshot.get(pair)
+            oriented = st.oriented(Web3.to_checksum_address(a), Web3.to_checksum_address(b)) if st else None
+            if oriented is None:
+                return None
+            amounts.append(get_amount_out(amounts[-1], oriented[0], oriented[1], factory.fee_bps))
+        return amounts
@@ -0,0 +1,209 @@
+# bots/cycle_search.py
+"""
+ATOM token-graph cycle search
+- Directed token graph; each edge is the best post-fee rate over all DEXes
+- Edge weight = -log(rate): a profitable cycle is a negative-weight cycle
+- Johnson-style potentials (from a BFS tree) flatten the weights so that
+  partial paths that can no longer close below the profit threshold are pruned
+- Bounded-depth route DFS (2..5 hops) with an upper-bound prune: a partial path
+  is dropped once even the best remaining edge rates cannot close it above the
+  threshold; a work budget (edge expansions) bounds the search per call
+- Topology-only enumeration of every simple cycle (for edge -> cycles indexes)
+- Pure Python, no I/O: callers build the graph from an in-memory reserve snapshot
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass
+class Cycle:
+    tokens: List[str]      # start token first; the cycle closes back to tokens[0]
+    dexes: List[str]       # dex per leg: tokens[i] -> tokens[(i+1) % n]
+    rates: List[float]     # post-fee rate per leg
+    product: float
+
+    @property
+    def hops(self) -> int:
+        return len(self.tokens)
+
+
+@dataclass
+class SearchStats:
+    expansions: int = 0      # edges examined
+    pruned: int = 0          # partial paths dropped by the upper bound
+    exhausted: bool = False  # some source ran out of its share of the work budget
+
+
+class TokenGraph:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        # adjacency: u -> {v: (rate, dex)} keeping only the best rate per ordered pair
+        self.adj: List[Dict[int, Tuple[float, str]]] = []
+
+    def _node(self, token: str) -> int:
+        i = self.index.get(token)
+        if i is None:
+            i = len(self.tokens)
+            self.index[token] = i
+            self.tokens.append(token)
+            self.adj.append({})
+        return i
+
+    def add_edge(self, src: str, dst: str, rate: float, dex: str) -> None:
+        """Add a src->dst quote; the graph keeps the best rate across DEXes."""
+        if not rate or rate <= 0 or src == dst:
+            return
+        u, v = self._node(src), self._node(dst)
+        cur = self.adj[u].get(v)
+        if cur is None or rate > cur[0]:
+            self.adj[u][v] = (float(rate), dex)
+
+    def edge_count(self) -> int:
+        return sum(len(a) for a in self.adj)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    # ---------- internals ----------
+
+    def _potentials(self) -> List[float]:
+        """phi(v) = -log-rate from a BFS root along tree edges; cycle weights are invariant under it."""
+        n = len(self.tokens)
+        phi: List[Optional[float]] = [None] * n
+        # roots by degree so the hub of each component anchors its tree
+        for root in sorted(range(n), key=lambda i: -len(self.adj[i])):
+            if phi[root] is not None:
+                continue
+            phi[root] = 0.0
+            q = deque([root])
+            while q:
+                u = q.popleft()
+                for v, (rate, _) in self.adj[u].items():
+                    if phi[v] is None:
+                        phi[v] = phi[u] - math.log(rate)
+                        q.append(v)
+        return [p or 0.0 for p in phi]
+
+
+def search_routes(
+    graph: TokenGraph,
+    min_len: int = 2,
+    max_len: int = 5,
+    min_profit_ratio: float = 0.0,
+    max_routes: int = 1000,
+    work_budget: Optional[int] = None,
+) -> Tuple[List[Cycle], SearchStats]:
+    """
+    Every simple cycle of min_len..max_len hops with product(rates) - 1 > min_profit_ratio, best first,
+    each reported once (rotated to start at its lowest-index node). Each leg uses the best DEX for its
+    ordered pair, so 2-hop cycles are cross-DEX round trips.
+
+    Depth-first from every source, best edges first. A partial path with product p at node v is pruned
+    when p * (best possible closing product from v) cannot clear the threshold. `work_budget` caps edge
+    expansions for the whole call; it is shared evenly over the remaining sources, so a dense corner of
+    the graph cannot starve the rest.
+    """
+    n = len(graph)
+    min_len = max(2, min_len)
+    stats = SearchStats()
+    if n < min_len or max_len < min_len:
+        return [], stats
+
+    # rates reweighted by the potentials (r' = r * e^(phi(v) - phi(u))) sit near 1.0 whatever the token
+    # units, which keeps the bound tight; cycle products are unchanged. Best edges first, so a truncated
+    # search has already tried the strongest continuations.
+    phi = graph._potentials()
+    adj: List[List[Tuple[int, float]]] = [
+        sorted(((v, rate * math.exp(phi[v] - phi[u])) for v, (rate, _) in graph.adj[u].items()),
+               key=lambda e: -e[1])
+        for u in range(n)
+    ]
+    best_out = [a[0][1] if a else 0.0 for a in adj]
+    best_in = [0.0] * n
+    for u in range(n):
+        for v, rate in adj[u]:
+            if rate > best_in[v]:
+                best_in[v] = rate
+    grow = max(1.0, max(best_out))    # any middle leg multiplies by at most this
+    floor = 1.0 + max(min_profit_ratio, 0.0)
+    found: Dict[Tuple[int, ...], float] = {}
+
+    for s in range(n):
+        if best_in[s] <= 0.0 or best_out[s] <= 0.0:
+            continue
+        limit = None
+        if work_budget is not None:
+            limit = stats.expansions + max(0, work_budget - stats.expansions) // (n - s)
+
+        def closing_bound(v: int, left: int) -> float:
+            # best product of 1..left more legs from v back to s
+            b = min(best_out[v], best_in[s])
+            if left >= 2:
+                b = max(b, best_out[v] * best_in[s] * grow ** (left - 2))
+            return b
+
+        stack: List[Tuple[int, float, Tuple[int, ...]]] = [(s, 1.0, (s,))]
+        while stack:
+            u, prod, path = stack.pop()
+            children: List[Tuple[int, float, Tuple[int, ...]]] = []
+            for v, rate in adj[u]:
+                if limit is not None and stats.expansions >= limit:
+                    stats.exhausted = True
+                    stack.clear()
+                    break
+                stats.expansions += 1
+                p = prod * rate
+                if v == s:
+                    if len(path) >= min_len and p > floor:
+                        found[path] = p
+                    continue
+                if v < s or len(path) >= max_len or v in path:
+                    continue
+                if p * closing_bound(v, max_len - len(path)) <= floor:
+                    stats.pruned += 1
+                    continue
+                children.append((v, p, path + (v,)))
+            # LIFO: push the weakest first so the best child is expanded next
+            stack.extend(reversed(children))
+
+    routes: List[Cycle] = []
+    for key, _ in sorted(found.items(), key=lambda kv: kv[1], reverse=True)[:max_routes]:
+        legs = [graph.adj[key[i]][key[(i + 1) % len(key)]] for i in range(len(key))]
+        routes.append(Cycle(
+            tokens=[graph.tokens[i] for i in key],
+            dexes=[dex for _, dex in legs],
+            rates=[rate for rate, _ in legs],
+            product=math.prod(rate for rate, _ in legs),
+        ))
+    return routes, stats
+
+
+def enumerate_cycles(
+    graph: TokenGraph,
+    min_len: int = 3,
+    max_len: int = 5,
+    limit: Optional[int] = None,
+) -> Optional[List[Tuple[str, ...]]]:
+    """
+    Every simple directed cycle of min_len..max_len hops, by topology only (rates ignored),
+    rotated to start at its lowest-index node. Returns None if more than `limit` exist.
+    """
+    n = len(graph)
+    out: List[Tuple[str, ...]] = []
+    for s in range(n):
+        stack: List[Tuple[int, Tuple[int, ...]]] = [(s, (s,))]
+        while stack:
+            u, path = stack.pop()
+            for v in graph.adj[u]:
+                if v == s:
+                    if len(path) >= min_len:
+                        out.append(tuple(graph.tokens[i] for i in path))
+                        if limit is not None and len(out) > limit:
+                            return None
+                elif v > s and len(path) < max_len and v not in path:
+                    stack.append((v, path + (v,)))
+    return out
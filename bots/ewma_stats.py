@@ -0,0 +1,141 @@
+# bots/ewma_stats.py
+"""
+ATOM streaming per-token estimators (exponentially weighted)
+- One row of state per token in preallocated float64 arrays (same row
+  bookkeeping as series_ring.py); a feed pass updates every token it priced
+  in one vectorized step, O(1) per token per tick, no window to rescan
+- Per row: EWMA mean/variance of simple returns, short and long momentum
+  (exponentially discounted sum of returns: a one-bar jump of x reads x and
+  fades with the span), an EWMA volume baseline and the spike of the
+  latest volume over the baseline as it stood before it was folded in
+- The first return initialises the mean instead of decaying up from zero,
+  so values are usable after a handful of bars
+- `seed()` replays stored history through the same update, so a restart
+  resumes with warm estimators; `release()` frees a row for the next key
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+def alpha(span: float) -> float:
+    """Smoothing factor for an EWMA whose centre of mass matches a `span`-bar simple average."""
+    return 2.0 / (max(1.0, span) + 1.0)
+
+
+class EwmaStats:
+    def __init__(self, var_span: float = 30, volume_span: float = 15, short_span: float = 5,
+                 long_span: float = 15, rows: int = 16):
+        self.a_var, self.a_vol = alpha(var_span), alpha(volume_span)
+        self.a_short, self.a_long = alpha(short_span), alpha(long_span)
+        self.rows: Dict[str, int] = {}
+        self._free: List[int] = []     # released rows, reused before growing
+        self._alloc(max(1, rows))
+
+    def _alloc(self, n: int) -> None:
+        z = lambda: np.zeros(n)
+        self.last = z()          # last positive price
+        self.mean = z()          # EWMA of returns (variance centre)
+        self.var = z()           # EWMA variance of returns
+        self.mom_s = z()         # discounted sum of returns, short span
+        self.mom_l = z()         # discounted sum of returns, long span
+        self.vol_base = z()      # EWMA of volume
+        self.spike = np.ones(n)  # latest volume / baseline before it
+        self.n_ret = np.zeros(n, dtype=np.int64)
+        self.n_vol = np.zeros(n, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, key: str) -> int:
+        r = self.rows.get(key)
+        if r is not None:
+            return r
+        if self._free:
+            r = self._free.pop()
+            self.rows[key] = r
+            return r
+        r = len(self.rows)
+        if r >= self.last.size:
+            old = {k: getattr(self, k) for k in ("last", "mean", "var", "mom_s", "mom_l", "vol_base", "spike", "n_ret", "n_vol")}
+            self._alloc(2 * self.last.size)
+            for k, v in old.items():
+                getattr(self, k)[:v.size] = v
+        self.rows[key] = r
+        return r
+
+    def rows_of(self, keys: Iterable[str]) -> np.ndarray:
+        keys = list(keys)
+        return np.fromiter((self.row(k) for k in keys), dtype=np.int64, count=len(keys))
+
+    def release(self, key: str) -> None:
+        """Forget key's state; the row is reset and handed to the next new key."""
+        r = self.rows.pop(key, None)
+        if r is None:
+            return
+        for k in ("last", "mean", "var", "mom_s", "mom_l", "vol_base", "n_ret", "n_vol"):
+            getattr(self, k)[r] = 0
+        self.spike[r] = 1.0
+        self._free.append(r)
+
+    # ---------- updates ----------
+
+    def update(self, keys: Sequence[str], prices: Iterable[float], volumes: Optional[Iterable[float]] = None) -> None:
+        """
+        One tick for many keys. Non-positive/NaN prices and NaN volumes leave that
+        part of the row untouched; a key's first price only sets `last`.
+        """
+        if not keys:
+            return
+        rows = self.rows_of(keys)
+        p = np.fromiter(prices, dtype=np.float64, count=len(keys))
+        ok = np.isfinite(p) & (p > 0)
+        prev = self.last[rows]
+        has_ret = ok & (prev > 0)
+        if has_ret.any():
+            rr = rows[has_ret]
+            r = p[has_ret] / prev[has_ret] - 1.0
+            first = self.n_ret[rr] == 0
+            mean = np.where(first, r, self.mean[rr])
+            d = r - mean
+            a = self.a_var
+            self.mean[rr] = mean + a * d
+            self.var[rr] = np.where(first, 0.0, (1.0 - a) * (self.var[rr] + a * d * d))
+            self.mom_s[rr] = (1.0 - self.a_short) * self.mom_s[rr] + r
+            self.mom_l[rr] = (1.0 - self.a_long) * self.mom_l[rr] + r
+            self.n_ret[rr] += 1
+        self.last[rows[ok]] = p[ok]
+
+        if volumes is None:
+            return
+        v = np.fromiter(volumes, dtype=np.float64, count=len(keys))
+        vok = np.isfinite(v) & (v >= 0)
+        if not vok.any():
+            return
+        vr, v = rows[vok], v[vok]
+        base = self.vol_base[vr]
+        seen = self.n_vol[vr] > 0
+        self.spike[vr] = np.where(seen & (base > 0), v / np.where(base > 0, base, 1.0), 1.0)
+        self.vol_base[vr] = np.where(seen, base + self.a_vol * (v - base), v)
+        self.n_vol[vr] += 1
+
+    def seed(self, key: str, prices: Sequence[float], volumes: Optional[Sequence[float]] = None) -> None:
+        """Replay a stored series (oldest first) through update()."""
+        for i, p in enumerate(prices):
+            self.update([key], (p,), None if volumes is None else (volumes[i],))
+
+    # ---------- reads ----------
+
+    def stats(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        """Vectors aligned with `rows`: returns seen, price, EWMA std, momentum, volume baseline and spike."""
+        return {
+            "bars": self.n_ret[rows],
+            "price": self.last[rows],
+            "std": np.sqrt(self.var[rows]),
+            "mom_short": self.mom_s[rows],
+            "mom_long": self.mom_l[rows],
+            "volume_base": self.vol_base[rows],
+            "vol_spike": self.spike[rows],
+            "volume_bars": self.n_vol[rows],
+        }
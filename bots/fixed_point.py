@@ -0,0 +1,104 @@
+# bots/fixed_point.py
+"""
+ATOM fixed-point math (UQ112x112-style integers)
+- Prices, USD values and fee factors are plain Python ints scaled by 2**112,
+  the same resolution Uniswap V2 uses for its price accumulators
+- AMM quotes straight from raw reserves + decimals with one multiply/divide
+  (no Decimal construction, no per-call 10**decimals)
+- Fee and flash-fee application in basis points, USD conversion of raw token
+  amounts, and V3 sqrtPriceX96 -> Q112 conversion
+- Convert to float only for published fields (`to_float`)
+"""
+
+from decimal import Decimal, ROUND_FLOOR, localcontext
+from typing import Optional
+
+RESOLUTION = 112
+Q112 = 1 << RESOLUTION
+Q96 = 1 << 96
+ONE = Q112
+BPS = 10_000
+
+# 10**n for every decimals value an ERC-20 can declare (uint8, realistically <= 77)
+POW10 = tuple(10 ** n for n in range(78))
+
+
+# ---------- conversion ----------
+
+def from_int(x: int) -> int:
+    return x << RESOLUTION
+
+
+def from_ratio(num: int, den: int) -> int:
+    """num / den in Q112 (floor)."""
+    return (num << RESOLUTION) // den
+
+
+def from_decimal(d: Decimal) -> int:
+    """Config values (Decimal env settings) into Q112, exactly to the last bit."""
+    with localcontext() as ctx:
+        ctx.prec = 80
+        return int((Decimal(d) * Q112).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def from_units(amount: int, decimals: int) -> int:
+    """Raw token amount (base units) -> whole tokens in Q112."""
+    return (amount << RESOLUTION) // POW10[decimals]
+
+
+def from_sqrt_price_x96(sqrt_price_x96: int) -> int:
+    """Uniswap V3 sqrtPriceX96 (token1 per token0, raw units) -> Q112 price."""
+    return (sqrt_price_x96 * sqrt_price_x96) >> (2 * 96 - RESOLUTION)
+
+
+def to_float(q: int) -> float:
+    # int / int true division is correctly rounded even for values far beyond 2**53
+    return q / Q112
+
+
+def to_bps(q: int) -> int:
+    """Q112 ratio -> integer basis points (floor)."""
+    return (q * BPS) >> RESOLUTION
+
+
+# ---------- arithmetic ----------
+
+def mul(a: int, b: int) -> int:
+    return (a * b) >> RESOLUTION
+
+
+def div(a: int, b: int) -> int:
+    return (a << RESOLUTION) // b
+
+
+def mul_bps(q: int, bps: int) -> int:
+    return q * bps // BPS
+
+
+def apply_fee(q: int, fee_bps: int) -> int:
+    """q * (1 - fee)."""
+    return q * (BPS - fee_bps) // BPS
+
+
+def units_to_usd(amount: int, decimals: int, price_usd: int) -> int:
+    """Raw token amount times a Q112 USD price per whole token -> Q112 USD."""
+    return amount * price_usd // POW10[decimals]
+
+
+def usd_to_units(usd: int, decimals: int, price_usd: int) -> int:
+    """Q112 USD -> raw token amount at a Q112 USD price per whole token (floor)."""
+    return usd * POW10[decimals] // price_usd if price_usd > 0 else 0
+
+
+# ---------- AMM quotes ----------
+
+def price(reserve_in: int, reserve_out: int, decimals_in: int, decimals_out: int, fee_bps: int = 0) -> Optional[int]:
+    """
+    Post-fee spot price of one whole input token in output tokens, Q112.
+    Equivalent to (r_out / 10**d_out) / (r_in / 10**d_in) * (1 - fee) in one integer division.
+    """
+    if reserve_in <= 0 or reserve_out <= 0:
+        return None
+    num = reserve_out * POW10[decimals_in] * (BPS - fee_bps)
+    den = reserve_in * POW10[decimals_out] * BPS
+    return (num << RESOLUTION) // den
@@ -0,0 +1,187 @@
+# bots/graphql_batch.py
+"""
+ATOM batched subgraph queries
+- Packs one sub-query per key (token, pair, ...) into a single GraphQL document
+  using aliases (`a0: tokenDayDatas(...)`, `a1: ...`), up to GRAPHQL_BATCH_SIZE
+  per POST, so a scan costs O(keys / N) HTTP requests instead of O(keys)
+- Batches fan out concurrently over the caller's shared aiohttp session,
+  bounded by a semaphore (GRAPHQL_CONCURRENCY) and, optionally, a per-URL
+  token bucket (rate_limit.py)
+- Per-alias results: a null or failed alias yields None for that key only;
+  a batch the subgraph rejects as a whole (query complexity/size, HTTP 413,
+  a bad sub-query) is bisected and retried, every half taking its own bucket
+  token; transport failures (connection, timeout, 5xx, rate limiting) fail
+  the batch's keys after one request instead of being retried in halves
+- Cursor pagination with `id_gt` (stable and O(page) per request, unlike
+  `skip`, which the hosted service caps and slows down on); a failed page
+  ends the walk and the rows fetched so far are returned
+- Prometheus request/sub-query/failure counters and request latency
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import aiohttp
+from prometheus_client import Counter, Histogram
+
+from rate_limit import TokenBucket
+
+# ---------- Logging ----------
+log = logging.getLogger("atom.graphql")
+_hdlr = logging.StreamHandler()
+_hdlr.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(_hdlr)
+log.setLevel(logging.INFO)
+
+def jlog(level: str, **kw):
+    getattr(log, level.lower())(json.dumps(kw, separators=(",", ":")))
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+BATCH_SIZE = int(_env("GRAPHQL_BATCH_SIZE", "50"))        # aliased sub-queries per POST
+CONCURRENCY = int(_env("GRAPHQL_CONCURRENCY", "4"))       # POSTs in flight per batcher
+TIMEOUT_SEC = float(_env("GRAPHQL_TIMEOUT_SEC", "20"))
+PAGE_SIZE = int(_env("GRAPHQL_PAGE_SIZE", "1000"))        # hosted-service max for `first`
+
+# ---------- Metrics ----------
+MET_GQL_REQUESTS   = Counter("atom_graphql_requests_total", "Subgraph POSTs issued by the batcher")
+MET_GQL_SUBQUERIES = Counter("atom_graphql_subqueries_total", "Aliased sub-queries packed into batched POSTs")
+MET_GQL_FAILURES   = Counter("atom_graphql_failures_total", "Sub-queries that failed (batch failure that could not be split further)")
+MET_GQL_SPLITS     = Counter("atom_graphql_batch_splits_total", "Batches bisected after a whole-batch failure")
+MET_GQL_LAT        = Histogram("atom_graphql_request_latency_seconds", "Subgraph POST round-trip latency")
+
+
+class GraphQLError(Exception):
+    def __init__(self, msg: str, status: Optional[int] = None):
+        super().__init__(msg)
+        self.status = status        # HTTP status for transport-level rejections, None for GraphQL `errors`
+
+
+# errors in the response body that say the node (not the document) is the problem
+_NODE_HINTS = ("rate limit", "too many requests", "quota", "indexer", "unavailable", "timeout", "timed out")
+
+
+def _splittable(e: Exception) -> bool:
+    """True when a smaller document can succeed: GraphQL errors about the query itself, or HTTP 413."""
+    if not isinstance(e, GraphQLError):
+        return False                # aiohttp.ClientError, asyncio.TimeoutError, undecodable body
+    if e.status is not None:
+        return e.status == 413
+    msg = str(e).lower()
+    return not any(h in msg for h in _NODE_HINTS)
+
+
+class GraphQLBatcher:
+    def __init__(self, session: aiohttp.ClientSession, batch_size: int = BATCH_SIZE,
+                 concurrency: int = CONCURRENCY, timeout_sec: float = TIMEOUT_SEC,
+                 rate_limits: Optional[Dict[str, TokenBucket]] = None):
+        self.session = session
+        self.rate_limits = rate_limits or {}
+        self.batch_size = max(1, batch_size)
+        self.timeout = aiohttp.ClientTimeout(total=timeout_sec)
+        self._sem = asyncio.Semaphore(max(1, concurrency))
+
+    # ---------- transport ----------
+
+    async def post(self, url: str, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """One POST under the concurrency limit; returns `data` or raises GraphQLError."""
+        payload: Dict[str, Any] = {"query": query}
+        if variables:
+            payload["variables"] = variables
+        bucket = self.rate_limits.get(url)
+        async with self._sem:
+            if bucket is not None:
+                await bucket.acquire()
+            MET_GQL_REQUESTS.inc()
+            t0 = time.perf_counter()
+            try:
+                async with self.session.post(url, json=payload, timeout=self.timeout) as r:
+                    if r.status >= 400:
+                        raise GraphQLError(f"HTTP {r.status}", r.status)
+                    body = await r.json(content_type=None)
+            finally:
+                MET_GQL_LAT.observe(time.perf_counter() - t0)
+        data = body.get("data") if isinstance(body, dict) else None
+        if data is None:
+            errs = body.get("errors") if isinstance(body, dict) else body
+            raise GraphQLError(str(errs)[:300])
+        return data
+
+    # ---------- aliased batches ----------
+
+    async def _execute(self, url: str, fields: Sequence[str]) -> List[Optional[Any]]:
+        doc = "{ " + " ".join(f"a{i}: {f}" for i, f in enumerate(fields)) + " }"
+        try:
+            data = await self.post(url, doc)
+        except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            if len(fields) == 1 or not _splittable(e):
+                # a node that is down or throttling gets one request per batch, not 2n-1
+                MET_GQL_FAILURES.inc(len(fields))
+                if len(fields) > 1:
+                    jlog("error", event="graphql_batch_error", url=url, subqueries=len(fields), err=str(e)[:300])
+                return [None] * len(fields)
+            # complexity/size limits or one bad sub-query fail the whole document: bisect
+            MET_GQL_SPLITS.inc()
+            mid = len(fields) // 2
+            left, right = await asyncio.gather(self._execute(url, fields[:mid]), self._execute(url, fields[mid:]))
+            return left + right
+        MET_GQL_SUBQUERIES.inc(len(fields))
+        return [data.get(f"a{i}") for i in range(len(fields))]
+
+    async def fetch_many(self, url: str, keys: Sequence[Hashable], build: Callable[[Hashable], str]) -> Dict[Hashable, Optional[Any]]:
+        """
+        `build(key)` returns one selection (e.g. 'token(id: "0x..") { volumeUSD }'); the result maps
+        each key to its aliased field value (None when null or failed). Batches run concurrently.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        fields = [build(k) for k in keys]
+        n = self.batch_size
+        parts = await asyncio.gather(*(self._execute(url, fields[i:i + n]) for i in range(0, len(fields), n)))
+        out: List[Optional[Any]] = []
+        for part in parts:
+            out.extend(part)
+        return dict(zip(keys, out))
+
+    # ---------- cursor pagination ----------
+
+    async def paginate(self, url: str, entity: str, selection: str, where: str = "",
+                       variables: Optional[Dict[str, Any]] = None, var_defs: str = "",
+                       page_size: int = PAGE_SIZE, limit: Optional[int] = None,
+                       pause_sec: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        All rows of `entity` matching `where` (GraphQL filter body, may reference `var_defs` variables),
+        ordered by id and walked with `id_gt` cursors. `selection` must include `id`.
+        A page that fails is logged and ends the walk; the rows before it are still returned.
+        """
+        defs = f"$first: Int!{', ' + var_defs if var_defs else ''}"
+        rows: List[Dict[str, Any]] = []
+        cursor = ""
+        while True:
+            # cursor inlined as a literal: it coerces to the entity's id type (ID or Bytes), a variable would not
+            filt = f"id_gt: {json.dumps(cursor)}" + (f", {where}" if where else "")
+            q = (f"query({defs}) {{ rows: {entity}(first: $first, orderBy: id, orderDirection: asc, "
+                 f"where: {{ {filt} }}) {{ {selection} }} }}")
+            try:
+                data = await self.post(url, q, {**(variables or {}), "first": page_size})
+            except (GraphQLError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                MET_GQL_FAILURES.inc()
+                jlog("error", event="graphql_page_error", url=url, entity=entity, rows=len(rows), err=str(e)[:300])
+                break
+            page = data.get("rows") or []
+            rows.extend(page)
+            if len(page) < page_size or (limit is not None and len(rows) >= limit):
+                break
+            cursor = page[-1]["id"]
+            if pause_sec > 0:
+                await asyncio.sleep(pause_sec)
+        return rows[:limit] if limit is not None else rows
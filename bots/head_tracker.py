@@ -0,0 +1,237 @@
+# bots/head_tracker.py
+"""
+ATOM shared chain-head tracker
+- newHeads over WSS (eth_subscribe) when a URL is configured; a dropped or
+  stalled subscription is reconnected with backoff, polling in the meantime
+- Adaptive polling otherwise: after a head, sleep until just before the next
+  one is due (EWMA of the observed block interval), then poll every
+  HEAD_POLL_MIN_SEC; back off toward the caller's max interval while the
+  chain is quiet
+- Fan-out to in-process consumers (`wait(after)`, `stream()`) and to other
+  processes through a Redis pub/sub channel (atom:heads:<chain>, JSON
+  {"number","hash","timestamp","source"}); `RedisHeads` is the subscriber side
+- Numbers only move forward: duplicate and same-height (reorg) heads are
+  dropped, skipped numbers are counted as gaps
+- Prometheus: heads by source, gaps, reconnects, block interval, head number
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Optional
+
+from prometheus_client import Counter, Gauge
+from web3 import Web3
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+POLL_MIN_SEC = float(_env("HEAD_POLL_MIN_SEC", "0.25"))       # poll rate once a block is due
+BLOCK_TIME_SEC = float(_env("HEAD_BLOCK_TIME_SEC", "2.0"))    # initial block interval estimate
+WSS_STALL_SEC = float(_env("HEAD_WSS_STALL_SEC", "15"))       # no head for this long -> resubscribe
+CHANNEL_PREFIX = _env("HEAD_CHANNEL_PREFIX", "atom:heads")
+
+# ---------- Logging ----------
+log = logging.getLogger("atom.heads")
+_hdlr = logging.StreamHandler()
+_hdlr.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(_hdlr)
+log.setLevel(logging.INFO)
+
+def jlog(level: str, **kw):
+    getattr(log, level.lower())(json.dumps(kw, separators=(",", ":")))
+
+# ---------- Metrics ----------
+MET_HEADS      = Counter("atom_heads_total", "New heads observed", ["source"])
+MET_GAPS       = Counter("atom_heads_gap_blocks_total", "Block numbers skipped between consecutive heads")
+MET_RECONNECTS = Counter("atom_heads_wss_reconnects_total", "newHeads subscriptions dropped or stalled")
+MET_INTERVAL   = Gauge("atom_heads_block_interval_seconds", "EWMA of the observed block interval")
+MET_NUMBER     = Gauge("atom_heads_number", "Latest head number")
+
+
+def channel_for(chain: str) -> str:
+    return f"{CHANNEL_PREFIX}:{chain}"
+
+
+@dataclass
+class Head:
+    number: int
+    hash: str = ""
+    timestamp: int = 0       # block timestamp (0 when polled)
+    source: str = "poll"     # wss | poll | redis
+
+
+class HeadSource:
+    """Latest head plus waiters; producers call `_emit()`."""
+
+    def __init__(self):
+        self.head: Optional[Head] = None
+        self.seen_at = 0.0              # monotonic time the current head arrived
+        self._event = asyncio.Event()
+
+    @property
+    def number(self) -> int:
+        return self.head.number if self.head else -1
+
+    def age(self) -> float:
+        """Seconds since the last head (inf before the first)."""
+        return time.monotonic() - self.seen_at if self.head else float("inf")
+
+    async def _emit(self, head: Head) -> bool:
+        if head.number <= self.number:
+            return False
+        if self.head is not None and head.number > self.head.number + 1:
+            MET_GAPS.inc(head.number - self.head.number - 1)
+        self.head = head
+        self.seen_at = time.monotonic()
+        MET_HEADS.labels(head.source).inc()
+        MET_NUMBER.set(head.number)
+        # wake every waiter, then arm a fresh event for the next head
+        self._event.set()
+        self._event = asyncio.Event()
+        return True
+
+    async def wait(self, after: int = -1, timeout: Optional[float] = None) -> Optional[Head]:
+        """First head with number > `after` (the latest one, gaps possible); None on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.number <= after:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._event.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+        return self.head
+
+    async def stream(self) -> AsyncIterator[Head]:
+        """Each new head from now on (strictly increasing numbers)."""
+        last = self.number
+        while True:
+            head = await self.wait(last)
+            last = head.number
+            yield head
+
+
+class HeadTracker(HeadSource):
+    def __init__(self, w3: Web3, wss_url: str = "", redis=None, channel: str = "",
+                 max_poll_sec: float = 1.5, min_poll_sec: float = POLL_MIN_SEC, block_time_sec: float = BLOCK_TIME_SEC):
+        super().__init__()
+        self.w3 = w3
+        self.wss_url = wss_url
+        self.redis = redis                  # optional redis.asyncio client; heads are PUBLISHed to `channel`
+        self.channel = channel
+        self.max_poll_sec = max(min_poll_sec, max_poll_sec)
+        self.min_poll_sec = min_poll_sec
+        self.block_interval = block_time_sec
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Run the tracker in the background (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def _emit(self, head: Head) -> bool:
+        prev, prev_at = self.number, self.seen_at
+        if not await super()._emit(head):
+            return False
+        if prev >= 0:
+            per_block = (self.seen_at - prev_at) / (head.number - prev)
+            if head.number - prev > 1:
+                # blocks were skipped: we waited too long, take the measured interval as is
+                self.block_interval = per_block
+            else:
+                self.block_interval += 0.2 * (min(per_block, 10 * self.block_interval) - self.block_interval)
+            MET_INTERVAL.set(self.block_interval)
+        if self.redis is not None and self.channel:
+            try:
+                await self.redis.publish(self.channel, json.dumps(asdict(head), separators=(",", ":")))
+            except Exception as e:
+                jlog("error", event="head_publish_error", err=str(e))
+        return True
+
+    # ---------- producers ----------
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            if not self.wss_url:
+                await self._poll()
+                continue
+            try:
+                async for head in self._wss_heads():
+                    await self._emit(head)
+                    backoff = 1.0
+            except Exception as e:
+                MET_RECONNECTS.inc()
+                jlog("error", event="newheads_error", err=str(e), retry_sec=backoff)
+            # poll while the subscription is down, then resubscribe
+            await self._poll(until=time.monotonic() + backoff)
+            backoff = min(30.0, backoff * 2)
+
+    async def _wss_heads(self) -> AsyncIterator[Head]:
+        import websockets
+        subscribe = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newHeads"]})
+        async with websockets.connect(self.wss_url, ping_interval=20, ping_timeout=20) as ws:
+            await ws.send(subscribe)
+            while True:
+                msg = await asyncio.wait_for(ws.recv(), timeout=max(WSS_STALL_SEC, 5 * self.block_interval))
+                res = json.loads(msg).get("params", {}).get("result", {})
+                if res.get("number"):
+                    yield Head(int(res["number"], 16), res.get("hash", ""), int(res.get("timestamp", "0x0"), 16), "wss")
+
+    async def _poll(self, until: Optional[float] = None):
+        """Adaptive block-number polling, forever or until `until` (monotonic)."""
+        misses = 0
+        while until is None or time.monotonic() < until:
+            try:
+                n = int(await asyncio.to_thread(lambda: self.w3.eth.block_number))
+            except Exception as e:
+                jlog("error", event="head_poll_error", err=str(e))
+                n = -1
+            if n >= 0 and await self._emit(Head(n)):
+                misses = 0
+                # next block is due in ~block_interval: sleep most of it, then poll tightly
+                delay = max(self.min_poll_sec, 0.8 * self.block_interval)
+            else:
+                misses += 1
+                delay = min(self.max_poll_sec, self.min_poll_sec * 2 ** max(0, misses - 4))
+            if until is not None:
+                delay = min(delay, max(0.0, until - time.monotonic()))
+            await asyncio.sleep(delay)
+
+
+class RedisHeads(HeadSource):
+    """Heads published by a HeadTracker in another process."""
+
+    def __init__(self, redis, channel: str):
+        super().__init__()
+        self.redis = redis
+        self.channel = channel
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(self.channel)
+                async for msg in pubsub.listen():
+                    if msg.get("type") != "message":
+                        continue
+                    d = json.loads(msg["data"])
+                    await self._emit(Head(int(d["number"]), d.get("hash", ""), int(d.get("timestamp", 0)), "redis"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                jlog("error", event="head_channel_error", channel=self.channel, err=str(e))
+                await asyncio.sleep(3.0)
@@ -4,6 +4,7 @@ ATOM Liquidation Scanner (Polygon mainnet)
 - Finds liquidatable accounts on Aave v3 (Polygon) via subgraph, confirms on-chain
 - Optional Compound v3 support via subgraph (disabled by default)
 - Publishes opportunities to Redis Stream 'atom:opps:liquidations'
+  (change-only: one entry per new/changed position, "expired" once it is gone)
 - Prometheus metrics on METRICS_PORT
 - Strict: no private keys, no tx signing, no websockets required
 - Hard fail if not on chain_id=137 (Polygon)
@@ -23,6 +24,9 @@ import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+from graphql_batch import GraphQLBatcher
+from signal_publisher import ChangeOnlyPublisher
+
 # ---------------- Env ----------------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -93,6 +97,10 @@ MET_CANDIDATES   = Gauge("atom_liq_candidates", "Candidates per discovery")
 AAVE_POOL_ABI = json.loads('[{"inputs":[{"internalType":"address","name":"user","type":"address"}],"name":"getUserAccountData","outputs":[{"internalType":"uint256","name":"totalCollateralBase","type":"uint256"},{"internalType":"uint256","name":"totalDebtBase","type":"uint256"},{"internalType":"uint256","name":"availableBorrowsBase","type":"uint256"},{"internalType":"uint256","name":"currentLiquidationThreshold","type":"uint256"},{"internalType":"uint256","name":"ltv","type":"uint256"},{"internalType":"uint256","name":"healthFactor","type":"uint256"}],"stateMutability":"view","type":"function"}]')
 CL_AGG_ABI = json.loads('[{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]')
 
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
+
 # ---------------- Models ----------------
 
 @dataclass
@@ -116,7 +124,12 @@ class LiquidationScanner:
     def __init__(self):
         self.w3 = Web3(HTTPProvider(RPC_URL, request_kwargs={"timeout": 10}))
         self.redis: Optional[redis.Redis] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("protocol", "user"),
+            value_field="net_profit_usd", on_error=_xadd_error,
+        )
         self.session: Optional[aiohttp.ClientSession] = None
+        self.graphql: Optional[GraphQLBatcher] = None
 
         self.aave_pool = self.w3.eth.contract(AAVE_V3_POOL_ADDR, abi=AAVE_POOL_ABI)
         self.chainlink_matic = self.w3.eth.contract(CHAINLINK_MATIC_USD, abi=CL_AGG_ABI)
@@ -132,6 +145,7 @@ class LiquidationScanner:
     async def init(self):
         self.redis = await redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
         self.session = aiohttp.ClientSession()
+        self.graphql = GraphQLBatcher(self.session)
         await self.discover_aave_candidates()
 
     async def close(self):
@@ -149,25 +163,16 @@ class LiquidationScanner:
             self.candidates = []
             return
         users: List[str] = []
-        skip = 0
-        more = True
         t0 = time.perf_counter()
         try:
-            assert self.session is not None
-            while more:
-                q = """
-                query($first:Int!,$skip:Int!,$hf:String!){
-                  users(first:$first, skip:$skip, where:{healthFactor_lt:$hf}) { id healthFactor }
-                }"""
-                payload = {"query": q, "variables": {"first": DISCOVERY_PAGE_SIZE, "skip": skip, "hf": AAVE_HF_QUERY_LT}}
-                async with self.session.post(AAVE_V3_SUBGRAPH_URL, json=payload, timeout=20) as r:
-                    data = await r.json()
-                    arr = data.get("data", {}).get("users", []) or []
-                    users.extend(u.get("id") for u in arr if u.get("id"))
-                    more = len(arr) == DISCOVERY_PAGE_SIZE
-                    skip += DISCOVERY_PAGE_SIZE
-                    # be polite
-                    await asyncio.sleep(0.25)
+            assert self.graphql is not None
+            # id_gt cursor pages: skip-based paging is capped and slows down deep into the set
+            rows = await self.graphql.paginate(
+                AAVE_V3_SUBGRAPH_URL, "users", "id healthFactor",
+                where="healthFactor_lt: $hf", var_defs="$hf: String!", variables={"hf": AAVE_HF_QUERY_LT},
+                page_size=DISCOVERY_PAGE_SIZE, pause_sec=0.25,   # be polite
+            )
+            users.extend(u.get("id") for u in rows if u.get("id"))
         except Exception as e:
             MET_ERRORS.inc()
             jlog("error", event="aave_discovery_error", err=str(e))
@@ -262,13 +267,7 @@ class LiquidationScanner:
     async def publish(self, opps: List[LiqOpp]):
         if not self.redis:
             return
-        for o in opps:
-            payload = json.dumps(asdict(o), separators=(",", ":"))
-            try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        await self.publisher.publish(self.redis, [asdict(o) for o in opps])
         if opps:
             MET_OPPS.inc(len(opps))
             MET_BEST_NET.set(max(o.net_profit_usd for o in opps))
@@ -4,7 +4,9 @@ ATOM Liquidity Mining & Incentive Farming Scanner (Polygon)
 - Scans QuickSwap/Sushi farms on Polygon for APR, TVL, and IL risk
 - Computes reward APR from MasterChef rates and pool allocPoints
 - Prices rewards and LP components in USDC via router getAmountsOut
+- LP pair state, token metadata and USDC quotes are batched through Multicall3
 - Publishes ranked opportunities to Redis stream 'atom:opps:liquidity'
+  (change-only; pools are fingerprinted by total APR in LM_PUBLISH_APR_STEP points)
 - Exposes Prometheus metrics on METRICS_PORT
 - Headless: NO signing, NO private keys, NO tx building
 - Production features: env-driven config, chain guard, circuit breakers, JSON logs
@@ -23,6 +25,9 @@ import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+import multicall
+from signal_publisher import ChangeOnlyPublisher
+
 # ---------------- Env helpers ----------------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -52,6 +57,7 @@ MAX_POOLS = int(_env("LM_MAX_POOLS", "80"))  # scan first N pools per protocol
 # Economics & filters
 MIN_TVL_USD = Decimal(_env("LM_MIN_TVL_USD", "20000"))
 MIN_TOTAL_APR = Decimal(_env("LM_MIN_TOTAL_APR", "5"))       # %
+APR_PUBLISH_STEP = float(_env("LM_PUBLISH_APR_STEP", "0.5"))  # % points; smaller APR moves are not re-published
 STABLE_TOKENS = set([s.strip().upper() for s in _env("LM_STABLE_TOKENS", "USDC,USDT,DAI,GUSD,FRAX,TUSD,USDC.E").split(",")])
 SECONDS_PER_YEAR = Decimal("31536000")
 POLYGON_BLOCKS_PER_YEAR = Decimal(_env("LM_BLOCKS_PER_YEAR", "15768000"))  # ~2s blocks
@@ -122,6 +128,10 @@ MET_POOLS_SCANNED= Gauge("atom_lm_pools_scanned", "Pools scanned in last run")
 MET_BEST_APR     = Gauge("atom_lm_best_total_apr", "Best total APR seen (percent)")
 MET_LAST_TS      = Gauge("atom_lm_last_scan_ts", "Unix ts of last successful scan")
 
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
+
 # ---------------- Data models ----------------
 
 @dataclass
@@ -154,12 +164,17 @@ class LiquidityMiningScanner:
             raise RuntimeError(f"Wrong network: expected chain_id {CHAIN_ID_EXPECTED}, got {cid}")
 
         self.redis: Optional[redis.Redis] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("protocol", "pool_pid"),
+            value_field="total_apr", quantum=APR_PUBLISH_STEP, on_error=_xadd_error,
+        )
 
         # Contracts
         self.qs_mc = self.w3.eth.contract(QS_MASTERCHEF, abi=MC_ABI)
         self.sushi_mc = self.w3.eth.contract(SUSHI_MINICHEF, abi=MC_ABI)
         self.qs_router = self.w3.eth.contract(QS_ROUTER, abi=ROUTER_ABI)
         self.sushi_router = self.w3.eth.contract(SUSHI_ROUTER, abi=ROUTER_ABI)
+        self.multicall = multicall.Multicall(self.w3)
 
         # Caches
         self.decimals: Dict[str, int] = {}
@@ -277,24 +292,51 @@ class LiquidityMiningScanner:
         except Exception:
             return None
 
-    def _pair_tvl_usd(self, router, lp_addr: str) -> Optional[Decimal]:
-        try:
-            pair = self._pair(lp_addr)
-            t0 = Web3.to_checksum_address(pair.functions.token0().call())
-            t1 = Web3.to_checksum_address(pair.functions.token1().call())
-            r0, r1, _ = pair.functions.getReserves().call()
-            d0 = self._dec(t0)
-            d1 = self._dec(t1)
-            # price 1 full token of each side
-            p0 = self._price_token_in_usdc(router, t0, 10**d0)
-            p1 = self._price_token_in_usdc(router, t1, 10**d1)
-            if p0 is None or p1 is None:
-                return None
-            v0 = (Decimal(r0) / Decimal(10**d0)) * p0
-            v1 = (Decimal(r1) / Decimal(10**d1)) * p1
-            return v0 + v1
-        except Exception:
+    def _prefetch_lp_state(self, lps: List[str]) -> Dict[str, Tuple[str, str, int, int]]:
+        """lp -> (token0, token1, reserve0, reserve1) for every LP in one batch."""
+        res = self.multicall.call([c for lp in lps for c in (multicall.token0(lp), multicall.token1(lp), multicall.get_reserves(lp))])
+        out: Dict[str, Tuple[str, str, int, int]] = {}
+        for idx, lp in enumerate(lps):
+            t0, t1, rs = res[3 * idx], res[3 * idx + 1], res[3 * idx + 2]
+            if t0 is None or t1 is None or rs is None:
+                continue
+            out[lp] = (t0, t1, rs[0], rs[1])
+        return out
+
+    def _prefetch_token_meta(self, tokens: List[str]) -> None:
+        """Fill the decimals/symbol caches for all uncached tokens in one batch."""
+        missing = [t for t in tokens if t not in self.decimals or t not in self.symbols]
+        res = self.multicall.call([c for t in missing for c in (multicall.decimals(t), multicall.symbol(t))])
+        for idx, t in enumerate(missing):
+            dec, sym = res[2 * idx], res[2 * idx + 1]
+            self.decimals.setdefault(t, int(dec) if dec is not None else 18)
+            self.symbols.setdefault(t, str(sym) if sym is not None else t[:6])
+
+    def _prefetch_usdc_prices(self, router, tokens: List[str]) -> Dict[str, Decimal]:
+        """USDC value of one whole token for each token, quoted via router.getAmountsOut in one batch."""
+        out: Dict[str, Decimal] = {}
+        quote = []
+        for t in tokens:
+            if t.lower() == USDC.lower():
+                out[t] = Decimal(1)
+            else:
+                quote.append(t)
+        res = self.multicall.call([multicall.get_amounts_out(router.address, 10**self._dec(t), [t, USDC]) for t in quote])
+        for t, amts in zip(quote, res):
+            if amts:
+                out[t] = Decimal(int(amts[-1])) / Decimal(10**6)
+        return out
+
+    def _pair_tvl_usd(self, state: Tuple[str, str, int, int], prices: Dict[str, Decimal]) -> Optional[Decimal]:
+        t0, t1, r0, r1 = state
+        # price 1 full token of each side
+        p0 = prices.get(t0)
+        p1 = prices.get(t1)
+        if p0 is None or p1 is None:
             return None
+        v0 = (Decimal(r0) / Decimal(10**self._dec(t0))) * p0
+        v1 = (Decimal(r1) / Decimal(10**self._dec(t1))) * p1
+        return v0 + v1
 
     def _is_stable_pair(self, sym0: str, sym1: str) -> bool:
         return sym0.upper() in STABLE_TOKENS and sym1.upper() in STABLE_TOKENS
@@ -344,61 +386,75 @@ class LiquidityMiningScanner:
             if reward_price_1 is None or reward_price_1 <= 0:
                 return opps
 
+            # chef reads per pid, then each window's LP state/metadata/prices in a few batches
             scanned = 0
-            for pid in range(plen):
-                if scanned >= MAX_POOLS:
-                    break
-                alloc = self._get_alloc_for_pid(mc, pid)
-                if alloc <= 0:
-                    continue
-                lp = self._get_lp_for_pid(mc, pid)
-                if not lp:
-                    continue
-
-                tvl = self._pair_tvl_usd(router, lp)
-                if tvl is None or tvl < MIN_TVL_USD:
-                    continue
-
-                # LP pair tokens and symbols
-                pair = self._pair(lp)
-                t0 = Web3.to_checksum_address(pair.functions.token0().call())
-                t1 = Web3.to_checksum_address(pair.functions.token1().call())
-                s0 = self._sym(t0)
-                s1 = self._sym(t1)
-
-                # pool's share of rewards
-                pool_annual_reward = (annual_reward_total * Decimal(alloc)) / Decimal(total_alloc)
-                pool_annual_reward_usd = pool_annual_reward * reward_price_1
-
-                reward_apr = (pool_annual_reward_usd / tvl) * Decimal(100)  # %
-                fee_apr = self._fee_apr_heuristic(tvl)
-                total_apr = reward_apr + fee_apr
-
-                if total_apr < MIN_TOTAL_APR:
+            start = 0
+            while start < plen and scanned < MAX_POOLS:
+                pids = range(start, min(plen, start + MAX_POOLS))
+                start = pids.stop
+                candidates: List[Tuple[int, int, str]] = []
+                for pid in pids:
+                    alloc = self._get_alloc_for_pid(mc, pid)
+                    if alloc <= 0:
+                        continue
+                    lp = self._get_lp_for_pid(mc, pid)
+                    if lp:
+                        candidates.append((pid, alloc, lp))
+
+                lp_state = self._prefetch_lp_state(sorted({lp for _, _, lp in candidates}))
+                tokens = sorted({t for st in lp_state.values() for t in st[:2]})
+                self._prefetch_token_meta(tokens)
+                prices = self._prefetch_usdc_prices(router, tokens)
+
+                for pid, alloc, lp in candidates:
+                    if scanned >= MAX_POOLS:
+                        break
+                    state = lp_state.get(lp)
+                    if state is None:
+                        continue
+
+                    tvl = self._pair_tvl_usd(state, prices)
+                    if tvl is None or tvl < MIN_TVL_USD:
+                        continue
+
+                    # LP pair tokens and symbols
+                    t0, t1 = state[0], state[1]
+                    s0 = self._sym(t0)
+                    s1 = self._sym(t1)
+
+                    # pool's share of rewards
+                    pool_annual_reward = (annual_reward_total * Decimal(alloc)) / Decimal(total_alloc)
+                    pool_annual_reward_usd = pool_annual_reward * reward_price_1
+
+                    reward_apr = (pool_annual_reward_usd / tvl) * Decimal(100)  # %
+                    fee_apr = self._fee_apr_heuristic(tvl)
+                    total_apr = reward_apr + fee_apr
+
+                    if total_apr < MIN_TOTAL_APR:
+                        scanned += 1
+                        continue
+
+                    il = 0.05 if self._is_stable_pair(s0, s1) else 0.20
+                    opps.append(FarmingOpportunity(
+                        protocol=name,
+                        pool_pid=pid,
+                        lp_token=lp,
+                        token0=t0,
+                        token1=t1,
+                        symbol0=s0,
+                        symbol1=s1,
+                        tvl_usd=float(tvl),
+                        reward_token=reward_token,
+                        reward_token_symbol=self._sym(reward_token),
+                        reward_price_usd=float(reward_price_1),
+                        reward_apr=float(reward_apr),
+                        fee_apr=float(fee_apr),
+                        total_apr=float(total_apr),
+                        il_risk=float(il),
+                        compound_hours=self._compound_hours(total_apr),
+                        ts=int(time.time()),
+                    ))
                     scanned += 1
-                    continue
-
-                il = 0.05 if self._is_stable_pair(s0, s1) else 0.20
-                opps.append(FarmingOpportunity(
-                    protocol=name,
-                    pool_pid=pid,
-                    lp_token=lp,
-                    token0=t0,
-                    token1=t1,
-                    symbol0=s0,
-                    symbol1=s1,
-                    tvl_usd=float(tvl),
-                    reward_token=reward_token,
-                    reward_token_symbol=self._sym(reward_token),
-                    reward_price_usd=float(reward_price_1),
-                    reward_apr=float(reward_apr),
-                    fee_apr=float(fee_apr),
-                    total_apr=float(total_apr),
-                    il_risk=float(il),
-                    compound_hours=self._compound_hours(total_apr),
-                    ts=int(time.time()),
-                ))
-                scanned += 1
 
         except Exception as e:
             MET_ERRORS.inc()
@@ -430,13 +486,7 @@ class LiquidityMiningScanner:
             return
         # rank by total APR then TVL
         opps.sort(key=lambda o: (o.total_apr, o.tvl_usd), reverse=True)
-        for o in opps:
-            payload = json.dumps(asdict(o), separators=(",", ":"))
-            try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        await self.publisher.publish(self.redis, [asdict(o) for o in opps])
         MET_OPPS.inc(len(opps))
         if opps:
             MET_BEST_APR.set(opps[0].total_apr)
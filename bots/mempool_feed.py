@@ -0,0 +1,208 @@
+# bots/mempool_feed.py
+"""
+ATOM pending-transaction feed
+- newPendingTransactions over WSS; hashes go into a bounded queue that drops
+  the oldest entry when full, so a mempool flood costs bounded memory and the
+  freshest hashes win
+- Fetch workers drain the queue in batches and resolve tx bodies with one
+  JSON-RPC batch POST (eth_getTransactionByHash x N) per batch
+- Bodies are handed to the consumer's callback (filter/decode/score);
+  hashes already seen within the TTL are skipped before fetching
+- TTLCache: insertion-ordered, expiring, size-capped map for per-hash results
+- Prometheus: hashes seen/dropped, bodies fetched, queue depth, batch latency
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+import aiohttp
+from prometheus_client import Counter, Gauge, Histogram
+
+from rate_limit import TokenBucket
+
+# ---------- Logging ----------
+log = logging.getLogger("atom.mempool")
+_hdlr = logging.StreamHandler()
+_hdlr.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(_hdlr)
+log.setLevel(logging.INFO)
+
+def jlog(level: str, **kw):
+    getattr(log, level.lower())(json.dumps(kw, separators=(",", ":")))
+
+# ---------- Metrics ----------
+MET_MP_SEEN    = Counter("atom_mempool_hashes_total", "Pending tx hashes received")
+MET_MP_DROPPED = Counter("atom_mempool_dropped_total", "Pending hashes dropped by queue backpressure (oldest first)")
+MET_MP_FETCHED = Counter("atom_mempool_fetched_total", "Pending tx bodies fetched (null = already mined or evicted)", ["result"])
+MET_MP_DEPTH   = Gauge("atom_mempool_queue_depth", "Pending hashes waiting to be fetched")
+MET_MP_LAT     = Histogram("atom_mempool_batch_seconds", "JSON-RPC batch fetch latency")
+MET_MP_ERRORS  = Counter("atom_mempool_errors_total", "Subscription and batch fetch failures")
+
+
+class TTLCache:
+    """Map with a per-entry TTL and a size cap (oldest evicted first)."""
+
+    def __init__(self, ttl_sec: float, max_size: int):
+        self.ttl_sec = ttl_sec
+        self.max_size = max(1, max_size)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()   # key -> (expires_at, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + self.ttl_sec, value)
+        self.expire()
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        return item[1]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None or item[0] <= time.monotonic() else item[1]
+
+    def expire(self) -> None:
+        # same TTL for every entry: insertion order is expiry order
+        now = time.monotonic()
+        while self._data:
+            key, (exp, _) = next(iter(self._data.items()))
+            if exp > now:
+                break
+            del self._data[key]
+
+
+_MISSING = object()
+
+
+class DropOldestQueue:
+    """Bounded FIFO: a put on a full queue evicts the oldest item instead of blocking."""
+
+    def __init__(self, maxsize: int):
+        self._items: Deque[Any] = deque(maxlen=max(1, maxsize))
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, item: Any) -> bool:
+        """Returns False when an old item was dropped to make room."""
+        dropped = len(self._items) == self._items.maxlen
+        self._items.append(item)
+        self._ready.set()
+        return not dropped
+
+    async def get_batch(self, n: int) -> List[Any]:
+        """Up to n items, oldest first; waits while empty."""
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return [self._items.popleft() for _ in range(min(n, len(self._items)))]
+
+
+class PendingTxFeed:
+    """
+    Subscribes to pending hashes on `wss_url` and fetches bodies from `rpc_url` in JSON-RPC batches.
+    `handle(txs)` receives the non-null bodies of each batch (raw JSON-RPC dicts, hex fields).
+    """
+
+    def __init__(self, wss_url: str, rpc_url: str, session: aiohttp.ClientSession,
+                 handle: Callable[[List[Dict[str, Any]]], Awaitable[None]], seen: TTLCache,
+                 queue_max: int = 5000, batch_size: int = 100, workers: int = 2,
+                 limiter: Optional[TokenBucket] = None, timeout_sec: float = 5.0):
+        self.wss_url = wss_url
+        self.rpc_url = rpc_url
+        self.session = session
+        self.handle = handle
+        self.seen = seen                    # hashes already fetched (consumer stores its results here too)
+        self.queue = DropOldestQueue(queue_max)
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+        self.limiter = limiter
+        self.timeout = aiohttp.ClientTimeout(total=timeout_sec)
+
+    async def run(self):
+        await asyncio.gather(self._subscribe(), *(self._fetch_worker() for _ in range(self.workers)))
+
+    async def _subscribe(self):
+        import websockets
+        subscribe = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "eth_subscribe", "params": ["newPendingTransactions"]})
+        while True:
+            try:
+                async with websockets.connect(self.wss_url, ping_interval=20, ping_timeout=20, max_queue=4096) as ws:
+                    await ws.send(subscribe)
+                    async for msg in ws:
+                        h = json.loads(msg).get("params", {}).get("result")
+                        if not isinstance(h, str):
+                            continue
+                        MET_MP_SEEN.inc()
+                        if not self.queue.put(h.lower()):
+                            MET_MP_DROPPED.inc()
+                        MET_MP_DEPTH.set(len(self.queue))
+            except Exception as e:
+                MET_MP_ERRORS.inc()
+                jlog("error", event="mempool_subscribe_error", err=str(e))
+                await asyncio.sleep(3.0)
+
+    async def _fetch_worker(self):
+        while True:
+            hashes = [h for h in await self.queue.get_batch(self.batch_size) if h not in self.seen]
+            MET_MP_DEPTH.set(len(self.queue))
+            if not hashes:
+                continue
+            try:
+                txs = await self.fetch(hashes)
+            except Exception as e:
+                MET_MP_ERRORS.inc()
+                jlog("error", event="mempool_fetch_error", batch=len(hashes), err=str(e))
+                continue
+            for h in hashes:
+                if h not in self.seen:
+                    self.seen.put(h, None)      # fetched, nothing of interest (the consumer overwrites hits)
+            bodies = [tx for tx in txs.values() if tx]
+            if bodies:
+                try:
+                    await self.handle(bodies)
+                except Exception as e:
+                    MET_MP_ERRORS.inc()
+                    jlog("error", event="mempool_handle_error", err=str(e))
+
+    async def fetch(self, hashes: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """hash -> tx body (None if unknown to the node) with a single JSON-RPC batch request."""
+        payload = [{"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionByHash", "params": [h]}
+                   for i, h in enumerate(hashes)]
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        t0 = time.perf_counter()
+        try:
+            async with self.session.post(self.rpc_url, json=payload, timeout=self.timeout) as r:
+                r.raise_for_status()
+                body = await r.json(content_type=None)
+        finally:
+            MET_MP_LAT.observe(time.perf_counter() - t0)
+        if not isinstance(body, list):
+            raise ValueError(str(body)[:300])
+        out: Dict[str, Optional[Dict[str, Any]]] = {h: None for h in hashes}
+        for item in body:
+            i = item.get("id")
+            if isinstance(i, int) and 0 <= i < len(hashes):
+                out[hashes[i]] = item.get("result")
+        hit = sum(1 for v in out.values() if v)
+        MET_MP_FETCHED.labels("tx").inc(hit)
+        MET_MP_FETCHED.labels("null").inc(len(hashes) - hit)
+        return out
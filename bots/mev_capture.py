@@ -2,8 +2,28 @@
 """
 ATOM MEV Scanner & Defense Signaler
 - Watches DEX router txs (block-level; optional WSS mempool if provided)
+- Mempool pipeline (MEV_MEMPOOL_ENABLED, mempool_feed.py): pending hashes in a
+  bounded drop-oldest queue, bodies fetched in JSON-RPC batches, router swaps
+  decoded and pre-scored against a head-pinned reserve snapshot; results sit
+  in a TTL cache by tx hash and the block scan reuses them (decode, quote and
+  notional as of before inclusion) instead of redoing the work
 - Identifies high-slippage, high-notional swaps that are backrun-sensitive
 - Estimates conservative backrun gross using AMM math and costs gas in USD
+- New blocks come from the shared head tracker (head_tracker.py): newHeads
+  over WSS_URL, adaptive polling without it; heads are re-published on the
+  Redis channel atom:heads:<chain> for other scanners
+- Blocks are pipelined: up to MEV_PREFETCH_BLOCKS are fetched concurrently
+  (transactions, Chainlink price and gas price once per block, reserve
+  snapshot) while the oldest is evaluated; signals publish in block order
+  and atom_mev_block_lag shows the distance to head
+- Expected out and USD notional are quoted locally (amm_quote.py): swap paths
+  resolve to CREATE2-derived pair addresses, and the reserves of every pair a
+  block touches are read in one Multicall3 snapshot pinned to that block;
+  router getAmountsOut only on a snapshot miss
+- Router calldata decoded by offset from a memoryview (swap_decode.py), all
+  five V2 swap selectors including exact-out; paths are checksummed only
+  when a signal is built
+- Integer Q112 fixed-point USD/slippage math (fixed_point.py); floats only when published
 - Publishes JSON signals to Redis stream 'atom:opps:mev'
 - Exposes Prometheus metrics
 - Headless: no signing, no bundle sending, no secrets in code
@@ -19,14 +39,24 @@ import asyncio
 import json
 import time
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
+import aiohttp
 import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
-from eth_abi import decode as abi_decode
+
+import fixed_point as fp
+import multicall as mc
+from amm_quote import AmmQuoter, V2Factory
+from head_tracker import HeadTracker, channel_for
+from mempool_feed import PendingTxFeed, TTLCache
+from rate_limit import TokenBucket
+from reserve_snapshot import MET_SNAP_AGE, ReserveSnapshot
+from swap_decode import ETH_IN_SELECTORS, decode_swap
 
 # ---------------- Env helpers ----------------
 
@@ -54,13 +84,27 @@ PAUSE_KEY = _env("MEV_PAUSE_KEY", f"atom:mev:{CHAIN}:paused")
 METRICS_PORT = int(_env("METRICS_PORT", "9114"))
 
 # Tuning
-BLOCK_POLL_SEC = float(_env("MEV_BLOCK_POLL_SEC", "1.5"))
+BLOCK_POLL_SEC = float(_env("MEV_BLOCK_POLL_SEC", "1.5"))       # max poll interval when heads are polled
+PUBLISH_HEADS = _env("MEV_PUBLISH_HEADS", "true").lower() in ("1", "true", "yes")
+PREFETCH_BLOCKS = max(1, int(_env("MEV_PREFETCH_BLOCKS", "4")))   # blocks fetched ahead of the one being evaluated
 MEMPOOL_ENABLED = _env("MEV_MEMPOOL_ENABLED", "false").lower() == "true" and bool(WSS_URL)
 MIN_NOTIONAL_USD = Decimal(_env("MEV_MIN_NOTIONAL_USD", "20000"))
 MIN_ALLOWED_SLIPPAGE_BPS = int(_env("MEV_MIN_ALLOWED_SLIPPAGE_BPS", "50"))  # 0.50% minOut discount threshold
 BACKRUN_SIZE_FRACTION = Decimal(_env("MEV_BACKRUN_SIZE_FRACTION", "0.25"))   # we model backrun at 25% of target size
 GAS_LIMIT_BACKRUN = int(_env("MEV_GAS_LIMIT", "450000"))
 AAVE_FLASH_FEE_BPS = Decimal(_env("AAVE_FLASH_FEE_BPS", "9"))
+LOCAL_QUOTES = _env("MEV_LOCAL_QUOTES", "true").lower() in ("1", "true", "yes")
+MEMPOOL_QUEUE_MAX = int(_env("MEV_MEMPOOL_QUEUE_MAX", "5000"))      # pending hashes awaiting fetch; oldest dropped
+MEMPOOL_BATCH_SIZE = int(_env("MEV_MEMPOOL_BATCH_SIZE", "100"))     # eth_getTransactionByHash calls per batch POST
+MEMPOOL_FETCHERS = int(_env("MEV_MEMPOOL_FETCHERS", "2"))           # concurrent batch fetches
+MEMPOOL_RPS = float(_env("MEV_MEMPOOL_RPS", "0"))                   # batch POSTs per second (0 = unlimited)
+MEMPOOL_TTL_SEC = float(_env("MEV_MEMPOOL_TTL_SEC", "120"))         # how long a pending result is kept for the block scan
+MEMPOOL_CACHE_MAX = int(_env("MEV_MEMPOOL_CACHE_MAX", "50000"))
+
+# Q112 fixed-point copies for the hot path
+MIN_NOTIONAL_Q = fp.from_decimal(MIN_NOTIONAL_USD)
+BACKRUN_FRACTION_Q = fp.from_decimal(BACKRUN_SIZE_FRACTION)
+FLASH_FEE_Q = fp.from_decimal(AAVE_FLASH_FEE_BPS / Decimal(10000))
 
 # Chainlink native/USD (for gas costing)
 CHAINLINK_NATIVE_USD = Web3.to_checksum_address(
@@ -80,6 +124,7 @@ USDT = Web3.to_checksum_address(
          "0xc2132D05D31c914a87C6611C10748AEb04B58e8F" if CHAIN == "polygon"
          else "0xdAC17F958D2ee523a2206206994597C13D831ec7")
 )
+USD_TOKENS = {USDC.lower(), USDT.lower()}   # decoded paths are lowercase (swap_decode.py)
 
 # Router allowlist (Uniswap V2-style)
 ROUTERS: Dict[str, str] = {}
@@ -94,6 +139,28 @@ else:
         Web3.to_checksum_address(_env("SUSHI_V2_ROUTER",     "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F")): "SushiV2",
     }
 
+# Router -> factory and pair init code hash (CREATE2 pair derivation for local quotes)
+QS_INIT_CODE_HASH = "0x96e8ac4277198ff8b6f785478aa9a39f403cb768dd02cbee326c3e7da348845f"   # QuickSwap = Uniswap V2
+SUSHI_INIT_CODE_HASH = "0xe18a34eb0e04b04f7a0ac29a6e80748dca96319b42c54d679cb821dca90c6303"
+
+def _factory(env_prefix: str, address: str, init_code_hash: str) -> V2Factory:
+    return V2Factory(
+        Web3.to_checksum_address(_env(f"{env_prefix}_FACTORY", address)),
+        bytes.fromhex(_env(f"{env_prefix}_INIT_CODE_HASH", init_code_hash).removeprefix("0x")),
+    )
+
+FACTORIES: Dict[str, V2Factory] = {}
+if CHAIN == "polygon":
+    FACTORIES = {
+        "QuickSwapV2": _factory("QUICKSWAP_V2", "0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32", QS_INIT_CODE_HASH),
+        "SushiV2":     _factory("SUSHI_V2",     "0xc35DADB65012eC5796536bD9864eD8773aBc74C4", SUSHI_INIT_CODE_HASH),
+    }
+else:
+    FACTORIES = {
+        "UniswapV2": _factory("UNISWAP_V2", "0x5C69bEe701ef814a2B6a3EDD4B1652CB9cc5aA6f", QS_INIT_CODE_HASH),
+        "SushiV2":   _factory("SUSHI_V2",   "0xC0AEe478e3658e2610c5F7A4A2E1777cE9e4f2Ac", SUSHI_INIT_CODE_HASH),
+    }
+
 # ---------------- ABIs & selectors ----------------
 
 PAIR_ABI = json.loads('[{"inputs":[],"name":"getReserves","outputs":[{"name":"reserve0","type":"uint112"},{"name":"reserve1","type":"uint112"},{"name":"blockTimestampLast","type":"uint32"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"stateMutability":"view","type":"function"},{"inputs":[],"name":"token1","outputs":[{"name":"","type":"address"}],"stateMutability":"view","type":"function"}]')
@@ -101,13 +168,6 @@ ROUTER_ABI = json.loads('[{"inputs":[{"internalType":"uint256","name":"amountIn"
 ERC20_ABI = json.loads('[{"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"symbol","outputs":[{"name":"","type":"string"}],"stateMutability":"view","type":"function"}]')
 CL_AGG_ABI = json.loads('[{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]')
 
-# V2 function selectors we handle (swapExactTokensForTokens / ETH variants)
-SEL_swapExactTokensForTokens = "0x38ed1739"
-SEL_swapTokensForExactTokens = "0x8803dbee"
-SEL_swapExactETHForTokens    = "0x7ff36ab5"
-SEL_swapExactTokensForETH    = "0x18cbafe5"
-SEL_swapETHForExactTokens    = "0xfb3bdb41"
-
 # ---------------- Logging & Metrics ----------------
 
 log = logging.getLogger("atom.mev")
@@ -124,6 +184,12 @@ MET_ERRORS     = Counter("atom_mev_errors_total", "Errors")
 MET_SIGNALS    = Counter("atom_mev_signals_total", "Published signals")
 MET_BEST_NET   = Gauge("atom_mev_best_net_profit_usd", "Best net last scan")
 MET_LAST_BLOCK = Gauge("atom_mev_last_block", "Last processed block number")
+MET_BLOCK_LAG  = Gauge("atom_mev_block_lag", "Blocks between the chain head and the block being evaluated")
+MET_FETCH_LAT  = Histogram("atom_mev_block_fetch_seconds", "Block prefetch latency (txs, per-block prices, reserve snapshot)")
+MET_QUOTES     = Counter("atom_mev_quotes_total", "Swap quotes by source (local snapshot, rpc fallback, failed)", ["source"])
+MET_PENDING    = Counter("atom_mev_pending_swaps_total", "Pending router swaps pre-scored (candidate, below threshold, unquoted)", ["result"])
+MET_PENDING_HITS = Counter("atom_mev_pending_cache_hits_total", "Block swaps served from the pending-tx cache")
+MET_PENDING_SIZE = Gauge("atom_mev_pending_cache_size", "Entries in the pending-tx cache")
 
 # ---------------- Models ----------------
 
@@ -137,7 +203,7 @@ class MEVSignal:
     path: List[str]
     amount_in: str           # raw uint
     min_out: str            # raw uint
-    expected_out: str       # from getAmountsOut at observe time
+    expected_out: str       # getAmountsOut-equivalent at the scanned block (pending: head before inclusion)
     allowed_slippage_bps: int
     notional_usd: float
     est_gross_usd: float
@@ -147,6 +213,27 @@ class MEVSignal:
     ts: int
     block_number: int
 
+@dataclass
+class BlockContext:
+    """Per-block inputs, fetched once by the prefetch stage."""
+    number: int
+    swaps: List[Tuple[Any, str, Tuple[str, int, int, List[str]]]]   # (tx, router, decoded swap)
+    gas_usd: int                          # Q112, backrun gas at this block's gas price and native/USD
+    quoter: Optional[AmmQuoter] = None    # reserves pinned to this block; None -> router quotes
+    prescored: Dict[str, "PendingSwap"] = field(default_factory=dict)   # tx hash -> mempool pre-score
+
+@dataclass
+class PendingSwap:
+    """A router swap seen in the mempool, decoded and quoted against the head it was pending at."""
+    tx_hash: str
+    router: str
+    decoded: Tuple[str, int, int, List[str]]   # amount_in filled from tx value for ETH-in swaps
+    head: int
+    expected_out: Optional[int] = None
+    slippage_bps: int = 0
+    notional: Optional[int] = None           # Q112 USD
+    first_seen: float = 0.0
+
 # ---------------- Core scanner ----------------
 
 class MEVCaptureScanner:
@@ -155,6 +242,16 @@ class MEVCaptureScanner:
         self.redis: Optional[redis.Redis] = None
         self.native_oracle = self.w3.eth.contract(CHAINLINK_NATIVE_USD, abi=CL_AGG_ABI)
         self.routers = {addr: self.w3.eth.contract(addr, abi=ROUTER_ABI) for addr in ROUTERS.keys()}
+        self.factories: Dict[str, V2Factory] = {addr: FACTORIES[name] for addr, name in ROUTERS.items() if name in FACTORIES}
+        self.multicall = mc.Multicall(self.w3)
+        # per-block snapshots are short-lived: the age gauge reads the newest load time instead
+        self.snapshot_loaded_at = 0.0
+        MET_SNAP_AGE.set_function(lambda: time.time() - self.snapshot_loaded_at if self.snapshot_loaded_at else 0.0)
+        self.heads = HeadTracker(self.w3, WSS_URL, channel=channel_for(CHAIN), max_poll_sec=BLOCK_POLL_SEC)
+        # pending tx hash -> PendingSwap (router swap) or None (fetched, not ours); shared with the feed's dedup
+        self.pending = TTLCache(MEMPOOL_TTL_SEC, MEMPOOL_CACHE_MAX)
+        self.mempool: Optional[PendingTxFeed] = None
+        self.session: Optional[aiohttp.ClientSession] = None   # mempool JSON-RPC batches
 
         # token caches
         self.decimals: Dict[str, int] = {}
@@ -168,8 +265,26 @@ class MEVCaptureScanner:
 
     async def init(self):
         self.redis = await redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+        if PUBLISH_HEADS:
+            self.heads.redis = self.redis
+        if MEMPOOL_ENABLED:
+            self.session = aiohttp.ClientSession()
+            self.mempool = PendingTxFeed(
+                WSS_URL, RPC_URL, self.session, self.on_pending, self.pending,
+                queue_max=MEMPOOL_QUEUE_MAX, batch_size=MEMPOOL_BATCH_SIZE, workers=MEMPOOL_FETCHERS,
+                limiter=TokenBucket("mempool", MEMPOOL_RPS),
+            )
         jlog("info", event="mev_scanner_init", chain=CHAIN, rpc=RPC_URL, wss=bool(WSS_URL), mempool=MEMPOOL_ENABLED)
 
+    async def close(self):
+        try:
+            if self.session:
+                await self.session.close()
+        except Exception:
+            pass
+        finally:
+            self.session = None
+
     # -------- helpers --------
 
     async def paused(self) -> bool:
@@ -184,27 +299,29 @@ class MEVCaptureScanner:
             pass
         return False
 
-    async def native_usd(self) -> Decimal:
+    async def native_usd(self, block_number: Optional[int] = None) -> int:
+        """Native/USD from Chainlink (8 decimals) as of `block_number` (default: latest), Q112."""
         try:
-            rd = await asyncio.to_thread(self.native_oracle.functions.latestRoundData().call)
-            return Decimal(rd[1]) / Decimal(10**8)
+            fn = self.native_oracle.functions.latestRoundData()
+            rd = await asyncio.to_thread(fn.call, block_identifier="latest" if block_number is None else block_number)
+            return fp.from_units(int(rd[1]), 8)
         except Exception as e:
             MET_ERRORS.inc()
             jlog("error", event="chainlink_error", err=str(e))
             # conservative fallback if feed hiccups
-            return Decimal("0.70") if CHAIN == "polygon" else Decimal("3000")
+            return fp.from_ratio(70, 100) if CHAIN == "polygon" else fp.from_int(3000)
 
     def _decimals(self, token: str) -> int:
-        if token in self.decimals:
-            return self.decimals[token]
+        key = token.lower()
+        if key in self.decimals:
+            return self.decimals[key]
         try:
-            erc = self.w3.eth.contract(token, abi=ERC20_ABI)
+            erc = self.w3.eth.contract(Web3.to_checksum_address(token), abi=ERC20_ABI)
             d = erc.functions.decimals().call()
-            self.decimals[token] = int(d)
-            return self.decimals[token]
+            self.decimals[key] = int(d)
         except Exception:
-            self.decimals[token] = 6 if token in (USDC, USDT) else 18
-            return self.decimals[token]
+            self.decimals[key] = 6 if key in USD_TOKENS else 18
+        return self.decimals[key]
 
     def _symbol(self, token: str) -> str:
         if token in self.symbols:
@@ -217,40 +334,90 @@ class MEVCaptureScanner:
         except Exception:
             return token[:6]
 
-    async def _expected_out(self, router_addr: str, amount_in: int, path: List[str]) -> Optional[int]:
+    def _local_amounts_out(self, quoter: Optional[AmmQuoter], router_addr: str, amount_in: int,
+                           path: List[str]) -> Optional[List[int]]:
+        factory = self.factories.get(router_addr)
+        if quoter is None or factory is None:
+            return None
+        amts = quoter.amounts_out(factory, amount_in, path)
+        if amts is not None:
+            MET_QUOTES.labels("local").inc()
+        return amts
+
+    async def _expected_out(self, router_addr: str, amount_in: int, path: List[str],
+                            quoter: Optional[AmmQuoter] = None) -> Optional[int]:
+        amts = self._local_amounts_out(quoter, router_addr, amount_in, path)
+        if amts is not None:
+            return amts[-1]
+        MET_QUOTES.labels("rpc").inc()
         try:
             router = self.routers[router_addr]
-            amts = await asyncio.to_thread(router.functions.getAmountsOut(amount_in, path).call)
+            fn = router.functions.getAmountsOut(amount_in, [Web3.to_checksum_address(p) for p in path])
+            amts = await asyncio.to_thread(fn.call)
             if isinstance(amts, list) and len(amts) == len(path):
                 return int(amts[-1])
         except Exception as e:
             MET_ERRORS.inc()
             jlog("error", event="getAmountsOut_error", router=router_addr, err=str(e))
+        MET_QUOTES.labels("failed").inc()
         return None
 
-    async def _usd_notional(self, amount_in: int, path: List[str], router_addr: str) -> Optional[Decimal]:
+    async def _usd_notional(self, amount_in: int, path: List[str], router_addr: str,
+                            quoter: Optional[AmmQuoter] = None) -> Optional[int]:
+        """USD value of the input (Q112)."""
         # Try to value by converting to USDC via the same router path if possible
         try:
             src = path[0]
-            if src in (USDC, USDT):
-                d = self._decimals(src)
-                return Decimal(amount_in) / Decimal(10**d)
+            if src.lower() in USD_TOKENS:
+                return fp.from_units(amount_in, self._decimals(src))
             # attempt to append USDC to path if not already present
-            new_path = path + [USDC] if path[-1] != USDC else path
-            amt = await asyncio.to_thread(self.routers[router_addr].functions.getAmountsOut(amount_in, new_path).call)
-            d = self._decimals(USDC)
-            return Decimal(amt[-1]) / Decimal(10**d)
+            new_path = self._usd_path(path)
+            amt = self._local_amounts_out(quoter, router_addr, amount_in, new_path)
+            if amt is None:
+                MET_QUOTES.labels("rpc").inc()
+                fn = self.routers[router_addr].functions.getAmountsOut(amount_in, [Web3.to_checksum_address(p) for p in new_path])
+                amt = await asyncio.to_thread(fn.call)
+            return fp.from_units(int(amt[-1]), self._decimals(USDC))
         except Exception:
+            MET_QUOTES.labels("failed").inc()
             return None
 
+    @staticmethod
+    def _usd_path(path: List[str]) -> List[str]:
+        return path + [USDC] if path[-1].lower() != USDC.lower() else path
+
+    async def _load_snapshot(self, block_number: Optional[int], swaps: List[Tuple[str, List[str]]]) -> Optional[AmmQuoter]:
+        """
+        One Multicall3 getReserves batch at `block_number` (None: head) for every pair on the block's swap paths (and their
+        USDC legs). Each block gets its own snapshot, so blocks in the prefetch window do not share state.
+        """
+        routes = []
+        for router_addr, path in swaps:
+            factory = self.factories.get(router_addr)
+            if factory is not None:
+                routes.append((factory, path))
+                if path[0].lower() not in USD_TOKENS:
+                    routes.append((factory, self._usd_path(path)))
+        if not routes:
+            return None
+        quoter = AmmQuoter(ReserveSnapshot(self.w3, self.multicall))
+        try:
+            await quoter.snapshot.refresh(quoter.pairs(routes), block_number)
+        except Exception as e:
+            # quotes fall back to the router for this block
+            MET_ERRORS.inc()
+            jlog("error", event="reserve_snapshot_error", block=block_number, err=str(e))
+            return None
+        self.snapshot_loaded_at = max(self.snapshot_loaded_at, quoter.snapshot.loaded_at)
+        return quoter
+
     def _allowed_slippage_bps(self, min_out: int, expected_out: int) -> int:
         if expected_out <= 0:
             return 0
-        # how much the trader is willing to lose vs current quote
-        slip = (Decimal(expected_out) - Decimal(min_out)) / Decimal(expected_out)
-        return int((slip * Decimal(10000)).quantize(Decimal("1")))
+        # how much the trader is willing to lose vs current quote, rounded to the nearest bp
+        return ((expected_out - min_out) * 20000 + expected_out) // (2 * expected_out)
 
-    def _backrun_gross_conservative(self, amount_in: int, path: List[str], expected_out: int, min_out: int) -> Decimal:
+    def _backrun_gross_conservative(self, amount_in: int, path: List[str], expected_out: int, min_out: int) -> int:
         """
         Conservative gross estimate using allowed slippage and a fraction of target size.
         If trader allows S bps slippage, assume we can capture ~ S/2 of that on a trade that is F of target size.
@@ -258,45 +425,17 @@ class MEVCaptureScanner:
         """
         # notional is computed separately; here we return a multiplier in bps to apply later
         s_bps = self._allowed_slippage_bps(min_out, expected_out)
-        # capture factor 50% of their allowance at configured backrun fraction
-        return Decimal(max(s_bps, 0)) / Decimal(10000) * Decimal("0.5") * BACKRUN_SIZE_FRACTION
+        # capture factor 50% of their allowance at configured backrun fraction (Q112)
+        return max(s_bps, 0) * BACKRUN_FRACTION_Q // (2 * 10000)
 
     # -------- decoders --------
 
-    def _decode_swap(self, tx_input: str) -> Optional[Tuple[str, int, int, List[str]]]:
+    def _decode_swap(self, tx_input) -> Optional[Tuple[str, int, int, List[str]]]:
         """
-        Return (selector, amount_in, amount_out_min, path)
-        Only supports common V2 swap selectors.
+        Return (selector, amount_in, amount_out_min, path), path lowercase (checksummed only when a signal is built).
+        Exact-out swaps come back as (selector, amountInMax, amountOut, path); see swap_decode.py.
         """
-        if not tx_input or len(tx_input) < 10:
-            return None
-        sel = tx_input[:10]
-        data = bytes.fromhex(tx_input[10:]) if tx_input.startswith("0x") else bytes.fromhex(tx_input)
-
-        try:
-            if sel == SEL_swapExactTokensForTokens:
-                # (uint amountIn, uint amountOutMin, address[] path, address to, uint deadline)
-                amount_in, min_out, path, _, _ = abi_decode(
-                    ["uint256", "uint256", "address[]", "address", "uint256"], data
-                )
-                return sel, int(amount_in), int(min_out), [Web3.to_checksum_address(p) for p in path]
-            elif sel == SEL_swapExactETHForTokens:
-                # (uint amountOutMin, address[] path, address to, uint deadline)
-                # amount_in is tx.value (we won't have it from input only), mark as 0 to skip notional
-                min_out, path, _, _ = abi_decode(["uint256", "address[]", "address", "uint256"], data)
-                return sel, 0, int(min_out), [Web3.to_checksum_address(p) for p in path]
-            elif sel == SEL_swapExactTokensForETH:
-                # (uint amountIn, uint amountOutMin, address[] path, address to, uint deadline)
-                amount_in, min_out, path, _, _ = abi_decode(["uint256", "uint256", "address[]", "address", "uint256"], data)
-                return sel, int(amount_in), int(min_out), [Web3.to_checksum_address(p) for p in path]
-            elif sel == SEL_swapTokensForExactTokens:
-                # we ignore exact-out for now (harder to model); return None
-                return None
-            elif sel == SEL_swapETHForExactTokens:
-                return None
-        except Exception:
-            return None
-        return None
+        return decode_swap(tx_input) if tx_input else None
 
     # -------- publishing --------
 
@@ -318,45 +457,75 @@ class MEVCaptureScanner:
 
     # -------- scanners --------
 
-    async def scan_block(self, block_number: int):
+    async def fetch_block(self, block_number: int) -> BlockContext:
         """
-        Pull full transactions for the block; filter by router allowlist; decode; compute signals.
+        Prefetch stage: full transactions, native/USD and gas price (concurrently, once per block),
+        router swaps decoded, and the reserve snapshot for their paths. Swaps pre-scored from the
+        mempool are taken from the pending cache and need no decode or snapshot.
         """
-        start = time.perf_counter()
-        signals: List[MEVSignal] = []
-        try:
-            block = await asyncio.to_thread(self.w3.eth.get_block, block_number, True)
-            txs = block["transactions"] or []
-            MET_LAST_BLOCK.set(block_number)
-
-            native_usd = await self.native_usd()
-            gas_price = self.w3.eth.gas_price
-            gas_usd = (Decimal(gas_price) * Decimal(GAS_LIMIT_BACKRUN) / Decimal(1e18)) * native_usd
-            flash_fee_factor = AAVE_FLASH_FEE_BPS / Decimal(10000)
-
-            for tx in txs:
-                to = tx.get("to")
-                if not to:
+        t0 = time.perf_counter()
+        block, native_usd, gas_price = await asyncio.gather(
+            asyncio.to_thread(self.w3.eth.get_block, block_number, True),
+            self.native_usd(block_number),
+            asyncio.to_thread(lambda: self.w3.eth.gas_price),
+        )
+        swaps = []
+        prescored: Dict[str, PendingSwap] = {}
+        unscored: List[Tuple[str, List[str]]] = []
+        for tx in block["transactions"] or []:
+            to = tx.get("to")
+            if not to:
+                continue
+            to = Web3.to_checksum_address(to)
+            if to not in self.routers:
+                continue
+            pre = self.pending.pop(Web3.to_hex(tx["hash"])) if self.mempool is not None else None
+            if pre is not None:
+                MET_PENDING_HITS.inc()
+                prescored[pre.tx_hash] = pre
+                swaps.append((tx, to, pre.decoded))
+                if pre.expected_out and pre.notional is not None:
                     continue
-                to = Web3.to_checksum_address(to)
-                if to not in self.routers:
-                    continue
-
-                # decode
+            else:
                 sel_amount_path = self._decode_swap(tx.get("input", "0x"))
                 if not sel_amount_path:
                     continue
+                swaps.append((tx, to, sel_amount_path))
+            if len(swaps[-1][2][3]) >= 2:
+                unscored.append((to, swaps[-1][2][3]))
+        quoter = None
+        if LOCAL_QUOTES and unscored:
+            quoter = await self._load_snapshot(block_number, unscored)
+        MET_FETCH_LAT.observe(time.perf_counter() - t0)
+        return BlockContext(
+            number=block_number,
+            swaps=swaps,
+            gas_usd=gas_price * GAS_LIMIT_BACKRUN * native_usd // fp.POW10[18],
+            quoter=quoter,
+            prescored=prescored,
+        )
+
+    async def evaluate_block(self, ctx: BlockContext) -> List[MEVSignal]:
+        """Filter and price the block's decoded swaps (no RPC unless a quote misses the snapshot)."""
+        start = time.perf_counter()
+        signals: List[MEVSignal] = []
+        try:
+            for tx, to, sel_amount_path in ctx.swaps:
                 selector, amount_in, min_out, path = sel_amount_path
 
-                # supply ETH amount if selector used value (exactETHForTokens)
-                if selector == SEL_swapExactETHForTokens and amount_in == 0:
+                # supply ETH amount if selector used value (exactETHForTokens / ETHForExactTokens)
+                if selector in ETH_IN_SELECTORS and amount_in == 0:
                     amount_in = int(tx.get("value", 0))
 
                 if amount_in <= 0 or len(path) < 2:
                     continue
 
-                # expectedOut now
-                expected_out = await self._expected_out(to, amount_in, path)
+                # expectedOut now (seen pending: as quoted at the head before inclusion)
+                pre = ctx.prescored.get(Web3.to_hex(tx["hash"])) if ctx.prescored else None
+                if pre is not None and pre.expected_out:
+                    expected_out = pre.expected_out
+                else:
+                    expected_out = await self._expected_out(to, amount_in, path, ctx.quoter)
                 if not expected_out or expected_out <= 0:
                     continue
 
@@ -365,18 +534,21 @@ class MEVCaptureScanner:
                     continue
 
                 # USD notional
-                notional = await self._usd_notional(amount_in, path, to)
-                if notional is None or notional < MIN_NOTIONAL_USD:
+                if pre is not None and pre.notional is not None:
+                    notional = pre.notional
+                else:
+                    notional = await self._usd_notional(amount_in, path, to, ctx.quoter)
+                if notional is None or notional < MIN_NOTIONAL_Q:
                     continue
 
                 # conservative gross capture factor
                 capture_factor = self._backrun_gross_conservative(amount_in, path, expected_out, min_out)
-                est_gross = notional * capture_factor
+                est_gross = fp.mul(notional, capture_factor)
 
-                flash_fee_usd = notional * flash_fee_factor
-                est_net = est_gross - flash_fee_usd - gas_usd
+                flash_fee_usd = fp.mul(notional, FLASH_FEE_Q)
+                est_net = est_gross - flash_fee_usd - ctx.gas_usd
 
-                if est_net < Decimal(0):
+                if est_net < 0:
                     continue
 
                 sig = MEVSignal(
@@ -390,64 +562,145 @@ class MEVCaptureScanner:
                     min_out=str(min_out),
                     expected_out=str(expected_out),
                     allowed_slippage_bps=int(slippage_bps),
-                    notional_usd=float(notional),
-                    est_gross_usd=float(est_gross),
-                    est_flash_fee_usd=float(flash_fee_usd),
-                    est_gas_usd=float(gas_usd),
-                    est_net_usd=float(est_net),
+                    notional_usd=fp.to_float(notional),
+                    est_gross_usd=fp.to_float(est_gross),
+                    est_flash_fee_usd=fp.to_float(flash_fee_usd),
+                    est_gas_usd=fp.to_float(ctx.gas_usd),
+                    est_net_usd=fp.to_float(est_net),
                     ts=int(time.time()),
-                    block_number=block_number,
+                    block_number=ctx.number,
                 )
                 signals.append(sig)
 
         except Exception as e:
             MET_ERRORS.inc()
-            jlog("error", event="scan_block_error", block=block_number, err=str(e))
+            jlog("error", event="scan_block_error", block=ctx.number, err=str(e))
         finally:
             MET_SCAN_LAT.observe(time.perf_counter() - start)
+        return signals
 
+    async def _publish_block(self, block_number: int, signals: List[MEVSignal]):
+        MET_LAST_BLOCK.set(block_number)
         if signals:
             # Sort by net descending, publish
             signals.sort(key=lambda s: s.est_net_usd, reverse=True)
             await self._publish(signals)
             jlog("info", event="mev_signals", count=len(signals), best=asdict(signals[0]))
 
+    async def scan_block(self, block_number: int):
+        """
+        Pull full transactions for the block; filter by router allowlist; decode; compute signals.
+        """
+        try:
+            ctx = await self.fetch_block(block_number)
+        except Exception as e:
+            MET_ERRORS.inc()
+            jlog("error", event="scan_block_error", block=block_number, err=str(e))
+            return
+        await self._publish_block(block_number, await self.evaluate_block(ctx))
+
     async def block_loop(self):
-        last = self.w3.eth.block_number
+        """
+        Woken by the head tracker on each new block. Up to PREFETCH_BLOCKS blocks are fetched
+        concurrently ahead of the one being evaluated; evaluation and publishing stay strictly in block order.
+        """
+        self.heads.start()
+        nxt = (await self.heads.wait()).number + 1
+        inflight: Deque[Tuple[int, asyncio.Task]] = deque()
         while True:
             try:
                 if await self.paused():
                     await asyncio.sleep(1.0)
                     continue
-                cur = self.w3.eth.block_number
-                if cur > last:
-                    for b in range(last + 1, cur + 1):
-                        await self.scan_block(b)
-                    last = cur
-                await asyncio.sleep(BLOCK_POLL_SEC)
+                h = await self.heads.wait(nxt - 1, timeout=5.0)   # bounded so pause state is re-checked
+                if h is None:
+                    continue
+                head = h.number
+                while inflight or nxt <= head:
+                    head = self.heads.number   # heads keep arriving while a backlog drains
+                    while nxt <= head and len(inflight) < PREFETCH_BLOCKS:
+                        inflight.append((nxt, asyncio.create_task(self.fetch_block(nxt))))
+                        nxt += 1
+                    b, task = inflight.popleft()
+                    if nxt <= head:
+                        # keep the window full while block b is evaluated
+                        inflight.append((nxt, asyncio.create_task(self.fetch_block(nxt))))
+                        nxt += 1
+                    MET_BLOCK_LAG.set(head - b)
+                    try:
+                        ctx = await task
+                    except Exception as e:
+                        MET_ERRORS.inc()
+                        jlog("error", event="scan_block_error", block=b, err=str(e))
+                        continue
+                    await self._publish_block(b, await self.evaluate_block(ctx))
             except Exception as e:
                 MET_ERRORS.inc()
                 jlog("error", event="block_loop_error", err=str(e))
                 await asyncio.sleep(1.0)
 
-    # Optional mempool monitor (best-effort). Many providers gate mempool access.
+    # -------- mempool --------
+
+    def _prescore(self, p: PendingSwap, quoter: Optional[AmmQuoter]) -> None:
+        """Expected out, allowed slippage and USD notional from the local snapshot only (no router RPC)."""
+        _, amount_in, min_out, path = p.decoded
+        amts = self._local_amounts_out(quoter, p.router, amount_in, path) if amount_in > 0 and len(path) >= 2 else None
+        if amts is None:
+            MET_PENDING.labels("unquoted").inc()
+            return
+        p.expected_out = amts[-1]
+        p.slippage_bps = self._allowed_slippage_bps(min_out, p.expected_out)
+        if path[0].lower() in USD_TOKENS:
+            p.notional = fp.from_units(amount_in, self._decimals(path[0]))
+        else:
+            usd = self._local_amounts_out(quoter, p.router, amount_in, self._usd_path(path))
+            p.notional = fp.from_units(usd[-1], self._decimals(USDC)) if usd else None
+        if p.slippage_bps < MIN_ALLOWED_SLIPPAGE_BPS or (p.notional is not None and p.notional < MIN_NOTIONAL_Q):
+            MET_PENDING.labels("below").inc()
+        elif p.notional is None:
+            MET_PENDING.labels("unquoted").inc()
+        else:
+            MET_PENDING.labels("candidate").inc()
+
+    async def on_pending(self, txs: List[Dict[str, Any]]):
+        """
+        One fetched mempool batch (raw JSON-RPC bodies): keep unmined router swaps, decode them,
+        pre-score them all on a single snapshot at the current head, and cache them by hash.
+        """
+        head = self.heads.number
+        now = time.time()
+        found: List[PendingSwap] = []
+        for tx in txs:
+            to = tx.get("to")
+            if not to or tx.get("blockNumber"):
+                continue
+            to = Web3.to_checksum_address(to)
+            if to not in self.routers:
+                continue
+            dec = self._decode_swap(tx.get("input", "0x"))
+            if not dec:
+                continue
+            sel, amount_in, min_out, path = dec
+            if sel in ETH_IN_SELECTORS and amount_in == 0:
+                amount_in = int(tx.get("value", "0x0"), 16)
+            found.append(PendingSwap(tx["hash"].lower(), to, (sel, amount_in, min_out, path), head, first_seen=now))
+        if not found:
+            return
+        quoter = None
+        if LOCAL_QUOTES:
+            quoter = await self._load_snapshot(head if head >= 0 else None,
+                                               [(p.router, p.decoded[3]) for p in found if len(p.decoded[3]) >= 2])
+        for p in found:
+            self._prescore(p, quoter)
+            self.pending.put(p.tx_hash, p)
+        MET_PENDING_SIZE.set(len(self.pending))
+
     async def mempool_loop(self):
-        import websockets
-        if not MEMPOOL_ENABLED:
+        """Optional (many providers gate mempool access): feeds on_pending; see mempool_feed.py."""
+        if self.mempool is None:
             return
-        subscribe = json.dumps({"jsonrpc":"2.0","id":1,"method":"eth_subscribe","params":["newPendingTransactions"]})
-        while True:
-            try:
-                async with websockets.connect(WSS_URL, ping_interval=20, ping_timeout=20) as ws:
-                    await ws.send(subscribe)
-                    async for msg in ws:
-                        # We intentionally do not act on mempool pending txs beyond enrichment:
-                        # they can be fetched and cached for the next block-level confirmation step.
-                        _ = msg  # placeholder for enrichment; avoid heavy logic here
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="mempool_loop_error", err=str(e))
-                await asyncio.sleep(3.0)
+        self.heads.start()
+        await self.mempool.run()
 
     async def run(self):
         start_http_server(METRICS_PORT)
@@ -457,7 +710,12 @@ class MEVCaptureScanner:
         tasks = [asyncio.create_task(self.block_loop())]
         if MEMPOOL_ENABLED:
             tasks.append(asyncio.create_task(self.mempool_loop()))
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await self.close()
 
 if __name__ == "__main__":
     try:
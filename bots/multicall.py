@@ -0,0 +1,241 @@
+# bots/multicall.py
+"""
+ATOM Multicall3 batching engine
+- Packs many view calls (getReserves/token0/token1/decimals/symbol/getPair/...)
+  into Multicall3.aggregate3 eth_calls, chunked by calldata size and call count
+- Every call is allowFailure=true and decoded independently: one bad pair
+  yields None for that slot, never a failed batch
+- A batch that fails as a whole on a revert, gas cap or payload/response size
+  limit is bisected and retried; transport errors (connection, timeout, HTTP
+  5xx, rate limiting) are raised to the caller instead of multiplied
+- Sync `call()` for blocking scanners, async `acall()` runs chunks concurrently
+  (every request, bisected halves included, waits on the optional per-node
+  token bucket first)
+- Prometheus batch/call/failure counters and batch latency
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+import requests
+from eth_abi import decode as abi_decode, encode as abi_encode
+from prometheus_client import Counter, Histogram
+from web3 import Web3
+from web3.exceptions import ContractLogicError, ProviderConnectionError
+
+from rate_limit import TokenBucket
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+# Multicall3 is deployed at the same address on Polygon, Ethereum and most EVM chains
+MULTICALL3_ADDRESS = Web3.to_checksum_address(_env("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11"))
+MAX_CALLDATA_BYTES = int(_env("MULTICALL_MAX_CALLDATA_BYTES", "24000"))
+MAX_CALLS_PER_BATCH = int(_env("MULTICALL_MAX_CALLS", "500"))
+
+BlockId = Union[int, str]
+
+# ---------- Selectors ----------
+SEL_AGGREGATE3     = bytes.fromhex("82ad56cb")  # aggregate3((address,bool,bytes)[])
+SEL_GET_RESERVES   = bytes.fromhex("0902f1ac")  # getReserves()
+SEL_TOKEN0         = bytes.fromhex("0dfe1681")  # token0()
+SEL_TOKEN1         = bytes.fromhex("d21220a7")  # token1()
+SEL_DECIMALS       = bytes.fromhex("313ce567")  # decimals()
+SEL_SYMBOL         = bytes.fromhex("95d89b41")  # symbol()
+SEL_GET_PAIR       = bytes.fromhex("e6a43905")  # getPair(address,address)
+SEL_GET_AMOUNTS_OUT= bytes.fromhex("d06ca61f")  # getAmountsOut(uint256,address[])
+
+# ---------- Metrics ----------
+MET_MC_BATCHES  = Counter("atom_multicall_batches_total", "aggregate3 eth_calls issued")
+MET_MC_CALLS    = Counter("atom_multicall_calls_total", "Individual calls packed into multicall batches")
+MET_MC_FAILURES = Counter("atom_multicall_call_failures_total", "Individual calls that failed or did not decode")
+MET_MC_SPLITS   = Counter("atom_multicall_batch_splits_total", "Batches bisected after a whole-batch failure")
+MET_MC_LAT      = Histogram("atom_multicall_batch_latency_seconds", "aggregate3 round-trip latency")
+
+# whole-batch errors a smaller batch can get past; rate-limit replies ("limit exceeded") are not among them
+_SPLIT_HINTS = ("revert", "out of gas", "gas required exceeds", "gas limit", "too large", "too big",
+                "payload", "response size", "execution aborted")
+_RATE_HINTS = ("rate limit", "too many requests", "limit exceeded", "capacity")
+
+
+def _splittable(e: Exception) -> bool:
+    """True for a failure caused by the batch itself (revert, gas, size), False for transport/node errors."""
+    if isinstance(e, ContractLogicError):
+        return True
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None:
+        return status == 413                    # HTTP payload too large; 429/5xx are the node, not the batch
+    if isinstance(e, (ProviderConnectionError, requests.RequestException, OSError)):
+        return False                            # connection refused, timeouts (TimeoutError is an OSError)
+    msg = str(e).lower()
+    return not any(h in msg for h in _RATE_HINTS) and any(h in msg for h in _SPLIT_HINTS)
+
+# ---------- Calls ----------
+
+@dataclass
+class Call:
+    target: str
+    data: bytes
+    decode: Callable[[bytes], Any]
+
+    def encoded_size(self) -> int:
+        # tuple head (address, bool, offset) + length word + right-padded payload + array offset word
+        return 32 * 5 + ((len(self.data) + 31) // 32) * 32
+
+
+def _dec_reserves(raw: bytes):
+    r0, r1, ts = abi_decode(["uint112", "uint112", "uint32"], raw)
+    return int(r0), int(r1), int(ts)
+
+def _dec_address(raw: bytes) -> str:
+    return Web3.to_checksum_address(abi_decode(["address"], raw)[0])
+
+def _dec_uint(raw: bytes) -> int:
+    return int(abi_decode(["uint256"], raw)[0])
+
+def _dec_uint_array(raw: bytes) -> List[int]:
+    return [int(x) for x in abi_decode(["uint256[]"], raw)[0]]
+
+def _dec_symbol(raw: bytes) -> str:
+    # most tokens return string; a few legacy ones (MKR-style) return bytes32
+    try:
+        return str(abi_decode(["string"], raw)[0])
+    except Exception:
+        return raw[:32].rstrip(b"\x00").decode("utf-8", errors="ignore")
+
+def _addr_word(addr: str) -> bytes:
+    return bytes(12) + bytes.fromhex(addr[2:] if addr.startswith("0x") else addr)
+
+def get_reserves(pair: str) -> Call:
+    return Call(pair, SEL_GET_RESERVES, _dec_reserves)
+
+def token0(pair: str) -> Call:
+    return Call(pair, SEL_TOKEN0, _dec_address)
+
+def token1(pair: str) -> Call:
+    return Call(pair, SEL_TOKEN1, _dec_address)
+
+def decimals(token: str) -> Call:
+    return Call(token, SEL_DECIMALS, _dec_uint)
+
+def symbol(token: str) -> Call:
+    return Call(token, SEL_SYMBOL, _dec_symbol)
+
+def get_pair(factory: str, token_a: str, token_b: str) -> Call:
+    return Call(factory, SEL_GET_PAIR + _addr_word(token_a) + _addr_word(token_b), _dec_address)
+
+def get_amounts_out(router: str, amount_in: int, path: Sequence[str]) -> Call:
+    data = SEL_GET_AMOUNTS_OUT + abi_encode(["uint256", "address[]"], [int(amount_in), list(path)])
+    return Call(router, data, _dec_uint_array)
+
+# ---------- Engine ----------
+
+class Multicall:
+    def __init__(self, w3: Web3, address: str = MULTICALL3_ADDRESS,
+                 max_calldata_bytes: int = MAX_CALLDATA_BYTES, max_calls: int = MAX_CALLS_PER_BATCH,
+                 limiter: Optional[TokenBucket] = None):
+        self.w3 = w3
+        self.limiter = limiter
+        self.address = Web3.to_checksum_address(address)
+        self.max_calldata_bytes = max(1024, max_calldata_bytes)
+        self.max_calls = max(1, max_calls)
+
+    def _chunks(self, calls: Sequence[Call]) -> List[range]:
+        out: List[range] = []
+        start, size = 0, 0
+        for i, c in enumerate(calls):
+            sz = c.encoded_size()
+            if i > start and (size + sz > self.max_calldata_bytes or i - start >= self.max_calls):
+                out.append(range(start, i))
+                start, size = i, 0
+            size += sz
+        if start < len(calls):
+            out.append(range(start, len(calls)))
+        return out
+
+    def _encode(self, calls: Sequence[Call]) -> bytes:
+        return SEL_AGGREGATE3 + abi_encode(
+            ["(address,bool,bytes)[]"], [[(c.target, True, c.data) for c in calls]]
+        )
+
+    def _send(self, calls: Sequence[Call], block: BlockId) -> List[Optional[Any]]:
+        """One aggregate3 eth_call; raises if the batch fails as a whole."""
+        MET_MC_BATCHES.inc()
+        t0 = time.perf_counter()
+        try:
+            raw = self.w3.eth.call({"to": self.address, "data": self._encode(calls)}, block_identifier=block)
+            results = abi_decode(["(bool,bytes)[]"], bytes(raw))[0]
+        finally:
+            MET_MC_LAT.observe(time.perf_counter() - t0)
+
+        out: List[Optional[Any]] = []
+        for c, (ok, ret) in zip(calls, results):
+            if not ok or not ret:
+                MET_MC_FAILURES.inc()
+                out.append(None)
+                continue
+            try:
+                out.append(c.decode(bytes(ret)))
+            except Exception:
+                MET_MC_FAILURES.inc()
+                out.append(None)
+        MET_MC_CALLS.inc(len(calls))
+        return out
+
+    @staticmethod
+    def _split(calls: Sequence[Call]) -> int:
+        """Bisection point after a splittable whole-batch failure; 0 when a single call failed (its slot is None)."""
+        if len(calls) == 1:
+            MET_MC_FAILURES.inc()
+            return 0
+        MET_MC_SPLITS.inc()
+        return len(calls) // 2
+
+    def _execute(self, calls: Sequence[Call], block: BlockId) -> List[Optional[Any]]:
+        try:
+            return self._send(calls, block)
+        except Exception as e:
+            if not _splittable(e):
+                raise
+        mid = self._split(calls)
+        if not mid:
+            return [None]
+        return self._execute(calls[:mid], block) + self._execute(calls[mid:], block)
+
+    async def _aexecute(self, calls: Sequence[Call], block: BlockId) -> List[Optional[Any]]:
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        try:
+            return await asyncio.to_thread(self._send, calls, block)
+        except Exception as e:
+            if not _splittable(e):
+                raise
+        mid = self._split(calls)
+        if not mid:
+            return [None]
+        return await self._aexecute(calls[:mid], block) + await self._aexecute(calls[mid:], block)
+
+    def call(self, calls: Sequence[Call], block: BlockId = "latest") -> List[Optional[Any]]:
+        """Blocking (no limiter): results are positionally aligned with `calls`; failed slots are None."""
+        calls = list(calls)
+        out: List[Optional[Any]] = [None] * len(calls)
+        for rng in self._chunks(calls):
+            out[rng.start:rng.stop] = self._execute(calls[rng.start:rng.stop], block)
+        return out
+
+    async def acall(self, calls: Sequence[Call], block: BlockId = "latest") -> List[Optional[Any]]:
+        """Async: chunks are dispatched concurrently; results aligned with `calls`."""
+        calls = list(calls)
+        if not calls:
+            return []
+        parts = await asyncio.gather(*(self._aexecute(calls[rng.start:rng.stop], block) for rng in self._chunks(calls)))
+        out: List[Optional[Any]] = []
+        for part in parts:
+            out.extend(part)
+        return out
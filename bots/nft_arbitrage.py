@@ -4,6 +4,7 @@ ATOM NFT & Tokenized Asset Arbitrage Scanner (headless)
 - Scans enabled marketplaces for collection floors/listings (env-driven)
 - Computes net spread after marketplace fees and gas (native/USD via Chainlink)
 - Publishes ranked opportunities to Redis stream 'atom:opps:nft'
+  (change-only; a collection whose scan failed keeps its live entries)
 - Exposes Prometheus metrics on METRICS_PORT
 - Circuit breakers: global kill switch + per-bot pause key
 - Production hygiene: no private keys, no signing, no hardcoded secrets, chain guard
@@ -23,6 +24,8 @@ import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+from signal_publisher import ChangeOnlyPublisher
+
 # ---------------------- ENV ----------------------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -117,6 +120,10 @@ MET_BEST_PROFIT   = Gauge("atom_nft_best_profit_usd", "Best net profit seen")
 MET_LAST_TS       = Gauge("atom_nft_last_scan_ts", "Last successful scan ts")
 MET_MARKETS_ON    = Gauge("atom_nft_markets_enabled", "Enabled marketplace count")
 
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
+
 # ---------------------- Models ----------------------
 
 @dataclass
@@ -146,6 +153,10 @@ class NFTArbScanner:
 
         self.native_oracle = self.w3.eth.contract(CHAINLINK_NATIVE_USD, abi=CL_ABI)
         self.redis: Optional[redis.Redis] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("collection_address", "buy_market", "sell_market"),
+            value_field="net_profit_usd", on_error=_xadd_error,
+        )
         self.session: Optional[aiohttp.ClientSession] = None
 
         # enabled markets inventory
@@ -309,21 +320,13 @@ class NFTArbScanner:
                     ))
         return opps
 
-    async def publish(self, opps: List['NFTArbOpp']):
+    async def publish(self, opps: List['NFTArbOpp'], failed: Optional[set] = None):
         if not self.redis:
             return
         opps.sort(key=lambda x: x.net_profit_usd, reverse=True)
-        for op in opps:
-            try:
-                await self.redis.xadd(
-                    REDIS_STREAM,
-                    {"data": json.dumps(asdict(op), separators=(",", ":"))},
-                    maxlen=REDIS_MAXLEN,
-                    approximate=True,
-                )
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        # collections whose scan failed were not re-evaluated: keep their live entries
+        failed = failed or set()
+        await self.publisher.publish(self.redis, [asdict(op) for op in opps], stale=lambda k: k[0] not in failed)
         if opps:
             MET_OPPS.inc(len(opps))
             MET_BEST_PROFIT.set(opps[0].net_profit_usd)
@@ -341,14 +344,16 @@ class NFTArbScanner:
             all_opps: List[NFTArbOpp] = []
             tasks = [self._scan_collection(sym, addr, native_usd, gas_price) for sym, addr in COLLECTIONS.items()]
             results = await asyncio.gather(*tasks, return_exceptions=True)
-            for res in results:
+            failed = set()
+            for addr, res in zip(COLLECTIONS.values(), results):
                 if isinstance(res, Exception):
                     MET_ERRORS.inc()
                     jlog("error", event="scan_collection_error", err=str(res))
+                    failed.add(Web3.to_checksum_address(addr))
                     continue
                 all_opps.extend(res)
 
-            await self.publish(all_opps)
+            await self.publish(all_opps, failed)
             MET_LAST_TS.set(int(time.time()))
             if all_opps:
                 jlog("info", event="nft_opps", count=len(all_opps), best=asdict(all_opps[0]))
@@ -0,0 +1,272 @@
+# bots/pair_index.py
+"""
+ATOM persistent pair & token-metadata index (SQLite)
+- Every factory pair with token0/token1, plus token decimals/symbol, on disk
+- Backfilled from PairCreated logs in chunked eth_getLogs ranges (bisected on
+  provider range/size errors), extended incrementally from a per-factory
+  checkpoint block; pairs and checkpoint are committed in one transaction
+- Scanners warm-start from it with one indexed query per factory (token0 IN
+  .. AND token1 IN .., on the (factory, token0, token1) index) instead of
+  getPair / decimals / symbol discovery over RPC
+- The initial backfill is a separate step: python bots/pair_index.py
+  [--to-block N]; running bots only extend factories that already have a
+  checkpoint
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+from web3 import Web3, HTTPProvider
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+PAIR_INDEX_PATH = _env("PAIR_INDEX_PATH", "artifacts/pair_index.sqlite")
+LOG_CHUNK_BLOCKS = int(_env("PAIR_INDEX_LOG_CHUNK", "5000"))
+LOG_CONCURRENCY = int(_env("PAIR_INDEX_CONCURRENCY", "4"))
+CONFIRMATIONS = int(_env("PAIR_INDEX_CONFIRMATIONS", "5"))
+
+# keccak256("PairCreated(address,address,address,uint256)")
+PAIR_CREATED_TOPIC = "0x0d3648bd0f6ba80134a33ba9275ac585d9d315f0ad8355cddefde31afa28d0e9"
+
+# Polygon V2 factories and (conservative) deployment blocks; backfill starts here
+FACTORIES: Dict[str, Tuple[str, int]] = {
+    "quickswap": (Web3.to_checksum_address("0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32"), 4_931_000),
+    "sushiswap": (Web3.to_checksum_address("0xc35DADB65012eC5796536bD9864eD8773aBc74C4"), 11_333_000),
+}
+
+# ---------- Logging ----------
+log = logging.getLogger("atom.pair_index")
+_hdlr = logging.StreamHandler()
+_hdlr.setFormatter(logging.Formatter("%(message)s"))
+log.addHandler(_hdlr)
+log.setLevel(logging.INFO)
+
+def jlog(level: str, **kw):
+    getattr(log, level.lower())(json.dumps(kw, separators=(",", ":")))
+
+# ---------- Metrics ----------
+MET_IDX_PAIRS   = Counter("atom_pair_index_pairs_added_total", "Pairs added to the index from PairCreated logs")
+MET_IDX_RANGES  = Counter("atom_pair_index_log_ranges_total", "getLogs ranges fetched")
+MET_IDX_SPLITS  = Counter("atom_pair_index_range_splits_total", "getLogs ranges bisected after a provider error")
+MET_IDX_LAT     = Histogram("atom_pair_index_getlogs_seconds", "getLogs latency per range")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pairs (
+    factory TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    token0 TEXT NOT NULL,
+    token1 TEXT NOT NULL,
+    created_block INTEGER NOT NULL,
+    PRIMARY KEY (factory, pair)
+);
+CREATE INDEX IF NOT EXISTS pairs_by_tokens ON pairs (factory, token0, token1);
+CREATE TABLE IF NOT EXISTS tokens (
+    address TEXT PRIMARY KEY,
+    decimals INTEGER NOT NULL,
+    symbol TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    factory TEXT PRIMARY KEY,
+    block INTEGER NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0     -- 1 once a backfill has reached the head
+);
+"""
+
+
+def _word_address(word) -> str:
+    raw = bytes(word) if isinstance(word, (bytes, bytearray)) else bytes.fromhex(str(word)[2:] if str(word).startswith("0x") else str(word))
+    return Web3.to_checksum_address(raw[-20:])
+
+
+def decode_pair_created(lg) -> Tuple[str, str, str, int]:
+    """(pair, token0, token1, block) from a PairCreated log."""
+    data = lg["data"]
+    raw = bytes(data) if isinstance(data, (bytes, bytearray)) else bytes.fromhex(str(data)[2:])
+    return (
+        Web3.to_checksum_address(raw[12:32]),
+        _word_address(lg["topics"][1]),
+        _word_address(lg["topics"][2]),
+        int(lg["blockNumber"]),
+    )
+
+
+class PairIndex:
+    def __init__(self, path: str = PAIR_INDEX_PATH):
+        self.path = path
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    # ---------- reads ----------
+
+    def checkpoint(self, factory: str) -> Optional[int]:
+        with self._lock:
+            row = self.db.execute("SELECT block FROM checkpoints WHERE factory=?", (factory,)).fetchone()
+        return int(row[0]) if row else None
+
+    def is_warm(self, factory: str) -> bool:
+        """True once the factory has been backfilled to the head at least once (safe to warm-start from)."""
+        with self._lock:
+            row = self.db.execute("SELECT complete FROM checkpoints WHERE factory=?", (factory,)).fetchone()
+        return bool(row and row[0])
+
+    def pair_count(self, factory: str) -> int:
+        with self._lock:
+            return int(self.db.execute("SELECT COUNT(*) FROM pairs WHERE factory=?", (factory,)).fetchone()[0])
+
+    def pairs_among(self, factory: str, tokens: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """(pair, token0, token1) for every indexed pair of `factory` whose two tokens are both in `tokens`."""
+        wanted = sorted({Web3.to_checksum_address(t) for t in tokens})
+        if not wanted:
+            return []
+        marks = ",".join("?" * len(wanted))
+        q = f"SELECT pair, token0, token1 FROM pairs WHERE factory=? AND token0 IN ({marks}) AND token1 IN ({marks})"
+        with self._lock:
+            return [tuple(r) for r in self.db.execute(q, [factory, *wanted, *wanted]).fetchall()]
+
+    def warm_pairs_among(self, factories: Dict[str, str], tokens: Iterable[str]) -> Optional[Dict[str, List[Tuple[str, str, str]]]]:
+        """name -> pairs_among(factory, tokens) for every factory, or None unless all of them are warm (blocking)."""
+        if not all(self.is_warm(f) for f in factories.values()):
+            return None
+        tokens = list(tokens)
+        return {name: self.pairs_among(f, tokens) for name, f in factories.items()}
+
+    def token_meta(self, tokens: Iterable[str]) -> Dict[str, Tuple[int, str]]:
+        """address -> (decimals, symbol) for the indexed subset of `tokens`."""
+        wanted = list({Web3.to_checksum_address(t) for t in tokens})
+        out: Dict[str, Tuple[int, str]] = {}
+        with self._lock:
+            for i in range(0, len(wanted), 500):
+                part = wanted[i:i + 500]
+                q = "SELECT address, decimals, symbol FROM tokens WHERE address IN (%s)" % ",".join("?" * len(part))
+                for addr, dec, sym in self.db.execute(q, part):
+                    out[addr] = (int(dec), str(sym))
+        return out
+
+    # ---------- writes ----------
+
+    def put_pairs(self, factory: str, rows: Iterable[Tuple[str, str, str, int]], checkpoint: int,
+                  complete: bool = False) -> int:
+        """Insert (pair, token0, token1, block) rows and advance the checkpoint atomically."""
+        rows = list(rows)
+        with self._lock, self.db:
+            cur = self.db.executemany(
+                "INSERT OR IGNORE INTO pairs (factory, pair, token0, token1, created_block) VALUES (?,?,?,?,?)",
+                [(factory, p, t0, t1, b) for p, t0, t1, b in rows],
+            )
+            self.db.execute(
+                "INSERT INTO checkpoints (factory, block, complete) VALUES (?, ?, ?) "
+                "ON CONFLICT(factory) DO UPDATE SET block=MAX(block, excluded.block), "
+                "complete=MAX(complete, excluded.complete)",
+                (factory, checkpoint, int(complete)),
+            )
+        added = max(cur.rowcount, 0)
+        MET_IDX_PAIRS.inc(added)
+        return added
+
+    def put_tokens(self, rows: Iterable[Tuple[str, int, str]]) -> None:
+        with self._lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO tokens (address, decimals, symbol) VALUES (?,?,?)",
+                [(Web3.to_checksum_address(a), int(d), str(s)) for a, d, s in rows],
+            )
+
+    # ---------- backfill ----------
+
+    def _fetch_range(self, w3: Web3, factory: str, lo: int, hi: int) -> List[Tuple[str, str, str, int]]:
+        t0 = time.perf_counter()
+        try:
+            logs = w3.eth.get_logs({"fromBlock": lo, "toBlock": hi, "address": factory, "topics": [PAIR_CREATED_TOPIC]})
+        except Exception:
+            MET_IDX_LAT.observe(time.perf_counter() - t0)
+            if hi <= lo:
+                raise
+            # too many results / range too wide for the provider: bisect
+            MET_IDX_SPLITS.inc()
+            mid = (lo + hi) // 2
+            return self._fetch_range(w3, factory, lo, mid) + self._fetch_range(w3, factory, mid + 1, hi)
+        MET_IDX_LAT.observe(time.perf_counter() - t0)
+        MET_IDX_RANGES.inc()
+        return [decode_pair_created(lg) for lg in logs]
+
+    async def sync_factory(self, w3: Web3, factory: str, start_block: int, to_block: Optional[int] = None,
+                           chunk: int = LOG_CHUNK_BLOCKS, concurrency: int = LOG_CONCURRENCY,
+                           backfill: bool = True) -> int:
+        """
+        Extend the index for `factory` from its checkpoint (or `start_block`) to `to_block`. Returns pairs added.
+        With backfill=False a factory that has never been synced is skipped (the CLI does the initial backfill).
+        """
+        factory = Web3.to_checksum_address(factory)
+        cp = await asyncio.to_thread(self.checkpoint, factory)
+        if cp is None and not backfill:
+            jlog("info", event="pair_index_not_backfilled", factory=factory, hint="python bots/pair_index.py")
+            return 0
+        if to_block is None:
+            to_block = int(await asyncio.to_thread(lambda: w3.eth.block_number)) - CONFIRMATIONS
+        lo = start_block if cp is None else cp + 1
+        if lo > to_block:
+            return 0
+        if cp is None:
+            jlog("info", event="pair_index_backfill", factory=factory, from_block=lo, to_block=to_block)
+
+        ranges = [(b, min(b + chunk - 1, to_block)) for b in range(lo, to_block + 1, max(1, chunk))]
+        added = 0
+        step = max(1, concurrency)
+        for i in range(0, len(ranges), step):
+            window = ranges[i:i + step]
+            parts = await asyncio.gather(*(
+                asyncio.to_thread(self._fetch_range, w3, factory, a, b) for a, b in window
+            ))
+            # a window is committed only once every range in it succeeded
+            added += await asyncio.to_thread(
+                self.put_pairs, factory, [r for part in parts for r in part], window[-1][1],
+                i + step >= len(ranges),
+            )
+        return added
+
+    async def sync_all(self, w3: Web3, factories: Dict[str, Tuple[str, int]] = FACTORIES,
+                       to_block: Optional[int] = None, backfill: bool = True) -> Dict[str, int]:
+        if to_block is None:
+            to_block = int(await asyncio.to_thread(lambda: w3.eth.block_number)) - CONFIRMATIONS
+        out: Dict[str, int] = {}
+        for name, (factory, start) in factories.items():
+            out[name] = await self.sync_factory(w3, factory, start, to_block, backfill=backfill)
+        return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Backfill / extend the pair index from PairCreated logs")
+    ap.add_argument("--to-block", type=int, default=None)
+    args = ap.parse_args()
+    rpc = _env("POLYGON_RPC_URL")
+    if not rpc:
+        raise SystemExit("POLYGON_RPC_URL is required")
+    w3 = Web3(HTTPProvider(rpc, request_kwargs={"timeout": 30}))
+    idx = PairIndex()
+    t0 = time.perf_counter()
+    added = asyncio.run(idx.sync_all(w3, to_block=args.to_block))
+    jlog("info", event="pair_index_synced", path=idx.path, added=added,
+         pairs={n: idx.pair_count(f) for n, (f, _) in FACTORIES.items()},
+         checkpoints={n: idx.checkpoint(f) for n, (f, _) in FACTORIES.items()},
+         secs=round(time.perf_counter() - t0, 2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# bots/pairs_screen.py
+"""
+ATOM universe-wide pairs screen (NumPy)
+- Token price histories live in one aligned 2-D array (tokens x bars), a
+  fixed-capacity ring that gains one column per refresh pass
+- Every token pair i < j is screened in one vectorized pass over the
+  log-price matrix:
+  * log-return correlation (standardized returns, one matrix product)
+  * log-ratio spread z-score over the trailing window
+  * AR(1) fit of the spread (dS_t = a + b*S_{t-1}): Dickey-Fuller t-stat of b
+    as the cointegration test and half-life = -ln 2 / ln(1 + b)
+- Top-K mean-reverting candidates (DF t-stat, then |z|) feed the engines
+- Pure NumPy and picklable arguments, so it runs in a worker process
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class PriceMatrix:
+    """Aligned price bars for a fixed token list; NaN until a token has a price."""
+
+    def __init__(self, tokens: Sequence[str], capacity: int):
+        self.tokens = list(tokens)
+        self.index = {t: i for i, t in enumerate(self.tokens)}
+        self.capacity = max(2, capacity)
+        self._buf = np.full((len(self.tokens), self.capacity), np.nan, dtype=np.float64)
+        self._head = 0     # next column to write
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def append_bar(self, prices: np.ndarray) -> None:
+        """One column of prices (NaN = no quote yet); missing quotes carry the previous bar forward."""
+        col = np.asarray(prices, dtype=np.float64).copy()
+        if self._n:
+            prev = self._buf[:, (self._head - 1) % self.capacity]
+            gap = ~np.isfinite(col) | (col <= 0)
+            col[gap] = prev[gap]
+        self._buf[:, self._head] = col
+        self._head = (self._head + 1) % self.capacity
+        self._n = min(self._n + 1, self.capacity)
+
+    def seed(self, histories: Sequence[Sequence[float]]) -> None:
+        """Load per-token histories (oldest first, one per token), tail-aligned; shorter ones are NaN-padded."""
+        width = min(self.capacity, max((len(h) for h in histories), default=0))
+        block = np.full((len(self.tokens), width), np.nan, dtype=np.float64)
+        for i, h in enumerate(histories):
+            tail = list(h)[-width:]
+            if tail:
+                block[i, width - len(tail):] = tail
+        for k in range(width):
+            self.append_bar(block[:, k])
+
+    def view(self) -> np.ndarray:
+        """[tokens, bars] oldest bar first (a copy)."""
+        if self._n < self.capacity:
+            return self._buf[:, :self._n].copy()
+        return np.concatenate([self._buf[:, self._head:], self._buf[:, :self._head]], axis=1)
+
+
+@dataclass
+class PairScore:
+    pair: str             # "BASE/QUOTE"; the spread is log(base) - log(quote)
+    zscore: float
+    corr: float
+    df_tstat: float       # Dickey-Fuller t-stat of the spread's AR(1) slope (more negative = stronger reversion)
+    half_life: float      # bars; inf when the spread does not revert
+    bars: int
+
+
+def screen_pairs(
+    prices: np.ndarray,
+    symbols: Sequence[str],
+    top_k: int = 20,
+    window: int = 60,
+    min_bars: int = 40,
+    min_corr: float = 0.3,
+    max_half_life: float = 60.0,
+    max_df_tstat: float = -2.0,
+) -> List[PairScore]:
+    """
+    Screen every pair in `prices` ([tokens, bars], NaN = missing) and return the top_k candidates.
+    Only tokens with a full `min_bars` trailing history take part; the statistics use the trailing
+    bars all of them share.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    if prices.ndim != 2 or prices.shape[1] < min_bars:
+        return []
+    # common trailing span: the shortest complete tail across eligible tokens
+    valid = np.isfinite(prices) & (prices > 0)
+    # length of each token's trailing run of valid bars
+    run = np.where(valid[:, ::-1].all(axis=1), prices.shape[1], np.argmin(valid[:, ::-1], axis=1))
+    keep = np.nonzero(run >= min_bars)[0]
+    if keep.size < 2:
+        return []
+    bars = int(run[keep].min())
+    L = np.log(prices[keep, -bars:])                     # [n, B]
+    n = keep.size
+
+    # correlation of log returns, all pairs at once
+    R = np.diff(L, axis=1)
+    R = R - R.mean(axis=1, keepdims=True)
+    norm = np.sqrt((R * R).sum(axis=1))
+    norm[norm == 0] = np.inf
+    Rs = R / norm[:, None]
+    corr = Rs @ Rs.T                                     # [n, n]
+
+    ii, jj = np.triu_indices(n, k=1)
+    S = L[ii] - L[jj]                                    # [P, B] log-ratio spreads
+
+    # trailing-window z-score of the latest spread value
+    W = S[:, -min(window, bars):]
+    mu = W.mean(axis=1)
+    sd = W.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(sd > 0, (S[:, -1] - mu) / sd, 0.0)
+
+    # AR(1) on the spread: dS = a + b * S_lag (OLS per row)
+    x = S[:, :-1]
+    y = np.diff(S, axis=1)
+    xm = x - x.mean(axis=1, keepdims=True)
+    ym = y - y.mean(axis=1, keepdims=True)
+    sxx = (xm * xm).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        b = np.where(sxx > 0, (xm * ym).sum(axis=1) / sxx, 0.0)
+        resid = ym - b[:, None] * xm
+        dof = max(x.shape[1] - 2, 1)
+        se = np.sqrt((resid * resid).sum(axis=1) / dof / sxx)
+        tstat = np.where(se > 0, b / se, 0.0)
+        half_life = np.where((b < 0) & (b > -1), -np.log(2.0) / np.log1p(b), np.inf)
+
+    c = corr[ii, jj]
+    ok = (c >= min_corr) & (half_life <= max_half_life) & (tstat <= max_df_tstat) & np.isfinite(z)
+    idx = np.nonzero(ok)[0]
+    if idx.size == 0:
+        return []
+    # strongest reversion first, larger dislocation breaking ties
+    order = idx[np.lexsort((-np.abs(z[idx]), tstat[idx]))][:max(0, top_k)]
+    sym = [symbols[k] for k in keep]
+    return [
+        PairScore(
+            pair=f"{sym[ii[p]]}/{sym[jj[p]]}",
+            zscore=float(z[p]),
+            corr=float(c[p]),
+            df_tstat=float(tstat[p]),
+            half_life=float(half_life[p]),
+            bars=bars,
+        )
+        for p in order
+    ]
+
+
+def top_pairs(scores: Optional[List[PairScore]]) -> List[str]:
+    return [s.pair for s in scores or []]
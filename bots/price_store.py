@@ -0,0 +1,170 @@
+# bots/price_store.py
+"""
+ATOM on-disk price history store (append-only, columnar binary segments)
+- One directory per token under PRICE_STORE_DIR/<namespace>/, split into
+  fixed time segments (<segment start ts>.bin) of packed little-endian
+  (ts int64, price float64, volume float64) records, 24 bytes per bar
+- Appends are buffered in memory and written by `flush()` (one open+write
+  per touched segment); a torn tail from a crash is trimmed on the next write
+  and ignored on read
+- Range reads memory-map only the segments that overlap [since, until] and
+  binary-search the timestamps; `tail(n)` walks segments newest first
+- Retention deletes whole segments older than PRICE_STORE_RETENTION_DAYS, but
+  never below `min_bars` per token (the scanner's warm-start depth)
+- Scanners warm-start their in-memory windows from it instead of waiting for
+  (or re-downloading) history
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+ENABLED = _env("PRICE_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+STORE_DIR = _env("PRICE_STORE_DIR", "artifacts/price_store")
+RETENTION_SEC = float(_env("PRICE_STORE_RETENTION_DAYS", "30")) * 86400
+SEGMENT_SEC = int(_env("PRICE_STORE_SEGMENT_SEC", "86400"))
+PRUNE_EVERY_SEC = 3600.0
+
+BAR = np.dtype([("ts", "<i8"), ("price", "<f8"), ("volume", "<f8")])
+
+# ---------- Metrics ----------
+MET_PS_BARS    = Counter("atom_price_store_bars_written_total", "Bars appended to the price store", ["namespace"])
+MET_PS_PRUNED  = Counter("atom_price_store_segments_pruned_total", "Segments deleted by retention", ["namespace"])
+MET_PS_BYTES   = Gauge("atom_price_store_bytes", "Price store size on disk after the last prune", ["namespace"])
+
+
+class PriceStore:
+    def __init__(self, namespace: str, root: str = STORE_DIR, retention_sec: float = RETENTION_SEC,
+                 min_bars: int = 0, segment_sec: int = SEGMENT_SEC):
+        self.namespace = namespace
+        self.dir = os.path.join(root, namespace)
+        self.retention_sec = retention_sec
+        self.min_bars = max(0, min_bars)
+        self.segment_sec = max(60, segment_sec)
+        os.makedirs(self.dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[int, float, float]]] = defaultdict(list)
+        self._last_prune = 0.0
+
+    # ---------- layout ----------
+
+    def _token_dir(self, token: str) -> str:
+        return os.path.join(self.dir, token)
+
+    def _segments(self, token: str) -> List[int]:
+        """Segment start timestamps, oldest first."""
+        try:
+            names = os.listdir(self._token_dir(token))
+        except FileNotFoundError:
+            return []
+        return sorted(int(n[:-4]) for n in names if n.endswith(".bin") and n[:-4].isdigit())
+
+    def _seg_path(self, token: str, start: int) -> str:
+        return os.path.join(self._token_dir(token), f"{start}.bin")
+
+    def tokens(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.dir) if os.path.isdir(os.path.join(self.dir, n)))
+
+    # ---------- writes ----------
+
+    def append(self, token: str, ts: int, price: float, volume: float = float("nan")) -> None:
+        """Buffer one bar; nothing touches disk until flush()."""
+        with self._lock:
+            self._pending[token].append((int(ts), float(price), float(volume)))
+
+    def flush(self) -> int:
+        """Write buffered bars (blocking I/O: call via asyncio.to_thread); returns bars written."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(list)
+        written = 0
+        for token, bars in pending.items():
+            arr = np.array(bars, dtype=BAR)
+            starts = arr["ts"] - arr["ts"] % self.segment_sec
+            os.makedirs(self._token_dir(token), exist_ok=True)
+            for start in np.unique(starts):
+                path = self._seg_path(token, int(start))
+                with open(path, "ab") as f:
+                    tail = f.tell() % BAR.itemsize
+                    if tail:
+                        f.truncate(f.tell() - tail)   # torn record from an interrupted write
+                        f.seek(0, os.SEEK_END)
+                    f.write(arr[starts == start].tobytes())
+            written += arr.size
+        if written:
+            MET_PS_BARS.labels(self.namespace).inc(written)
+        if time.time() - self._last_prune >= PRUNE_EVERY_SEC:
+            self.prune()
+        return written
+
+    # ---------- reads ----------
+
+    def _read_segment(self, token: str, start: int) -> np.ndarray:
+        path = self._seg_path(token, start)
+        n = os.path.getsize(path) // BAR.itemsize
+        if n == 0:
+            return np.empty(0, dtype=BAR)
+        arr = np.memmap(path, dtype=BAR, mode="r", shape=(n,))
+        if n > 1 and (np.diff(arr["ts"]) < 0).any():
+            return np.sort(np.array(arr), order="ts", kind="stable")
+        return arr
+
+    def load(self, token: str, since: Optional[int] = None, until: Optional[int] = None) -> np.ndarray:
+        """Bars with since <= ts <= until (either bound optional), oldest first, as a BAR structured array."""
+        parts = []
+        for start in self._segments(token):
+            if since is not None and start + self.segment_sec <= since:
+                continue
+            if until is not None and start > until:
+                break
+            seg = self._read_segment(token, start)
+            lo = 0 if since is None else int(np.searchsorted(seg["ts"], since, side="left"))
+            hi = seg.size if until is None else int(np.searchsorted(seg["ts"], until, side="right"))
+            if hi > lo:
+                parts.append(np.array(seg[lo:hi]))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=BAR)
+
+    def tail(self, token: str, n: int) -> np.ndarray:
+        """The newest n bars, oldest first."""
+        parts, have = [], 0
+        for start in reversed(self._segments(token)):
+            if have >= n:
+                break
+            seg = self._read_segment(token, start)
+            parts.append(np.array(seg[-(n - have):]) if seg.size else seg)
+            have += min(seg.size, n - have)
+        return np.concatenate(parts[::-1]) if parts else np.empty(0, dtype=BAR)
+
+    # ---------- retention ----------
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Delete segments that ended before now - retention, keeping at least min_bars per token."""
+        now = time.time() if now is None else now
+        self._last_prune = now
+        cutoff = now - self.retention_sec
+        removed, size = 0, 0
+        for token in self.tokens():
+            kept_bars = 0
+            for start in reversed(self._segments(token)):
+                path = self._seg_path(token, start)
+                bars = os.path.getsize(path) // BAR.itemsize
+                if start + self.segment_sec <= cutoff and kept_bars >= self.min_bars:
+                    os.remove(path)
+                    removed += 1
+                    continue
+                kept_bars += bars
+                size += bars * BAR.itemsize
+        if removed:
+            MET_PS_PRUNED.labels(self.namespace).inc(removed)
+        MET_PS_BYTES.labels(self.namespace).set(size)
+        return removed
@@ -250,19 +250,31 @@ class TransactionBuilder:
                 env_key = key_map.get(name.lower(), "DEFAULT_ROUTER")
                 return _cfg.require(env_key)
 
-            router_addresses = [
-                router_for_name(opp.get("dex_a")),
-                router_for_name(opp.get("dex_b")),
-                router_for_name(opp.get("dex_c")),
-            ]
-
             slippage_bps = int(_cfg.env.get("SLIPPAGE_BPS", "50"))
             def apply_slippage(x: int) -> int:
                 return (x * (10_000 - slippage_bps)) // 10_000
 
-            min_amount_ab = apply_slippage(int(opp.get("amount_ab", 0)))
-            min_amount_bc = apply_slippage(int(opp.get("amount_bc", 0)))
-            min_amount_ca = apply_slippage(int(opp.get("amount_out", 0)))
+            if opp.get("routers"):
+                # N-hop route (2-5 legs): one router per hop (address or dex name), tokens after token_a
+                router_addresses = [
+                    Web3.to_checksum_address(r) if Web3.is_address(r) else router_for_name(r)
+                    for r in opp["routers"]
+                ]
+                tokens = [Web3.to_checksum_address(t) for t in opp.get("tokens", [])]
+                if len(tokens) != len(router_addresses) - 1:
+                    raise ValueError(f"route has {len(router_addresses)} routers but {len(tokens)} tokens")
+                amounts_out = [int(x) for x in opp.get("amounts_out", [])]
+                if len(amounts_out) != len(router_addresses):
+                    amounts_out = [0] * (len(router_addresses) - 1) + [int(opp.get("amount_out", 0))]
+            else:
+                router_addresses = [
+                    router_for_name(opp.get("dex_a")),
+                    router_for_name(opp.get("dex_b")),
+                    router_for_name(opp.get("dex_c")),
+                ]
+                tokens = [opp.get("token_b"), opp.get("token_c")]
+                amounts_out = [int(opp.get("amount_ab", 0)), int(opp.get("amount_bc", 0)), int(opp.get("amount_out", 0))]
+            hops = len(router_addresses)
 
             min_profit_wei = int(Decimal(str(opp.get("net_profit", 0))) * Decimal("0.8"))
 
@@ -280,10 +292,10 @@ class TransactionBuilder:
                 ],
                 [
                     router_addresses,
-                    [opp.get("token_b"), opp.get("token_c")],
-                    [3000, 3000, 3000],
-                    [min_amount_ab, min_amount_bc, min_amount_ca],
-                    [b"", b"", b""],
+                    tokens,
+                    [3000] * hops,
+                    [apply_slippage(x) for x in amounts_out],
+                    [b""] * hops,
                     min_profit_wei,
                     int(time.time()) + int(_cfg.env.get("TX_DEADLINE_SECONDS", "120")),
                     False,
@@ -518,8 +530,15 @@ class EnhancedTradeExecutor:
                 logger.warning("Trade size too small")
                 return False
 
-            for t in ("token_a", "token_b", "token_c"):
-                addr = opp.get(t)
+            if opp.get("routers"):
+                hops = len(opp["routers"])
+                if not 2 <= hops <= 5 or len(opp.get("tokens", [])) != hops - 1:
+                    logger.warning(f"Invalid route: {hops} routers, tokens={opp.get('tokens')}")
+                    return False
+                addrs = [("token_a", opp.get("token_a"))] + [(f"tokens[{i}]", t) for i, t in enumerate(opp["tokens"])]
+            else:
+                addrs = [(t, opp.get(t)) for t in ("token_a", "token_b", "token_c")]
+            for t, addr in addrs:
                 if not addr or not Web3.is_address(addr):
                     logger.warning(f"Invalid token address: {t}={addr}")
                     return False
@@ -0,0 +1,43 @@
+# bots/rate_limit.py
+"""
+ATOM async token-bucket rate limiter
+- One bucket per endpoint (RPC node, subgraph URL): `rate` requests per
+  second sustained, bursts up to `burst`
+- `await bucket.acquire()` waits just long enough for a token; waiters are
+  served in arrival order
+- Prometheus counter of time spent throttled, per bucket name
+"""
+
+import asyncio
+import time
+
+from prometheus_client import Counter
+
+MET_RL_WAIT = Counter("atom_rate_limit_wait_seconds_total", "Time spent waiting on a rate-limit bucket", ["bucket"])
+
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: float = 0.0):
+        self.name = name
+        self.rate = rate                       # tokens per second; <= 0 disables limiting
+        self.capacity = max(1.0, burst or rate)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    async def acquire(self, n: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:                 # FIFO: the head waiter sleeps, the rest queue on the lock
+            self._refill()
+            if self._tokens < n:
+                wait = (n - self._tokens) / self.rate
+                MET_RL_WAIT.labels(self.name).inc(wait)
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= n
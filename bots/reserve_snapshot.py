@@ -0,0 +1,150 @@
+# bots/reserve_snapshot.py
+"""
+ATOM per-block reserve snapshot (Uniswap V2-style pairs)
+- Loads every registered pair's reserves once per block (pinned to that block)
+  in a handful of Multicall3 batches
+- token0/token1 are immutable per pair: read once, then served from cache
+- All edge lookups during a scan are answered from memory, never from RPC
+- Can be rolled forward from Sync(uint112,uint112) events instead of reloaded
+- Prometheus hit/miss counters, snapshot load latency and snapshot age
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from web3 import Web3
+
+import multicall as mc
+
+# ---------- Metrics ----------
+MET_SNAP_HITS     = Counter("atom_reserves_snapshot_hits_total", "Reserve lookups served from the block snapshot")
+MET_SNAP_MISSES   = Counter("atom_reserves_snapshot_misses_total", "Reserve lookups not present in the block snapshot")
+MET_SNAP_LOADS    = Counter("atom_reserves_snapshot_loads_total", "Snapshot (re)loads")
+MET_SNAP_ERRORS   = Counter("atom_reserves_snapshot_errors_total", "Pair reads that failed during a snapshot load")
+MET_SNAP_LOAD_LAT = Histogram("atom_reserves_snapshot_load_seconds", "Snapshot load latency")
+MET_SNAP_BLOCK    = Gauge("atom_reserves_snapshot_block", "Block number of the current snapshot")
+MET_SNAP_PAIRS    = Gauge("atom_reserves_snapshot_pairs", "Pairs held in the current snapshot")
+MET_SNAP_SYNCS    = Counter("atom_reserves_snapshot_sync_updates_total", "Pair reserves updated from Sync events")
+# bound once by the owning bot (set_function), which knows which snapshot is current
+MET_SNAP_AGE      = Gauge("atom_reserves_snapshot_age_seconds", "Seconds since the current snapshot was loaded")
+
+
+@dataclass
+class PairReserves:
+    pair: str
+    token0: str
+    token1: str
+    reserve0: int
+    reserve1: int
+
+    def oriented(self, src: str, dst: str) -> Optional[Tuple[int, int]]:
+        """(reserve_in, reserve_out) for a src->dst swap, or None if the pair doesn't hold both."""
+        if self.token0 == src and self.token1 == dst:
+            return self.reserve0, self.reserve1
+        if self.token0 == dst and self.token1 == src:
+            return self.reserve1, self.reserve0
+        return None
+
+
+class ReserveSnapshot:
+    """
+    Reserves for a set of pairs as of a single block.
+    Call `refresh()` once per scan; it is a no-op while the head has not moved.
+    """
+
+    def __init__(self, w3: Web3, multicall: Optional[mc.Multicall] = None):
+        self.w3 = w3
+        self.multicall = multicall or mc.Multicall(w3)
+        self.block_number: int = -1
+        self.loaded_at: float = 0.0
+        self._requested: Set[str] = set()
+        self._tokens: Dict[str, Tuple[str, str]] = {}   # pair -> (token0, token1), immutable
+        self._reserves: Dict[str, PairReserves] = {}    # pair -> reserves at self.block_number
+
+    # ---------- reads ----------
+
+    def age_seconds(self) -> float:
+        return time.time() - self.loaded_at if self.loaded_at else 0.0
+
+    def get(self, pair: str) -> Optional[PairReserves]:
+        st = self._reserves.get(pair)
+        if st is None:
+            MET_SNAP_MISSES.inc()
+        else:
+            MET_SNAP_HITS.inc()
+        return st
+
+    def tokens(self, pair: str) -> Optional[Tuple[str, str]]:
+        return self._tokens.get(pair)
+
+    def __len__(self) -> int:
+        return len(self._reserves)
+
+    # ---------- loading ----------
+
+    def seed_tokens(self, pair: str, token0: str, token1: str) -> None:
+        """Register a pair's token ordering when the caller already knows it (skips the token0/token1 read)."""
+        self._tokens[pair] = (Web3.to_checksum_address(token0), Web3.to_checksum_address(token1))
+
+    async def refresh(self, pairs: Iterable[str], block_number: Optional[int] = None, force: bool = False) -> int:
+        """Load reserves for `pairs` at `block_number` (default: head). Returns the snapshot block."""
+        wanted: Set[str] = set(pairs)
+        if block_number is None:
+            block_number = int(await asyncio.to_thread(lambda: self.w3.eth.block_number))
+        if not force and block_number == self.block_number and wanted.issubset(self._requested):
+            return self.block_number
+
+        t0 = time.perf_counter()
+        await self._load_tokens([p for p in wanted if p not in self._tokens])
+        self._reserves = await self._load_reserves([p for p in wanted if p in self._tokens], block_number)
+        self._requested = wanted
+        self.block_number = block_number
+        self.loaded_at = time.time()
+
+        MET_SNAP_LOADS.inc()
+        MET_SNAP_BLOCK.set(block_number)
+        MET_SNAP_PAIRS.set(len(self._reserves))
+        MET_SNAP_LOAD_LAT.observe(time.perf_counter() - t0)
+        return block_number
+
+    # ---------- incremental ----------
+
+    def apply_sync(self, pair: str, reserve0: int, reserve1: int) -> bool:
+        """Apply a Sync event to a loaded pair. Returns True if its reserves changed."""
+        st = self._reserves.get(pair)
+        if st is None or (st.reserve0 == reserve0 and st.reserve1 == reserve1):
+            return False
+        st.reserve0, st.reserve1 = reserve0, reserve1
+        MET_SNAP_SYNCS.inc()
+        return True
+
+    def advance(self, block_number: int) -> None:
+        """Mark the snapshot current as of `block_number` after its Sync events were applied."""
+        self.block_number = block_number
+        self.loaded_at = time.time()
+        MET_SNAP_BLOCK.set(block_number)
+
+    async def _load_tokens(self, pairs: List[str]) -> None:
+        if not pairs:
+            return
+        res = await self.multicall.acall([c for p in pairs for c in (mc.token0(p), mc.token1(p))])
+        for idx, pair_addr in enumerate(pairs):
+            t0, t1 = res[2 * idx], res[2 * idx + 1]
+            if t0 is None or t1 is None:
+                MET_SNAP_ERRORS.inc()
+                continue
+            self._tokens[pair_addr] = (t0, t1)
+
+    async def _load_reserves(self, pairs: List[str], block_number: int) -> Dict[str, PairReserves]:
+        res = await self.multicall.acall([mc.get_reserves(p) for p in pairs], block=block_number)
+        out: Dict[str, PairReserves] = {}
+        for pair_addr, row in zip(pairs, res):
+            if row is None:
+                MET_SNAP_ERRORS.inc()
+                continue
+            t0, t1 = self._tokens[pair_addr]
+            out[pair_addr] = PairReserves(pair=pair_addr, token0=t0, token1=t1, reserve0=row[0], reserve1=row[1])
+        return out
@@ -0,0 +1,90 @@
+# bots/rolling_stats.py
+"""
+ATOM rolling-window statistics
+- Fixed-size ring buffer with sliding Welford updates: push is O(1) for
+  mean, sample variance and z-score (no array rebuild per read)
+- The oldest value is removed with the inverse Welford step as it falls out
+  of the window; moments are recomputed from the buffer once per window
+  length so float drift cannot accumulate (amortized O(1))
+- Pure Python floats, no I/O
+"""
+
+import math
+from typing import List, Optional
+
+
+class RollingWindow:
+    __slots__ = ("size", "_buf", "_head", "_n", "_mean", "_m2", "_since_exact")
+
+    def __init__(self, size: int):
+        if size < 2:
+            raise ValueError("window size must be >= 2")
+        self.size = size
+        self._buf: List[float] = [0.0] * size
+        self._head = 0          # next write position
+        self._n = 0
+        self._mean = 0.0
+        self._m2 = 0.0          # sum of squared deviations from the mean
+        self._since_exact = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def push(self, x: float) -> None:
+        x = float(x)
+        if self._n == self.size:
+            old = self._buf[self._head]
+            # replace old by x in one step: mean shifts by (x - old) / n
+            prev_mean = self._mean
+            self._mean += (x - old) / self._n
+            self._m2 += (x - old) * (x - self._mean + old - prev_mean)
+        else:
+            self._n += 1
+            d = x - self._mean
+            self._mean += d / self._n
+            self._m2 += d * (x - self._mean)
+        self._buf[self._head] = x
+        self._head = (self._head + 1) % self.size
+        self._since_exact += 1
+        if self._since_exact >= self.size:
+            self._recompute()
+
+    def _recompute(self) -> None:
+        vals = self.values()
+        n = len(vals)
+        mean = math.fsum(vals) / n if n else 0.0
+        self._mean = mean
+        self._m2 = math.fsum((v - mean) * (v - mean) for v in vals)
+        self._since_exact = 0
+
+    # ---------- reads ----------
+
+    @property
+    def last(self) -> float:
+        return self._buf[(self._head - 1) % self.size] if self._n else 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (ddof=1)."""
+        return max(self._m2, 0.0) / (self._n - 1) if self._n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, x: Optional[float] = None) -> float:
+        """(x - mean) / std for x (default: the latest value); 0.0 while the std is zero."""
+        sd = self.std
+        if sd <= 0:
+            return 0.0
+        return ((self.last if x is None else x) - self._mean) / sd
+
+    def values(self) -> List[float]:
+        """Window contents, oldest first."""
+        if self._n < self.size:
+            return self._buf[:self._n]
+        return self._buf[self._head:] + self._buf[:self._head]
@@ -0,0 +1,115 @@
+# bots/series_ring.py
+"""
+ATOM array-backed ring buffers for per-token bar series
+- One preallocated [rows, capacity] int64 timestamp array and float64 value
+  array; a row per token with its own head and count (series of different
+  tokens fill at different rates)
+- Appends write in place (single row or a whole feed pass at once); rows are
+  added as tokens are discovered, growing the arrays by doubling, and
+  `release()`d rows are reused by the next new token
+- `tail(k, rows)` gathers the newest k values of many rows as one [rows, k]
+  matrix, oldest first, right-aligned and NaN-padded for short series
+- `window_change` (change over n bars) works on those matrices, so the
+  return features are computed for every token at once
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+class SeriesRing:
+    def __init__(self, capacity: int, rows: int = 16):
+        self.capacity = max(2, capacity)
+        rows = max(1, rows)
+        self.ts = np.zeros((rows, self.capacity), dtype=np.int64)
+        self.values = np.full((rows, self.capacity), np.nan, dtype=np.float64)
+        self.head = np.zeros(rows, dtype=np.int64)     # next write slot per row
+        self.count = np.zeros(rows, dtype=np.int64)
+        self.rows: Dict[str, int] = {}                 # key -> row
+        self._free: List[int] = []                     # released rows, reused before growing
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def row(self, key: str) -> int:
+        """Row for key, allocating (and growing the arrays) on first use."""
+        r = self.rows.get(key)
+        if r is not None:
+            return r
+        if self._free:
+            r = self._free.pop()
+            self.rows[key] = r
+            return r
+        r = len(self.rows)
+        if r >= self.head.size:
+            grow = self.head.size
+            self.ts = np.concatenate([self.ts, np.zeros((grow, self.capacity), dtype=np.int64)])
+            self.values = np.concatenate([self.values, np.full((grow, self.capacity), np.nan)])
+            self.head = np.concatenate([self.head, np.zeros(grow, dtype=np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(grow, dtype=np.int64)])
+        self.rows[key] = r
+        return r
+
+    def release(self, key: str) -> None:
+        """Forget key's series; its row is cleared and handed to the next new key."""
+        r = self.rows.pop(key, None)
+        if r is None:
+            return
+        self.ts[r] = 0
+        self.values[r] = np.nan
+        self.head[r] = 0
+        self.count[r] = 0
+        self._free.append(r)
+
+    # ---------- writes ----------
+
+    def push(self, key: str, ts: int, value: float) -> None:
+        r = self.row(key)
+        h = self.head[r]
+        self.ts[r, h] = ts
+        self.values[r, h] = value
+        self.head[r] = (h + 1) % self.capacity
+        if self.count[r] < self.capacity:
+            self.count[r] += 1
+
+    def push_many(self, keys: Sequence[str], ts: int, values: Iterable[float]) -> None:
+        """One bar for many keys at the same timestamp (a feed pass)."""
+        if not keys:
+            return
+        rows = np.fromiter((self.row(k) for k in keys), dtype=np.int64, count=len(keys))
+        h = self.head[rows]
+        self.ts[rows, h] = ts
+        self.values[rows, h] = np.fromiter(values, dtype=np.float64, count=len(keys))
+        self.head[rows] = (h + 1) % self.capacity
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.capacity)
+
+    # ---------- reads ----------
+
+    def rows_of(self, keys: Iterable[str]) -> np.ndarray:
+        """Row indices for keys (allocating empty rows for unseen keys)."""
+        keys = list(keys)
+        for k in keys:
+            if k not in self.rows:
+                self.row(k)
+        return np.fromiter(map(self.rows.__getitem__, keys), dtype=np.int64, count=len(keys))
+
+    def tail(self, k: int, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """[len(rows), k] newest k values per row, oldest first; NaN where a row has fewer than k."""
+        k = min(k, self.capacity)
+        if rows is None:
+            rows = np.arange(len(self.rows), dtype=np.int64)
+        cols = (self.head[rows, None] - k + np.arange(k)) % self.capacity
+        out = self.values.ravel().take((rows * self.capacity)[:, None] + cols)
+        out[np.arange(k) < (k - self.count[rows])[:, None]] = np.nan
+        return out
+
+
+# ---------- window helpers ([rows, k] matrices from tail(), oldest first) ----------
+
+def window_change(m: np.ndarray, n: int) -> np.ndarray:
+    """(last - value n bars earlier) / earlier; 0 where the row has fewer than n+1 bars or a non-positive base."""
+    a, b = m[:, -n - 1], m[:, -1]
+    ok = np.isfinite(a) & (a > 0)
+    return np.where(ok, (b - np.where(ok, a, 1.0)) / np.where(ok, a, 1.0), 0.0)
+
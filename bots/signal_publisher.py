@@ -0,0 +1,153 @@
+# bots/signal_publisher.py
+"""
+ATOM change-only publish stage for scanner streams
+- Each signal is identified by its route/venue fields (scanner-specific) and
+  fingerprinted by that identity plus its profit quantized to a step
+- Unchanged fingerprints are not re-XADDed until PUBLISH_TTL_SEC has passed
+  (then re-published once as a "refresh" heartbeat)
+- Opportunities that disappear get an explicit "expired" stream entry
+  ({"event": "expired", "key": ...}, no "data" field, so readers that only
+  look at "data" skip it)
+- Live entries carry "event" (new | changed | refresh) and "key" next to "data"
+- Prometheus counters per stream for published events and suppressed repeats
+- PUBLISH_CHANGE_ONLY=0 restores publish-everything behaviour
+"""
+
+import json
+import math
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from prometheus_client import Counter, Gauge
+
+# ---------- Env ----------
+
+def _env(name: str, default: Optional[str] = None) -> str:
+    v = os.getenv(name, default)
+    return "" if v is None else str(v)
+
+CHANGE_ONLY = _env("PUBLISH_CHANGE_ONLY", "true").lower() in ("1", "true", "yes")
+TTL_SEC = float(_env("PUBLISH_TTL_SEC", "60"))
+PROFIT_QUANTUM = float(_env("PUBLISH_PROFIT_QUANTUM", "5.0"))   # profit step (USD unless the scanner overrides)
+
+# ---------- Metrics ----------
+MET_PUB_EVENTS     = Counter("atom_publish_events_total", "Stream entries written by the publish stage", ["stream", "event"])
+MET_PUB_SUPPRESSED = Counter("atom_publish_suppressed_total", "Signals not re-published: unchanged within the TTL", ["stream"])
+MET_PUB_RATIO      = Gauge("atom_publish_suppression_ratio", "Share of signals suppressed in the last batch", ["stream"])
+MET_PUB_LIVE       = Gauge("atom_publish_live_signals", "Opportunities currently live (published, not expired)", ["stream"])
+MET_PUB_ERRORS     = Counter("atom_publish_errors_total", "XADD failures in the publish stage", ["stream"])
+
+Key = Tuple
+
+
+class ChangeOnlyPublisher:
+    def __init__(
+        self,
+        stream: str,
+        maxlen: int,
+        key_fields: Sequence[str],
+        value_field: str,
+        quantum: float = PROFIT_QUANTUM,
+        ttl_sec: float = TTL_SEC,
+        key_fn: Optional[Callable[[Dict], Key]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        enabled: bool = CHANGE_ONLY,
+    ):
+        self.stream = stream
+        self.maxlen = maxlen
+        self.key_fields = tuple(key_fields)
+        self.value_field = value_field
+        self.quantum = quantum if quantum > 0 else 1.0
+        self.ttl_sec = ttl_sec
+        self.key_fn = key_fn
+        self.on_error = on_error
+        self.enabled = enabled
+        # key -> (fingerprint bucket, last published at)
+        self.live: Dict[Key, Tuple[int, float]] = {}
+
+    # ---------- fingerprint ----------
+
+    def key(self, signal: Dict) -> Key:
+        if self.key_fn is not None:
+            return self.key_fn(signal)
+        return tuple(_hashable(signal.get(f)) for f in self.key_fields)
+
+    def bucket(self, signal: Dict) -> int:
+        v = float(signal.get(self.value_field) or 0.0)
+        return int(math.floor(v / self.quantum)) if math.isfinite(v) else 0
+
+    @staticmethod
+    def key_str(key: Key) -> str:
+        return "|".join(">".join(map(str, k)) if isinstance(k, tuple) else str(k) for k in key)
+
+    # ---------- publish ----------
+
+    async def publish(self, redis, signals: Iterable[Dict], stale: Optional[Callable[[Key], bool]] = None) -> int:
+        """
+        Publish one batch of signal dicts; returns the number of stream entries written.
+        `stale(key)` says which live keys this batch re-evaluated (default: all of them), so a
+        partial batch only expires the opportunities it actually looked at.
+        """
+        if redis is None:
+            return 0
+        signals = list(signals)
+        now = time.time()
+        # (stream fields, key, state to record once the XADD succeeds)
+        entries: List[Tuple[Dict[str, str], Key, Optional[Tuple[int, float]]]] = []
+        suppressed = 0
+        seen: set = set()
+
+        for s in signals:
+            k = self.key(s)
+            if k in seen:
+                continue    # keep the first (best-ranked) duplicate in a batch
+            b = self.bucket(s)
+            prev = self.live.get(k)
+            if not self.enabled:
+                event = "new"
+            elif prev is None:
+                event = "new"
+            elif prev[0] != b:
+                event = "changed"
+            elif now - prev[1] >= self.ttl_sec:
+                event = "refresh"
+            else:
+                seen.add(k)
+                suppressed += 1
+                continue
+            seen.add(k)
+            entries.append(({"event": event, "key": self.key_str(k),
+                             "data": json.dumps(s, separators=(",", ":"))}, k, (b, now)))
+
+        if self.enabled:
+            for k in list(self.live.keys()):
+                if k in seen or (stale is not None and not stale(k)):
+                    continue
+                # dropped from live only once the expiry is written (a failed XADD is retried next batch)
+                entries.append(({"event": "expired", "key": self.key_str(k), "ts": str(int(now))}, k, None))
+
+        written = 0
+        for fields, k, state in entries:
+            try:
+                await redis.xadd(self.stream, fields, maxlen=self.maxlen, approximate=True)
+            except Exception as e:
+                # live state unchanged: the next batch retries it
+                MET_PUB_ERRORS.labels(self.stream).inc()
+                if self.on_error is not None:
+                    self.on_error(e)
+                continue
+            MET_PUB_EVENTS.labels(self.stream, fields["event"]).inc()
+            written += 1
+            if state is None:
+                self.live.pop(k, None)
+            elif self.enabled:
+                self.live[k] = state
+        MET_PUB_SUPPRESSED.labels(self.stream).inc(suppressed)
+        MET_PUB_RATIO.labels(self.stream).set(suppressed / len(signals) if signals else 0.0)
+        MET_PUB_LIVE.labels(self.stream).set(len(self.live))
+        return written
+
+
+def _hashable(v):
+    return tuple(v) if isinstance(v, list) else v
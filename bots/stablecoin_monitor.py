@@ -2,7 +2,13 @@
 """
 ATOM Stablecoin Peg Monitor (Polygon mainnet)
 - Scans Quickswap/Sushiswap stable-stable pools for depegs
+- Discovery and reserve reads are batched through Multicall3 (one round trip per scan)
+- Integer Q112 fixed-point quotes and USD math (fixed_point.py); floats only when published
+- Warm-starts pair discovery from the on-disk pair index when it is backfilled
 - Publishes opportunities to Redis Stream 'atom:opps:stablecoin'
+  only when a pair/venue route is new, its profit moved or it expired
+- Rescans as each new block lands on the Redis heads channel (head_tracker.py)
+  while a tracker publishes it; STABLESCAN_INTERVAL_SEC pacing otherwise
 - Exposes Prometheus metrics on METRICS_PORT
 - Strict: no secrets in code, no tx signing, no websockets required
 - Hard fail if not on chain_id=137 (Polygon)
@@ -23,6 +29,12 @@ import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+import fixed_point as fp
+import multicall as mc
+import pair_index
+from head_tracker import RedisHeads, channel_for
+from signal_publisher import ChangeOnlyPublisher
+
 # ---------- Config ----------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -45,6 +57,14 @@ REDIS_STREAM = _env("STABLESCAN_REDIS_STREAM", "atom:opps:stablecoin")
 REDIS_MAXLEN = int(_env("STABLESCAN_REDIS_MAXLEN", "1000"))
 KILL_SWITCH_KEY = _env("KILL_SWITCH_KEY", "atom:kill_switch")
 PAUSE_KEY = _env("STABLESCAN_PAUSE_KEY", "atom:stablecoin:paused")
+USE_PAIR_INDEX = _env("STABLESCAN_USE_PAIR_INDEX", "true").lower() in ("1", "true", "yes")
+WAKE_ON_HEADS = _env("STABLESCAN_WAKE_ON_HEADS", "true").lower() in ("1", "true", "yes")   # heads channel (head_tracker.py)
+HEAD_WAIT_MAX_SEC = float(_env("STABLESCAN_HEAD_WAIT_MAX_SEC", "5"))
+
+# Q112 fixed-point copies for the hot path
+MIN_PROFIT_Q = fp.from_decimal(MIN_PROFIT_USD)
+TRADE_SIZE_Q = fp.from_decimal(TRADE_SIZE_USD)
+FLASH_FEE_Q = fp.from_decimal(AAVE_FEE_BPS / Decimal(10000))
 
 # Chainlink MATIC/USD aggregator on Polygon
 CHAINLINK_MATIC_USD = Web3.to_checksum_address(
@@ -73,8 +93,6 @@ STABLES = {
     "MAI":  {"addr": Web3.to_checksum_address("0xa3Fa99A148fA48D14Ed51d610c367C61876997F1"), "dec": 18},
 }
 
-PAIR_ABI = json.loads('[{"constant":true,"inputs":[],"name":"getReserves","outputs":[{"name":"reserve0","type":"uint112"},{"name":"reserve1","type":"uint112"},{"name":"blockTimestampLast","type":"uint32"}],"type":"function"},{"constant":true,"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"},{"constant":true,"inputs":[],"name":"token1","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-FACTORY_ABI = json.loads('[{"constant":true,"inputs":[{"name":"tokenA","type":"address"},{"name":"tokenB","type":"address"}],"name":"getPair","outputs":[{"name":"pair","type":"address"}],"type":"function"}]')
 CL_AGG_ABI = json.loads('[{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]')
 
 # ---------- Logging ----------
@@ -97,6 +115,10 @@ MET_OPPS     = Counter("atom_stables_opportunities_total", "Detected opportuniti
 MET_BEST_NET = Gauge("atom_stables_best_net_profit_usd", "Best net profit (USD) last scan")
 MET_SPREAD   = Gauge("atom_stables_best_spread_bps", "Best spread bps last scan")
 
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
+
 # ---------- Data Models ----------
 
 @dataclass
@@ -121,8 +143,14 @@ class StablecoinPegMonitor:
     def __init__(self):
         self.w3 = Web3(HTTPProvider(RPC_URL, request_kwargs={"timeout": 10}))
         self.redis: Optional[redis.Redis] = None
+        self.heads: Optional[RedisHeads] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("token_a", "token_b", "dex_buy", "dex_sell"),
+            value_field="net_profit_usd", on_error=_xadd_error,
+        )
         self.executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-        self.factories = {name: self.w3.eth.contract(addr["factory"], abi=FACTORY_ABI) for name, addr in DEXES.items()}
+        self.multicall = mc.Multicall(self.w3)
+        self.pair_index: Optional[pair_index.PairIndex] = pair_index.PairIndex() if USE_PAIR_INDEX else None
         self.matic_usd = self.w3.eth.contract(CHAINLINK_MATIC_USD, abi=CL_AGG_ABI)
         self.pairs: Dict[str, Dict[str, Dict[str, str]]] = {}  # pairs[dex][key] -> {pair, t0, t1}
         self._ensure_chain()
@@ -134,9 +162,28 @@ class StablecoinPegMonitor:
 
     async def init(self):
         self.redis = await redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+        if WAKE_ON_HEADS:
+            self.heads = RedisHeads(self.redis, channel_for("polygon"))
+            self.heads.start()
         await self.discover_pairs()
         jlog("info", event="init", pairs=sum(len(x) for x in self.pairs.values()), rpc=RPC_URL, redis=REDIS_URL)
 
+    async def _pairs_from_index(self) -> bool:
+        """Fill self.pairs from the pair index (no RPC). False unless every factory has been backfilled."""
+        if not self.pair_index:
+            return False
+        names = list(STABLES.keys())
+        by_addr = {v["addr"]: k for k, v in STABLES.items()}
+        found = await asyncio.to_thread(
+            self.pair_index.warm_pairs_among, {dex: d["factory"] for dex, d in DEXES.items()}, list(by_addr))
+        if found is None:
+            return False
+        for dex, rows in found.items():
+            for pair_addr, t0, t1 in rows:
+                a, b = sorted((by_addr[t0], by_addr[t1]), key=names.index)
+                self.pairs[dex][f"{a}-{b}"] = {"pair": pair_addr, "t0": t0, "t1": t1}
+        return True
+
     async def discover_pairs(self):
         # build stable pairs like (USDC,USDT), (USDC,DAI), ...
         tokens = list(STABLES.keys())
@@ -146,106 +193,92 @@ class StablecoinPegMonitor:
                 combos.append((tokens[i], tokens[j]))
 
         self.pairs = {dex: {} for dex in DEXES.keys()}
+        if await self._pairs_from_index():
+            if self.redis:
+                await self.redis.set("atom:stablecoin:pairs", json.dumps(self.pairs))
+            return
 
-        async def get_one(dex: str, a: str, b: str):
-            fa = self.factories[dex]
-            a_addr = STABLES[a]["addr"]
-            b_addr = STABLES[b]["addr"]
-            try:
-                pair_addr = await asyncio.to_thread(fa.functions.getPair(a_addr, b_addr).call)
-                if pair_addr and int(pair_addr, 16) != 0:
-                    # confirm token order to compute price correctly
-                    pair = self.w3.eth.contract(pair_addr, abi=PAIR_ABI)
-                    t0 = await asyncio.to_thread(pair.functions.token0().call)
-                    t1 = await asyncio.to_thread(pair.functions.token1().call)
-                    key = f"{a}-{b}"
-                    self.pairs[dex][key] = {"pair": pair_addr, "t0": t0, "t1": t1}
-            except Exception as e:
+        keys = [(dex, a, b) for dex in DEXES.keys() for a, b in combos]
+        found = await self.multicall.acall(
+            [mc.get_pair(DEXES[dex]["factory"], STABLES[a]["addr"], STABLES[b]["addr"]) for dex, a, b in keys]
+        )
+        live: List[Tuple[Tuple[str, str, str], str]] = []
+        for (dex, a, b), addr in zip(keys, found):
+            if addr is None:
                 MET_ERRORS.inc()
-                jlog("error", event="discover_error", dex=dex, a=a, b=b, err=str(e))
-
-        tasks = []
-        for dex in DEXES.keys():
-            for a, b in combos:
-                tasks.append(get_one(dex, a, b))
-        await asyncio.gather(*tasks)
+                jlog("error", event="discover_error", dex=dex, a=a, b=b)
+            elif int(addr, 16) != 0:
+                live.append(((dex, a, b), addr))
+
+        # confirm token order to compute price correctly
+        order = await self.multicall.acall([c for _, addr in live for c in (mc.token0(addr), mc.token1(addr))])
+        for idx, ((dex, a, b), pair_addr) in enumerate(live):
+            t0, t1 = order[2 * idx], order[2 * idx + 1]
+            if t0 is None or t1 is None:
+                MET_ERRORS.inc()
+                jlog("error", event="discover_error", dex=dex, a=a, b=b, pair=pair_addr)
+                continue
+            self.pairs[dex][f"{a}-{b}"] = {"pair": pair_addr, "t0": t0, "t1": t1}
 
         # persist to Redis for other services
         if self.redis:
             await self.redis.set("atom:stablecoin:pairs", json.dumps(self.pairs))
 
-    @staticmethod
-    def _adj(reserve: int, decimals: int) -> Decimal:
-        return Decimal(reserve) / Decimal(10 ** decimals)
-
-    async def _pair_price(self, dex: str, pair_info: Dict, a: str, b: str) -> Optional[Decimal]:
-        """Price as token_b per token_a (i.e., how many b for 1 a)"""
-        try:
-            pair = self.w3.eth.contract(pair_info["pair"], abi=PAIR_ABI)
-            reserves = await asyncio.to_thread(pair.functions.getReserves().call)
-            # map token0/token1 to a/b order
-            t0 = pair_info["t0"]
-            t1 = pair_info["t1"]
-            a_addr = STABLES[a]["addr"]
-            b_addr = STABLES[b]["addr"]
-            dec_a = STABLES[a]["dec"]
-            dec_b = STABLES[b]["dec"]
-            if Web3.to_checksum_address(t0) == a_addr and Web3.to_checksum_address(t1) == b_addr:
-                r0 = self._adj(reserves[0], dec_a)
-                r1 = self._adj(reserves[1], dec_b)
-                if r0 > 0:
-                    return r1 / r0
-            elif Web3.to_checksum_address(t0) == b_addr and Web3.to_checksum_address(t1) == a_addr:
-                r0 = self._adj(reserves[0], dec_b)
-                r1 = self._adj(reserves[1], dec_a)
-                if r1 > 0:
-                    return r0 / r1
-            return None
-        except Exception as e:
-            MET_ERRORS.inc()
-            jlog("error", event="price_error", dex=dex, pair=pair_info.get("pair"), err=str(e))
-            return None
-
-    async def scan_prices(self) -> Dict[str, Dict[str, Decimal]]:
-        """Returns prices[dex][a-b] = price_b_per_a"""
-        out: Dict[str, Dict[str, Decimal]] = {dex: {}} for dex in DEXES.keys()
-        tasks = []
-        for dex, m in self.pairs.items():
-            for key, info in m.items():
-                a, b = key.split("-")
-                tasks.append(self._fill_price(out, dex, key, info, a, b))
-        await asyncio.gather(*tasks)
+    def _pair_price(self, pair_info: Dict, reserves: Tuple[int, int, int], a: str, b: str) -> Optional[int]:
+        """Price as token_b per token_a (i.e., how many b for 1 a), Q112"""
+        # map token0/token1 to a/b order
+        t0 = pair_info["t0"]
+        t1 = pair_info["t1"]
+        a_addr = STABLES[a]["addr"]
+        b_addr = STABLES[b]["addr"]
+        dec_a = STABLES[a]["dec"]
+        dec_b = STABLES[b]["dec"]
+        if t0 == a_addr and t1 == b_addr:
+            return fp.price(reserves[0], reserves[1], dec_a, dec_b)
+        elif t0 == b_addr and t1 == a_addr:
+            return fp.price(reserves[1], reserves[0], dec_a, dec_b)
+        return None
+
+    async def scan_prices(self) -> Dict[str, Dict[str, int]]:
+        """Returns prices[dex][a-b] = price_b_per_a (Q112)"""
+        out: Dict[str, Dict[str, int]] = {dex: {} for dex in DEXES.keys()}
+        entries = [(dex, key, info) for dex, m in self.pairs.items() for key, info in m.items()]
+        reserves = await self.multicall.acall([mc.get_reserves(info["pair"]) for _, _, info in entries])
+        for (dex, key, info), rs in zip(entries, reserves):
+            if rs is None:
+                MET_ERRORS.inc()
+                jlog("error", event="price_error", dex=dex, pair=info.get("pair"))
+                continue
+            a, b = key.split("-")
+            p = self._pair_price(info, rs, a, b)
+            if p is not None:
+                out[dex][key] = p
         return out
 
-    async def _fill_price(self, out, dex, key, info, a, b):
-        p = await self._pair_price(dex, info, a, b)
-        if p is not None:
-            out[dex][key] = p
-
-    async def _matic_usd_price(self) -> Decimal:
+    async def _matic_usd_price(self) -> int:
         try:
             roundData = await asyncio.to_thread(self.matic_usd.functions.latestRoundData().call)
             # Chainlink price with 8 decimals
-            return Decimal(roundData[1]) / Decimal(10 ** 8)
+            return fp.from_units(int(roundData[1]), 8)
         except Exception as e:
             MET_ERRORS.inc()
             jlog("error", event="chainlink_error", err=str(e))
-            return Decimal("0")
+            return 0
 
-    async def detect_opps(self, prices: Dict[str, Dict[str, Decimal]]) -> List[Opportunity]:
+    async def detect_opps(self, prices: Dict[str, Dict[str, int]]) -> List[Opportunity]:
         opps: List[Opportunity] = []
         tokens = list(STABLES.keys())
         matic_usd = await self._matic_usd_price()
         gas_price_wei = self.w3.eth.gas_price
-        gas_cost_usd = (Decimal(gas_price_wei) * GAS_LIMIT_ARB / Decimal(1e18)) * matic_usd
-        flash_fee_usd = TRADE_SIZE_USD * (AAVE_FEE_BPS / Decimal(10000))
+        gas_cost_usd = gas_price_wei * GAS_LIMIT_ARB * matic_usd // fp.POW10[18]
+        flash_fee_usd = fp.mul(TRADE_SIZE_Q, FLASH_FEE_Q)
 
         for i in range(len(tokens)):
             for j in range(i + 1, len(tokens)):
                 a, b = tokens[i], tokens[j]
                 key = f"{a}-{b}"
                 # collect available dex quotes
-                dex_quotes: List[Tuple[str, Decimal]] = []
+                dex_quotes: List[Tuple[str, int]] = []
                 for dex in DEXES.keys():
                     p = prices.get(dex, {}).get(key)
                     if p is not None and p > 0:
@@ -261,28 +294,29 @@ class StablecoinPegMonitor:
                             (dex_a, dex_b, pa, pb),
                             (dex_b, dex_a, pb, pa),
                         ]:
-                            spread = abs(sell_p - buy_p)
-                            avg = (sell_p + buy_p) / 2
-                            spread_bps = int((spread / avg) * 10000)
+                            # spread / avg == 2 * spread / (sell + buy)
+                            spread2 = 2 * abs(sell_p - buy_p)
+                            total = sell_p + buy_p
+                            spread_bps = spread2 * 10000 // total
                             if spread_bps < SPREAD_BPS_THRESHOLD:
                                 continue
 
-                            gross = TRADE_SIZE_USD * (spread / avg)
+                            gross = TRADE_SIZE_Q * spread2 // total
                             net = gross - gas_cost_usd - flash_fee_usd
-                            if net >= MIN_PROFIT_USD:
+                            if net >= MIN_PROFIT_Q:
                                 opps.append(
                                     Opportunity(
                                         token_a=a,
                                         token_b=b,
                                         dex_buy=buy_dex,
                                         dex_sell=sell_dex,
-                                        price_buy=float(buy_p),
-                                        price_sell=float(sell_p),
+                                        price_buy=fp.to_float(buy_p),
+                                        price_sell=fp.to_float(sell_p),
                                         spread_bps=spread_bps,
-                                        gross_profit_usd=float(gross),
-                                        gas_cost_usd=float(gas_cost_usd),
-                                        flash_fee_usd=float(flash_fee_usd),
-                                        net_profit_usd=float(net),
+                                        gross_profit_usd=fp.to_float(gross),
+                                        gas_cost_usd=fp.to_float(gas_cost_usd),
+                                        flash_fee_usd=fp.to_float(flash_fee_usd),
+                                        net_profit_usd=fp.to_float(net),
                                         amount_usd=float(TRADE_SIZE_USD),
                                         ts=int(time.time()),
                                     )
@@ -294,13 +328,7 @@ class StablecoinPegMonitor:
     async def publish(self, opps: List[Opportunity]):
         if not self.redis:
             return
-        for o in opps:
-            payload = json.dumps(asdict(o), separators=(",", ":"))
-            try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        await self.publisher.publish(self.redis, [asdict(o) for o in opps])
 
         if opps:
             MET_OPPS.inc(len(opps))
@@ -327,6 +355,7 @@ class StablecoinPegMonitor:
 
         while True:
             t0 = time.perf_counter()
+            scanned = self.heads.number if self.heads else -1
             try:
                 if await self.paused():
                     await asyncio.sleep(1.0)
@@ -350,7 +379,11 @@ class StablecoinPegMonitor:
             MET_SCAN_LAT.observe(dur)
             # keep loop pacing stable
             sleep_left = max(0.0, SCAN_INTERVAL_SEC - dur)
-            await asyncio.sleep(sleep_left)
+            if self.heads is not None and self.heads.age() < 2 * HEAD_WAIT_MAX_SEC:
+                # heads are flowing: rescan exactly when the next block lands
+                await self.heads.wait(scanned, timeout=HEAD_WAIT_MAX_SEC)
+            else:
+                await asyncio.sleep(sleep_left)
 
 
 if __name__ == "__main__":
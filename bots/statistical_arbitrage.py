@@ -2,11 +2,21 @@
 """
 ATOM Statistical Arbitrage Scanner (Polygon/Ethereum)
 - Asynchronous data fetch from DEX subgraphs to build token price histories
+  (aliased batch queries: one POST per GRAPHQL_BATCH_SIZE tokens); every bar
+  is persisted to the on-disk price store and restarts warm-start from it
 - Three signal engines:
   1) Mean reversion (z-score)
   2) Pairs spread deviations (ratio z-score)
-  3) ML short-horizon return prediction (RandomForest)
+  3) ML short-horizon return prediction (RandomForest), retrained on a cadence
+     in a process pool and swapped in per pair; versioned artifacts under
+     STAT_ARB_MODEL_DIR when STAT_ARB_PERSIST_MODELS=true
+- Per-pair rolling ratio windows (rolling_stats.py) updated as prices arrive:
+  O(1) mean / std / z-score reads for engines 1 and 2
+- Universe-wide pairs screen (pairs_screen.py): every token pair scored in one
+  vectorized NumPy pass (correlation, log-ratio z, DF t-stat / half-life) in a
+  worker process each scan; the top-K join the pinned STAT_ARB_PAIRS
 - Publishes ranked signals to Redis stream 'atom:opps:stat_arb'
+  (change-only per engine and pair, fingerprinted by expected profit)
 - Exposes Prometheus metrics; JSON structured logs; circuit breakers
 - Headless: NO signing, NO tx building, NO secrets in code
 """
@@ -16,10 +26,12 @@ import asyncio
 import time
 import json
 import logging
+import pickle
 from dataclasses import dataclass, asdict
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import aiohttp
 import numpy as np
@@ -29,6 +41,12 @@ from prometheus_client import Counter, Gauge, Histogram, start_http_server
 
 from web3 import AsyncWeb3, AsyncHTTPProvider
 
+from graphql_batch import GraphQLBatcher
+import price_store
+from pairs_screen import PriceMatrix, screen_pairs, top_pairs
+from rolling_stats import RollingWindow
+from signal_publisher import ChangeOnlyPublisher
+
 # Optional ML
 try:
     from sklearn.ensemble import RandomForestRegressor
@@ -98,16 +116,27 @@ PAIRS = [p.strip() for p in _env("STAT_ARB_PAIRS", DEFAULT_PAIRS).split(",") if
 # Model storage (optional)
 PERSIST_MODELS = _env("STAT_ARB_PERSIST_MODELS", "false").lower() == "true"
 MODEL_DIR = _env("STAT_ARB_MODEL_DIR", "artifacts/stat_arb")
+MODEL_KEEP = int(_env("STAT_ARB_MODEL_KEEP_VERSIONS", "3"))          # artifacts kept per pair
+RETRAIN_INTERVAL_SEC = float(_env("STAT_ARB_RETRAIN_INTERVAL_SEC", "3600"))   # <= 0: train once at startup
+TRAIN_WORKERS = int(_env("STAT_ARB_TRAIN_WORKERS", "2"))
 
 # Economics
 POSITION_SIZE_USD = Decimal(_env("STAT_ARB_POSITION_SIZE_USD", "25000"))
 MIN_PROFIT_USD = Decimal(_env("STAT_ARB_MIN_PROFIT_USD", "100"))
 MIN_CONFIDENCE = float(_env("STAT_ARB_MIN_CONFIDENCE", "0.65"))
 LOOKBACK = int(_env("STAT_ARB_LOOKBACK_BARS", "180"))
+SPREAD_WINDOW = int(_env("STAT_ARB_SPREAD_WINDOW_BARS", "60"))   # pairs-spread engine window
 MIN_ZSCORE = float(_env("STAT_ARB_MIN_ZSCORE", "2.0"))
 EXIT_ZSCORE = float(_env("STAT_ARB_EXIT_ZSCORE", "0.5"))
 MAX_OPEN_POSITIONS = int(_env("STAT_ARB_MAX_POSITIONS", "5"))
 
+# Universe pairs screen (adds the top-K screened pairs to PAIRS)
+SCREEN_ENABLED = _env("STAT_ARB_SCREEN_ENABLED", "true").lower() in ("1", "true", "yes")
+SCREEN_TOP_K = int(_env("STAT_ARB_SCREEN_TOP_K", "20"))
+SCREEN_MIN_CORR = float(_env("STAT_ARB_SCREEN_MIN_CORR", "0.3"))
+SCREEN_MAX_HALF_LIFE = float(_env("STAT_ARB_SCREEN_MAX_HALF_LIFE_BARS", "60"))
+SCREEN_MAX_DF_TSTAT = float(_env("STAT_ARB_SCREEN_MAX_DF_TSTAT", "-2.0"))
+
 # ----------------------- LOGGING/metrics -----------------------
 
 log = logging.getLogger("atom.stat_arb")
@@ -125,6 +154,16 @@ MET_SIGNALS       = Counter("atom_stat_arb_signals_total", "Signals published")
 MET_BEST_EXP_PROF = Gauge("atom_stat_arb_best_expected_profit_usd", "Best expected profit USD")
 MET_LAST_TS       = Gauge("atom_stat_arb_last_ts", "Last successful loop ts")
 MET_MODELS        = Gauge("atom_stat_arb_models_trained", "Models trained count")
+MET_TRAIN_LAT     = Histogram("atom_stat_arb_training_seconds", "Model training run duration seconds",
+                              buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600))
+MET_MODEL_AGE     = Gauge("atom_stat_arb_model_age_seconds", "Age of the oldest model in use")
+MET_MODEL_VERSION = Gauge("atom_stat_arb_model_version", "Newest model version in use (training run unix ts)")
+MET_SCREEN_LAT    = Histogram("atom_stat_arb_screen_latency_seconds", "Universe pairs screen latency seconds")
+MET_SCREEN_PAIRS  = Gauge("atom_stat_arb_screen_candidates", "Screened pairs active beyond the pinned PAIRS")
+
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
 
 # ----------------------- data models -----------------------
 
@@ -144,20 +183,102 @@ class StatArbSignal:
     expected_profit_usd: float
     ts: int
 
+@dataclass
+class PairModel:
+    model: "RandomForestRegressor"
+    scaler: "StandardScaler"
+    version: int                # training run (unix ts); also the artifact file name
+    trained_at: float
+    samples: int
+
+# ----------------------- training (worker process) -----------------------
+
+def _artifact_dir(pair: str) -> str:
+    return os.path.join(MODEL_DIR, pair.replace("/", "_"))
+
+def _artifact_versions(d: str) -> List[int]:
+    try:
+        names = os.listdir(d)
+    except FileNotFoundError:
+        return []
+    return sorted(int(n[1:-4]) for n in names if n.startswith("v") and n.endswith(".pkl") and n[1:-4].isdigit())
+
+def _save_artifact(pair: str, art: dict):
+    """Write v<version>.pkl atomically (tmp + rename), then prune to the newest MODEL_KEEP versions."""
+    d = _artifact_dir(pair)
+    os.makedirs(d, exist_ok=True)
+    path = os.path.join(d, f"v{art['version']}.pkl")
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(art, f)
+    os.replace(path + ".tmp", path)
+    for v in _artifact_versions(d)[:-max(1, MODEL_KEEP)]:
+        os.remove(os.path.join(d, f"v{v}.pkl"))
+
+def _load_artifact(pair: str) -> Optional[dict]:
+    versions = _artifact_versions(_artifact_dir(pair))
+    if not versions:
+        return None
+    with open(os.path.join(_artifact_dir(pair), f"v{versions[-1]}.pkl"), "rb") as f:
+        return pickle.load(f)
+
+def _fit_pair(pair: str, a: np.ndarray, b: np.ndarray, version: int, persist: bool) -> Optional[dict]:
+    """Runs in the training pool: fit one pair on a history snapshot; plain dict so it pickles back cleanly."""
+    n = min(a.size, b.size)
+    if n < 80:
+        return None
+    ra = np.diff(np.log(a[-n:]))
+    rb = np.diff(np.log(b[-n:]))
+    X = np.stack([
+        ra[-LOOKBACK:][-60:],
+        rb[-LOOKBACK:][-60:],
+    ], axis=1)
+    y = ra[-LOOKBACK:][-60:]
+    if X.shape[0] < 40:
+        return None
+    scaler = StandardScaler()
+    Xs = scaler.fit_transform(X)
+    model = RandomForestRegressor(n_estimators=128, max_depth=6, random_state=42)
+    model.fit(Xs, y)
+    art = {"model": model, "scaler": scaler, "version": version, "trained_at": time.time(), "samples": int(X.shape[0])}
+    if persist:
+        _save_artifact(pair, art)
+    return art
+
 # ----------------------- core scanner -----------------------
 
 class StatisticalArbScanner:
     def __init__(self):
         self.w3 = AsyncWeb3(AsyncHTTPProvider(RPC_URL, request_kwargs={"timeout": 12}))
         self.redis: Optional[redis.Redis] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("engine", "pair"),
+            value_field="expected_profit_usd", on_error=_xadd_error,
+        )
         self.session: Optional[aiohttp.ClientSession] = None
+        self.graphql: Optional[GraphQLBatcher] = None
 
         # histories keyed by token address, values are deque of floats (USD price)
         self.price_history: Dict[str, deque] = {addr: deque(maxlen=LOOKBACK * 2) for addr in TOKENS.values()}
-
-        # ML models per pair
-        self.models: Dict[str, RandomForestRegressor] = {}
-        self.scalers: Dict[str, StandardScaler] = {}
+        self.store: Optional[price_store.PriceStore] = (
+            price_store.PriceStore(f"stat_arb_{CHAIN}", min_bars=LOOKBACK * 2) if price_store.ENABLED else None)
+
+        # ML models per pair; replaced wholesale by each training run (model + scaler travel together)
+        self.models: Dict[str, PairModel] = {}
+        self.train_pool: Optional[ProcessPoolExecutor] = None
+        self._train_task: Optional[asyncio.Task] = None
+
+        # aligned tokens x bars price matrix for the universe screen (one bar per refresh pass)
+        self.symbols: List[str] = list(TOKENS.keys())
+        self.price_matrix = PriceMatrix(self.symbols, LOOKBACK * 2)
+        self.screen_pool: Optional[ProcessPoolExecutor] = None
+
+        # price ratio (base/quote) windows per pair: LOOKBACK bars for mean reversion, SPREAD_WINDOW for pairs
+        self.ratio_long: Dict[str, RollingWindow] = {}
+        self.ratio_short: Dict[str, RollingWindow] = {}
+        self.pairs_by_token: Dict[str, List[str]] = {}
+        # pinned PAIRS first, then the current screen candidates
+        self.active_pairs: List[str] = []
+        self._set_active_pairs([])
 
         # positions tracking (headless signaler; no real positions placed here)
         self.open_positions: Dict[str, dict] = {}
@@ -170,10 +291,19 @@ class StatisticalArbScanner:
 
         self.redis = await redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
         self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=20))
+        self.graphql = GraphQLBatcher(self.session)
         jlog("info", event="stat_arb_init", chain=CHAIN, rpc=RPC_URL, subgraph=SUBGRAPH_URL, pairs=PAIRS)
 
         await self._bootstrap_history()
-        await self._train_models()
+        if SCREEN_ENABLED:
+            self.screen_pool = ProcessPoolExecutor(max_workers=1)
+            await self.screen()
+        if SKLEARN_AVAILABLE:
+            if PERSIST_MODELS:
+                await asyncio.to_thread(self._load_models)
+            # first fit runs in the background too: signals flow (without the ML engine) meanwhile
+            self.train_pool = ProcessPoolExecutor(max_workers=max(1, TRAIN_WORKERS))
+            self._train_task = asyncio.create_task(self._retrain_loop())
 
     async def close(self):
         try:
@@ -181,6 +311,11 @@ class StatisticalArbScanner:
                 await self.session.close()
         except Exception:
             pass
+        if self._train_task:
+            self._train_task.cancel()
+        for pool in (self.screen_pool, self.train_pool):
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
 
     # ---------------- control ----------------
 
@@ -199,128 +334,194 @@ class StatisticalArbScanner:
     # ---------------- data fetch ----------------
 
     async def _bootstrap_history(self):
-        tasks = [self._fetch_historical_prices(addr) for addr in TOKENS.values()]
-        await asyncio.gather(*tasks)
+        missing = list(TOKENS.values())
+        if self.store:
+            missing = await asyncio.to_thread(self._warm_start)
+        if missing:
+            await self._fetch_historical_prices(missing)
+        self.price_matrix.seed([self.price_history[TOKENS[s]] for s in self.symbols])
+        for pair in self.ratio_long:
+            self._seed_ratio_windows(pair)
+
+    def _seed_ratio_windows(self, pair: str):
+        """Fill a pair's ratio windows from the price histories (tail-aligned, as bars were fetched)."""
+        base, quote = pair.split("/")
+        a = self.price_history[TOKENS[base]]
+        b = self.price_history[TOKENS[quote]]
+        n = min(len(a), len(b))
+        for pa, pb in zip(list(a)[len(a) - n:], list(b)[len(b) - n:]):
+            if pb > 0:
+                self.ratio_long[pair].push(pa / pb)
+                self.ratio_short[pair].push(pa / pb)
+
+    def _set_active_pairs(self, screened: List[str]):
+        """Pinned PAIRS plus screened candidates; windows are created (seeded) or dropped to match."""
+        active: List[str] = []
+        seen = set()
+        for pair in PAIRS + screened:
+            base, quote = pair.split("/")
+            ba, qa = TOKENS.get(base), TOKENS.get(quote)
+            # one orientation per token pair: a pinned "A/B" wins over a screened "B/A"
+            if not ba or not qa or frozenset((base, quote)) in seen:
+                continue
+            seen.add(frozenset((base, quote)))
+            active.append(pair)
+        for pair in list(self.ratio_long):
+            if pair not in active:
+                del self.ratio_long[pair]
+                del self.ratio_short[pair]
+                self.models.pop(pair, None)
+        self.pairs_by_token = {}
+        for pair in active:
+            base, quote = pair.split("/")
+            if pair not in self.ratio_long:
+                self.ratio_long[pair] = RollingWindow(max(2, LOOKBACK))
+                self.ratio_short[pair] = RollingWindow(max(2, SPREAD_WINDOW))
+                self._seed_ratio_windows(pair)
+            self.pairs_by_token.setdefault(TOKENS[base], []).append(pair)
+            self.pairs_by_token.setdefault(TOKENS[quote], []).append(pair)
+        self.active_pairs = active
+        MET_SCREEN_PAIRS.set(len(active) - len([p for p in active if p in PAIRS]))
+
+    def _warm_start(self) -> List[str]:
+        """Load the newest LOOKBACK*2 stored bars per token; returns the tokens the store had nothing for."""
+        assert self.store is not None
+        missing, loaded = [], 0
+        for addr in dict.fromkeys(TOKENS.values()):
+            bars = self.store.tail(addr, LOOKBACK * 2)
+            if bars.size == 0:
+                missing.append(addr)
+                continue
+            self.price_history[addr].extend(bars["price"].tolist())
+            loaded += bars.size
+        jlog("info", event="price_store_warm_start", bars=loaded, missing=len(missing))
+        return missing
 
-    async def _fetch_historical_prices(self, token_address: str):
+    @staticmethod
+    def _day_data_query(token_address: str, first: int) -> str:
         # tokenDayDatas; newest first
-        q = {
-            "query": f"""
-            {{
-              tokenDayDatas(
-                first: 120,
-                orderBy: date,
-                orderDirection: desc,
-                where: {{ token: "{token_address.lower()}" }}
-              ) {{
-                date
-                priceUSD
-              }}
-            }}
-            """
-        }
-        try:
-            assert self.session is not None
-            async with self.session.post(SUBGRAPH_URL, json=q) as r:
-                data = await r.json()
-                arr = data.get("data", {}).get("tokenDayDatas", [])
-                for row in reversed(arr):
-                    p = float(row.get("priceUSD") or 0) or 0.0
-                    if p > 0:
-                        self.price_history[token_address].append(p)
-        except Exception as e:
+        return (f'tokenDayDatas(first: {first}, orderBy: date, orderDirection: desc, '
+                f'where: {{ token: "{token_address.lower()}" }}) {{ date priceUSD }}')
+
+    async def _fetch_historical_prices(self, token_addresses: List[str]):
+        """Day bars for every token, GRAPHQL_BATCH_SIZE tokens per aliased query."""
+        assert self.graphql is not None
+        rows = await self.graphql.fetch_many(SUBGRAPH_URL, token_addresses, lambda a: self._day_data_query(a, 120))
+        failed = [a for a, arr in rows.items() if arr is None]
+        for addr, arr in rows.items():
+            for row in reversed(arr or []):
+                p = float(row.get("priceUSD") or 0) or 0.0
+                if p > 0:
+                    self.price_history[addr].append(p)
+                    if self.store:
+                        self.store.append(addr, int(row.get("date") or 0), p)
+        if failed:
             MET_ERRORS.inc()
-            jlog("error", event="subgraph_bootstrap_error", token=token_address, err=str(e))
-
-    async def _fetch_latest_price(self, token_address: str) -> Optional[float]:
-        q = {
-            "query": f"""
-            {{
-              tokenDayDatas(
-                first: 1,
-                orderBy: date,
-                orderDirection: desc,
-                where: {{ token: "{token_address.lower()}" }}
-              ) {{
-                date
-                priceUSD
-              }}
-            }}
-            """
-        }
-        try:
-            assert self.session is not None
-            async with self.session.post(SUBGRAPH_URL, json=q) as r:
-                data = await r.json()
-                arr = data.get("data", {}).get("tokenDayDatas", [])
-                if not arr:
-                    return None
-                p = float(arr[0].get("priceUSD") or 0) or 0.0
-                return p if p > 0 else None
-        except Exception as e:
+            jlog("error", event="subgraph_bootstrap_error", tokens=failed)
+        if self.store:
+            await asyncio.to_thread(self.store.flush)
+
+    async def _fetch_latest_prices(self, token_addresses: List[str]) -> Dict[str, Optional[float]]:
+        assert self.graphql is not None
+        rows = await self.graphql.fetch_many(SUBGRAPH_URL, token_addresses, lambda a: self._day_data_query(a, 1))
+        out: Dict[str, Optional[float]] = {}
+        failed = []
+        for addr, arr in rows.items():
+            if arr is None:
+                failed.append(addr)
+            p = float(arr[0].get("priceUSD") or 0) if arr else 0.0
+            out[addr] = p if p > 0 else None
+        if failed:
             MET_ERRORS.inc()
-            jlog("error", event="subgraph_latest_error", token=token_address, err=str(e))
-            return None
+            jlog("error", event="subgraph_latest_error", tokens=failed)
+        return out
 
     async def refresh_prices(self):
-        tasks = []
-        for addr in TOKENS.values():
-            tasks.append(self._refresh_one(addr))
-        await asyncio.gather(*tasks)
-
-    async def _refresh_one(self, token_address: str):
-        p = await self._fetch_latest_price(token_address)
-        if p is not None:
-            dq = self.price_history[token_address]
-            if len(dq) == 0 or abs(dq[-1] - p) > 1e-9:
-                dq.append(p)
-
-    # ---------------- feature helpers ----------------
-
-    @staticmethod
-    def _zscore(series: np.ndarray) -> float:
-        if series.size < 20:
-            return 0.0
-        mu = float(series.mean())
-        sigma = float(series.std(ddof=1))
-        if sigma <= 0:
-            return 0.0
-        return float((series[-1] - mu) / sigma)
-
-    @staticmethod
-    def _ratio(a: np.ndarray, b: np.ndarray) -> np.ndarray:
-        n = min(a.size, b.size)
-        if n == 0:
-            return np.array([])
-        ra = a[-n:]
-        rb = b[-n:]
-        with np.errstate(divide='ignore', invalid='ignore'):
-            r = np.where(rb > 0, ra / rb, np.nan)
-        r = np.nan_to_num(r, nan=0.0, posinf=0.0, neginf=0.0)
-        return r
+        self.apply_prices(await self._fetch_latest_prices(list(TOKENS.values())))
+        if self.store:
+            await asyncio.to_thread(self.store.flush)
+        # one matrix bar per pass from the latest known prices (missing tokens stay NaN)
+        self.price_matrix.append_bar(np.array([
+            self.price_history[TOKENS[s]][-1] if self.price_history[TOKENS[s]] else np.nan
+            for s in self.symbols
+        ]))
+
+    def apply_prices(self, latest: Dict[str, Optional[float]]) -> Set[str]:
+        """
+        One pass of prices (token -> price or None): price history first, then one ratio bar
+        per pair with a changed leg. Returns those pairs. Also the replay entry point
+        (scripts/backtest_stat_arb.py).
+        """
+        touched: Set[str] = set()
+        for addr, p in latest.items():
+            if self._refresh_one(addr, p):
+                touched.update(self.pairs_by_token.get(addr, ()))
+        # ratio bars only after every leg has its new price
+        self._push_ratios(touched)
+        return touched
+
+    def _refresh_one(self, token_address: str, p: Optional[float]) -> bool:
+        """Record a new price; True if it changed."""
+        if p is None:
+            return False
+        dq = self.price_history[token_address]
+        if len(dq) and abs(dq[-1] - p) <= 1e-9:
+            return False
+        dq.append(p)
+        if self.store:
+            self.store.append(token_address, int(time.time()), p)
+        return True
+
+    def _push_ratios(self, pairs: Iterable[str]):
+        """A new ratio bar for each pair with at least one leg updated this pass."""
+        for pair in pairs:
+            base, quote = pair.split("/")
+            a = self.price_history[TOKENS[base]]
+            b = self.price_history[TOKENS[quote]]
+            if a and b and b[-1] > 0:
+                r = a[-1] / b[-1]
+                self.ratio_long[pair].push(r)
+                self.ratio_short[pair].push(r)
+
+    # ---------------- universe screen ----------------
+
+    async def screen(self):
+        """Score every token pair in the worker process and make the top-K active next to PAIRS."""
+        if self.screen_pool is None:
+            return
+        t0 = time.perf_counter()
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(
+                self.screen_pool, screen_pairs, self.price_matrix.view(), self.symbols,
+                SCREEN_TOP_K, SPREAD_WINDOW, 40, SCREEN_MIN_CORR, SCREEN_MAX_HALF_LIFE, SCREEN_MAX_DF_TSTAT,
+            )
+        except Exception as e:
+            MET_ERRORS.inc()
+            jlog("error", event="pairs_screen_error", err=str(e))
+            return
+        finally:
+            MET_SCREEN_LAT.observe(time.perf_counter() - t0)
+        before = set(self.active_pairs)
+        self._set_active_pairs(top_pairs(scores))
+        if set(self.active_pairs) != before:
+            jlog("info", event="pairs_screen", active=self.active_pairs,
+                 top=[asdict(s) for s in scores[:5]], ms=round((time.perf_counter() - t0) * 1000, 1))
 
     # ---------------- engines ----------------
 
     def _engine_mean_reversion(self, pair: str) -> Optional[StatArbSignal]:
         base, quote = pair.split("/")
-        ba = TOKENS.get(base)
-        qa = TOKENS.get(quote)
-        if not ba or not qa:
-            return None
-        a = np.array(self.price_history[ba], dtype=float)
-        b = np.array(self.price_history[qa], dtype=float)
-        if a.size < 30 or b.size < 30:
-            return None
-        ratio = self._ratio(a, b)
-        if ratio.size < 30:
+        w = self.ratio_long.get(pair)
+        if w is None or len(w) < 30:
             return None
-        z = self._zscore(ratio[-LOOKBACK:])
+        z = w.zscore()
         if abs(z) < MIN_ZSCORE:
             return None
         # mean reversion: expect revert toward mean (z -> 0)
-        entry = float(ratio[-1])
-        target = float(ratio[-1] - z * float(ratio[-LOOKBACK:].std(ddof=1)))
-        stop = float(ratio[-1] + np.sign(z) * float(ratio[-LOOKBACK:].std(ddof=1)) * EXIT_ZSCORE)
+        sd = w.std
+        entry = w.last
+        target = entry - z * sd
+        stop = entry + float(np.sign(z)) * sd * EXIT_ZSCORE
         # expected move magnitude
         expected_move = abs(entry - target) / max(target, 1e-9)
         exp_profit = float(POSITION_SIZE_USD * Decimal(expected_move))
@@ -345,24 +546,15 @@ class StatisticalArbScanner:
     def _engine_pairs_spread(self, pair: str) -> Optional[StatArbSignal]:
         # same ratio engine but different thresholding and risk
         base, quote = pair.split("/")
-        ba = TOKENS.get(base)
-        qa = TOKENS.get(quote)
-        if not ba or not qa:
-            return None
-        a = np.array(self.price_history[ba], dtype=float)
-        b = np.array(self.price_history[qa], dtype=float)
-        if a.size < 40 or b.size < 40:
-            return None
-        ratio = self._ratio(a, b)
-        if ratio.size < 40:
+        w = self.ratio_short.get(pair)
+        if w is None or len(w) < 40:
             return None
-        recent = ratio[-60:] if ratio.size >= 60 else ratio
-        z = self._zscore(recent)
+        z = w.zscore()
         if abs(z) < (MIN_ZSCORE + 0.5):
             return None
-        entry = float(ratio[-1])
-        mu = float(recent.mean())
-        sd = float(recent.std(ddof=1) or 1.0)
+        entry = w.last
+        mu = w.mean
+        sd = w.std or 1.0
         target = mu
         stop = float(entry + np.sign(z) * sd * EXIT_ZSCORE)
         expected_move = abs(entry - target) / max(target, 1e-9)
@@ -385,43 +577,68 @@ class StatisticalArbScanner:
             ts=int(time.time()),
         )
 
+    # ---------------- model training ----------------
+
+    def _load_models(self):
+        """Warm start from the newest persisted artifact per active pair."""
+        for pair in self.active_pairs:
+            try:
+                art = _load_artifact(pair)
+            except Exception as e:
+                MET_ERRORS.inc()
+                jlog("error", event="model_load_error", pair=pair, err=str(e))
+                continue
+            if art:
+                self.models[pair] = PairModel(**art)
+        MET_MODELS.set(len(self.models))
+        if self.models:
+            jlog("info", event="stat_arb_models_loaded", models={p: m.version for p, m in self.models.items()})
+
     async def _train_models(self):
-        if not SKLEARN_AVAILABLE:
+        """Fit every active pair in the training pool on a history snapshot, then swap the results in."""
+        if not SKLEARN_AVAILABLE or self.train_pool is None:
             MET_MODELS.set(0)
             return
-        os.makedirs(MODEL_DIR, exist_ok=True)
-        trained = 0
-        for pair in PAIRS:
+        loop = asyncio.get_running_loop()
+        version = int(time.time())
+        jobs = {}
+        for pair in self.active_pairs:
             base, quote = pair.split("/")
-            ba = TOKENS.get(base)
-            qa = TOKENS.get(quote)
-            if not ba or not qa:
-                continue
-            a = np.array(self.price_history[ba], dtype=float)
-            b = np.array(self.price_history[qa], dtype=float)
-            n = min(a.size, b.size)
-            if n < 80:
-                continue
-            ra = np.diff(np.log(a[-n:]))
-            rb = np.diff(np.log(b[-n:]))
-            X = np.stack([
-                ra[-LOOKBACK:][-60:],
-                rb[-LOOKBACK:][-60:],
-            ], axis=1)
-            y = ra[-LOOKBACK:][-60:]
-            if X.shape[0] < 40:
-                continue
-            scaler = StandardScaler()
-            Xs = scaler.fit_transform(X)
-            model = RandomForestRegressor(n_estimators=128, max_depth=6, random_state=42)
-            model.fit(Xs, y)
-            self.models[pair] = model
-            self.scalers[pair] = scaler
-            trained += 1
-        MET_MODELS.set(trained)
+            a = np.array(self.price_history[TOKENS[base]], dtype=float)
+            b = np.array(self.price_history[TOKENS[quote]], dtype=float)
+            jobs[pair] = loop.run_in_executor(self.train_pool, _fit_pair, pair, a, b, version, PERSIST_MODELS)
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*jobs.values(), return_exceptions=True)
+        dur = time.perf_counter() - t0
+        MET_TRAIN_LAT.observe(dur)
+        fresh: Dict[str, PairModel] = {}
+        for pair, res in zip(jobs, results):
+            if isinstance(res, BaseException):
+                MET_ERRORS.inc()
+                jlog("error", event="model_train_error", pair=pair, err=str(res))
+            elif res is not None:
+                fresh[pair] = PairModel(**res)
+        # one reference swap; pairs the screen dropped while training are not resurrected
+        self.models = {**self.models, **{p: m for p, m in fresh.items() if p in self.ratio_long}}
+        MET_MODELS.set(len(self.models))
+        if self.models:
+            MET_MODEL_VERSION.set(max(m.version for m in self.models.values()))
+        jlog("info", event="stat_arb_models_trained", version=version, pairs=sorted(fresh), sec=round(dur, 2))
+
+    async def _retrain_loop(self):
+        while True:
+            try:
+                await self._train_models()
+            except Exception as e:
+                MET_ERRORS.inc()
+                jlog("error", event="retrain_error", err=str(e))
+            if RETRAIN_INTERVAL_SEC <= 0:
+                return
+            await asyncio.sleep(RETRAIN_INTERVAL_SEC)
 
     def _engine_ml(self, pair: str) -> Optional[StatArbSignal]:
-        if not SKLEARN_AVAILABLE or pair not in self.models:
+        pm = self.models.get(pair)
+        if not SKLEARN_AVAILABLE or pm is None:
             return None
         base, quote = pair.split("/")
         ba = TOKENS.get(base)
@@ -434,9 +651,7 @@ class StatisticalArbScanner:
         ra = np.diff(np.log(a[-n:]))
         rb = np.diff(np.log(b[-n:]))
         X = np.array([[ra[-1], rb[-1]]])
-        scaler = self.scalers[pair]
-        model = self.models[pair]
-        pred = float(model.predict(scaler.transform(X))[0])
+        pred = float(pm.model.predict(pm.scaler.transform(X))[0])
         conf = min(0.95, 0.50 + min(0.45, abs(pred) * 20))
         if conf < MIN_CONFIDENCE:
             return None
@@ -469,13 +684,7 @@ class StatisticalArbScanner:
             return
         # rank by expected profit then confidence
         signals.sort(key=lambda s: (s.expected_profit_usd, s.confidence), reverse=True)
-        for s in signals:
-            payload = json.dumps(asdict(s), separators=(",", ":"))
-            try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        await self.publisher.publish(self.redis, [asdict(s) for s in signals])
         if signals:
             MET_SIGNALS.inc(len(signals))
             MET_BEST_EXP_PROF.set(signals[0].expected_profit_usd)
@@ -489,8 +698,9 @@ class StatisticalArbScanner:
                 await asyncio.sleep(1.0)
                 return
             await self.refresh_prices()
+            await self.screen()
             out: List[StatArbSignal] = []
-            for pair in PAIRS:
+            for pair in self.active_pairs:
                 sig1 = self._engine_mean_reversion(pair)
                 if sig1:
                     out.append(sig1)
@@ -502,6 +712,8 @@ class StatisticalArbScanner:
                     out.append(sig3)
             await self.publish(out)
             MET_LAST_TS.set(int(time.time()))
+            if self.models:
+                MET_MODEL_AGE.set(time.time() - min(m.trained_at for m in self.models.values()))
             jlog("info", event="stat_arb_signals", count=len(out), best=asdict(out[0]) if out else None)
         except Exception as e:
             MET_ERRORS.inc()
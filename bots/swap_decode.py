@@ -0,0 +1,84 @@
+# bots/swap_decode.py
+"""
+ATOM Uniswap V2 router calldata decoder (the five swap selectors the MEV
+scanner handles)
+- Reads fixed 32-byte words by offset from a memoryview over the raw input;
+  no hex slicing, no generic ABI decoder, no intermediate copies for bytes
+  input (a hex string is converted once)
+- Path addresses come back as lowercase 0x-hex; checksumming is left to the
+  caller, once a swap actually turns into a signal
+- Same accept/reject behaviour as eth_abi.decode for these signatures: short
+  data, array offsets into the head or past the end, over-long arrays and
+  dirty address padding -> None
+  (tests/test_swap_decode.py fuzzes the two against each other)
+- Exact-out swaps map onto the exact-in shape: amount_in is the input cap
+  (amountInMax, or tx.value for ETH in) and min_out is the exact amountOut,
+  so the slippage the trader allows is measured on the same scale
+"""
+
+from typing import Dict, List, Optional, Tuple, Union
+
+SEL_swapExactTokensForTokens = "0x38ed1739"
+SEL_swapTokensForExactTokens = "0x8803dbee"
+SEL_swapExactETHForTokens    = "0x7ff36ab5"
+SEL_swapExactTokensForETH    = "0x18cbafe5"
+SEL_swapETHForExactTokens    = "0xfb3bdb41"
+
+# amount_in is tx.value for these (decoded as 0)
+ETH_IN_SELECTORS = (SEL_swapExactETHForTokens, SEL_swapETHForExactTokens)
+
+# selector -> (head words, amount_in word or None, min_out word, path offset word, recipient word)
+_LAYOUTS: Dict[bytes, Tuple[str, int, Optional[int], int, int, int]] = {
+    bytes.fromhex(sel[2:]): (sel,) + layout for sel, layout in (
+        # (uint amountIn, uint amountOutMin, address[] path, address to, uint deadline)
+        (SEL_swapExactTokensForTokens, (5, 0, 1, 2, 3)),
+        (SEL_swapExactTokensForETH,    (5, 0, 1, 2, 3)),
+        # (uint amountOut, uint amountInMax, address[] path, address to, uint deadline)
+        (SEL_swapTokensForExactTokens, (5, 1, 0, 2, 3)),
+        # (uint amountOutMin, address[] path, address to, uint deadline), payable
+        (SEL_swapExactETHForTokens,    (4, None, 0, 1, 2)),
+        # (uint amountOut, address[] path, address to, uint deadline), payable
+        (SEL_swapETHForExactTokens,    (4, None, 0, 1, 2)),
+    )
+}
+
+_ZERO12 = bytes(12)
+
+Swap = Tuple[str, int, int, List[str]]   # (selector, amount_in, min_out, path)
+
+
+def decode_swap(tx_input: Union[str, bytes, bytearray, memoryview]) -> Optional[Swap]:
+    """(selector, amount_in, min_out, path) for a supported V2 swap, else None."""
+    if isinstance(tx_input, str):
+        if len(tx_input) < 10:
+            return None
+        try:
+            tx_input = bytes.fromhex(tx_input[2:] if tx_input[:2] in ("0x", "0X") else tx_input)
+        except ValueError:
+            return None
+    mv = memoryview(tx_input)
+    layout = _LAYOUTS.get(bytes(mv[:4]))
+    if layout is None:
+        return None
+    sel, head, in_w, out_w, path_w, to_w = layout
+    data = mv[4:]
+    size = len(data)
+    if size < 32 * head:
+        return None
+    frm = int.from_bytes
+    if data[32 * to_w:32 * to_w + 12] != _ZERO12:
+        return None
+    off = frm(data[32 * path_w:32 * path_w + 32], "big")
+    if off < 32 * head or off + 32 > size:      # eth_abi: the tail may not start inside the head
+        return None
+    n = frm(data[off:off + 32], "big")
+    start = off + 32
+    if n > (size - start) // 32:
+        return None
+    path: List[str] = []
+    for i in range(start, start + 32 * n, 32):
+        if data[i:i + 12] != _ZERO12:
+            return None
+        path.append("0x" + data[i + 12:i + 32].hex())
+    amount_in = 0 if in_w is None else frm(data[32 * in_w:32 * in_w + 32], "big")
+    return sel, amount_in, frm(data[32 * out_w:32 * out_w + 32], "big"), path
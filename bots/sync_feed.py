@@ -0,0 +1,105 @@
+# bots/sync_feed.py
+"""
+ATOM Sync event feed (Uniswap V2-style pairs)
+- New heads from the shared head tracker (head_tracker.py): WSS newHeads
+  when a URL is configured, adaptive block-number polling otherwise
+- Each new head range triggers eth_getLogs for Sync(uint112,uint112) over the
+  watched pair addresses, chunked by address count and fetched concurrently
+- Logs are returned in (block, logIndex) order so the last Sync per pair wins
+- Prometheus counters for heads, Sync logs and getLogs failures
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional, Sequence
+
+from prometheus_client import Counter, Histogram
+from web3 import Web3
+
+from head_tracker import HeadTracker
+
+# keccak256("Sync(uint112,uint112)")
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+# ---------- Metrics ----------
+MET_SYNC_HEADS  = Counter("atom_sync_feed_heads_total", "New heads observed by the Sync feed")
+MET_SYNC_LOGS   = Counter("atom_sync_feed_logs_total", "Sync logs fetched")
+MET_SYNC_ERRORS = Counter("atom_sync_feed_errors_total", "getLogs failures")
+MET_SYNC_LAT    = Histogram("atom_sync_feed_getlogs_seconds", "getLogs latency per head range")
+
+
+@dataclass
+class SyncLog:
+    pair: str
+    reserve0: int
+    reserve1: int
+    block_number: int
+    log_index: int
+
+
+def _data_bytes(data) -> bytes:
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    s = str(data)
+    return bytes.fromhex(s[2:] if s.startswith("0x") else s)
+
+
+def decode_sync(log) -> SyncLog:
+    raw = _data_bytes(log["data"])
+    return SyncLog(
+        pair=Web3.to_checksum_address(log["address"]),
+        reserve0=int.from_bytes(raw[0:32], "big"),
+        reserve1=int.from_bytes(raw[32:64], "big"),
+        block_number=int(log["blockNumber"]),
+        log_index=int(log["logIndex"]),
+    )
+
+
+class SyncFeed:
+    def __init__(self, w3: Web3, wss_url: str = "", poll_sec: float = 1.0, addresses_per_query: int = 1000,
+                 tracker: Optional[HeadTracker] = None):
+        self.w3 = w3
+        self.tracker = tracker or HeadTracker(w3, wss_url, max_poll_sec=poll_sec)
+        self.addresses_per_query = max(1, addresses_per_query)
+
+    # ---------- heads ----------
+
+    async def heads(self) -> AsyncIterator[int]:
+        """Yield each new head number (strictly increasing; gaps are possible)."""
+        self.tracker.start()
+        async for head in self.tracker.stream():
+            MET_SYNC_HEADS.inc()
+            yield head.number
+
+    # ---------- logs ----------
+
+    def _get_logs(self, addresses: List[str], from_block: int, to_block: int) -> list:
+        return self.w3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": addresses,
+            "topics": [SYNC_TOPIC],
+        })
+
+    async def fetch(self, pairs: Sequence[str], from_block: int, to_block: int) -> List[SyncLog]:
+        """Sync logs for `pairs` in [from_block, to_block], ordered by (block, logIndex). Raises on failure."""
+        pairs = list(pairs)
+        if not pairs or to_block < from_block:
+            return []
+        t0 = time.perf_counter()
+        step = self.addresses_per_query
+        try:
+            parts = await asyncio.gather(*(
+                asyncio.to_thread(self._get_logs, pairs[i:i + step], from_block, to_block)
+                for i in range(0, len(pairs), step)
+            ))
+        except Exception:
+            MET_SYNC_ERRORS.inc()
+            raise
+        finally:
+            MET_SYNC_LAT.observe(time.perf_counter() - t0)
+        out = [decode_sync(lg) for part in parts for lg in part if not lg.get("removed", False)]
+        out.sort(key=lambda e: (e.block_number, e.log_index))
+        MET_SYNC_LOGS.inc(len(out))
+        return out
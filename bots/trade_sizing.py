@@ -0,0 +1,91 @@
+# bots/trade_sizing.py
+"""
+ATOM constant-product trade sizing (Uniswap V2 getAmountOut composition)
+- Each hop x -> g*R_out*x / (R_in + g*x) is a Mobius map; a cycle of hops
+  composes to out(x) = A*x / (B + C*x) with exact integer A, B, C
+- Profit out(x) - (1 + phi)*x is concave: the optimum is closed form,
+  x* = (sqrt(A*B / (1 + phi)) - B) / C, where phi is the flash-loan fee
+- Capped by the flash-loan limit, then re-simulated hop by hop with the
+  router's integer rounding so the reported amounts match on-chain quotes
+- Pure integer math on snapshot reserves: no RPC
+"""
+
+from dataclasses import dataclass
+from math import isqrt
+from typing import List, Optional, Sequence, Tuple
+
+BPS = 10_000
+
+# (reserve_in, reserve_out, fee_bps) for one hop, oriented in the swap direction
+Leg = Tuple[int, int, int]
+
+
+@dataclass
+class SizedTrade:
+    amount_in: int
+    amounts_out: List[int]    # output of every hop; the last one is the cycle output
+    flash_fee: int            # in input-token base units
+
+    @property
+    def amount_out(self) -> int:
+        return self.amounts_out[-1] if self.amounts_out else 0
+
+    @property
+    def profit(self) -> int:
+        """Output minus input minus flash fee, in input-token base units."""
+        return self.amount_out - self.amount_in - self.flash_fee
+
+
+def get_amount_out(amount_in: int, reserve_in: int, reserve_out: int, fee_bps: int = 30) -> int:
+    """UniswapV2Library.getAmountOut with a configurable fee."""
+    if amount_in <= 0 or reserve_in <= 0 or reserve_out <= 0:
+        return 0
+    in_with_fee = amount_in * (BPS - fee_bps)
+    return (in_with_fee * reserve_out) // (reserve_in * BPS + in_with_fee)
+
+
+def simulate(legs: Sequence[Leg], amount_in: int) -> List[int]:
+    out: List[int] = []
+    x = amount_in
+    for r_in, r_out, fee_bps in legs:
+        x = get_amount_out(x, r_in, r_out, fee_bps)
+        out.append(x)
+    return out
+
+
+def cycle_coefficients(legs: Sequence[Leg]) -> Tuple[int, int, int]:
+    """(A, B, C) with out(x) = A*x / (B + C*x) for the composed path, ignoring rounding."""
+    A, B, C = 1, 1, 0   # identity
+    for r_in, r_out, fee_bps in legs:
+        g = BPS - fee_bps
+        a, b, c = g * r_out, BPS * r_in, g
+        A, B, C = a * A, b * B, b * C + c * A
+    return A, B, C
+
+
+def optimal_amount_in(legs: Sequence[Leg], flash_fee_bps: int = 0, max_amount_in: Optional[int] = None) -> int:
+    """Profit-maximising input (0 when the cycle has no profitable size)."""
+    if not legs:
+        return 0
+    A, B, C = cycle_coefficients(legs)
+    if C <= 0:
+        return 0
+    # d/dx [A x / (B + C x)] = A B / (B + C x)^2 = 1 + phi  ->  B + C x = sqrt(A B / (1 + phi))
+    root = isqrt(A * B * BPS // (BPS + flash_fee_bps))
+    if root <= B:
+        return 0
+    x = (root - B) // C
+    if max_amount_in is not None:
+        x = min(x, max_amount_in)
+    return max(x, 0)
+
+
+def size_cycle(legs: Sequence[Leg], flash_fee_bps: int = 0, max_amount_in: Optional[int] = None) -> Optional[SizedTrade]:
+    """Optimal size and exact per-hop outputs, or None when no size is profitable after the flash fee."""
+    x = optimal_amount_in(legs, flash_fee_bps, max_amount_in)
+    if x <= 0:
+        return None
+    trade = SizedTrade(amount_in=x, amounts_out=simulate(legs, x), flash_fee=x * flash_fee_bps // BPS)
+    if trade.profit <= 0:
+        return None
+    return trade
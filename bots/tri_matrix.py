@@ -0,0 +1,83 @@
+# bots/tri_matrix.py
+"""
+ATOM vectorized triangle evaluation (NumPy)
+- Dense N x N best post-fee rate matrix plus an argmax-DEX matrix, built from
+  reserve arrays in one pass (no per-edge Python math)
+- Every triangle product R[i,j] * R[j,k] * R[k,i] via broadcasting, one
+  (N-i-1)^2 slab per anchor token i, so each cycle appears exactly once
+  (rotated to start at its lowest index; both orientations covered)
+- Profit threshold applied as an array mask; only survivors leave NumPy
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class RateMatrix:
+    tokens: List[str]
+    dexes: List[str]
+    rates: np.ndarray     # float64 [N, N]; 0.0 where no pool quotes i -> j
+    dex_idx: np.ndarray   # int16 [N, N]; index into `dexes`, -1 where no pool
+
+
+def build_rate_matrix(
+    tokens: Sequence[str],
+    dexes: Sequence[str],
+    decimals: np.ndarray,      # [N] token decimals
+    pool_dex: np.ndarray,      # [P] dex index per pool
+    pool_i0: np.ndarray,       # [P] token index of token0
+    pool_i1: np.ndarray,       # [P] token index of token1
+    reserve0: np.ndarray,      # [P] raw reserves (float64)
+    reserve1: np.ndarray,      # [P]
+    fee_mult: np.ndarray,      # [D] (10000 - fee_bps) / 10000 per dex
+) -> RateMatrix:
+    """Post-fee spot rate for both directions of every pool, reduced to the best DEX per (i, j)."""
+    n, d = len(tokens), len(dexes)
+    per_dex = np.zeros((d, n, n), dtype=np.float64)
+    if len(pool_dex):
+        scale = np.power(10.0, decimals.astype(np.float64))
+        h0 = reserve0 / scale[pool_i0]
+        h1 = reserve1 / scale[pool_i1]
+        ok = (h0 > 0) & (h1 > 0)
+        f = fee_mult[pool_dex]
+        dx, a, b = pool_dex[ok], pool_i0[ok], pool_i1[ok]
+        per_dex[dx, a, b] = (h1[ok] / h0[ok]) * f[ok]
+        per_dex[dx, b, a] = (h0[ok] / h1[ok]) * f[ok]
+    best = per_dex.max(axis=0)
+    arg = per_dex.argmax(axis=0).astype(np.int16)
+    arg[best <= 0] = -1
+    return RateMatrix(list(tokens), list(dexes), best, arg)
+
+
+def profitable_triangles(rates: np.ndarray, min_ratio: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (i, j, k, product) arrays for every triangle i->j->k->i with product - 1 > min_ratio.
+    i is always the lowest index, so rotations are never repeated.
+    """
+    n = rates.shape[0]
+    floor = 1.0 + max(min_ratio, 0.0)
+    ii: List[np.ndarray] = []
+    jj: List[np.ndarray] = []
+    kk: List[np.ndarray] = []
+    pp: List[np.ndarray] = []
+    for i in range(n - 2):
+        out_i = rates[i, i + 1:]            # i -> j
+        back_i = rates[i + 1:, i]           # k -> i
+        if not out_i.any() or not back_i.any():
+            continue
+        # [j, k] = R[i,j] * R[j,k] * R[k,i]; the zero diagonal of R drops j == k
+        prod = out_i[:, None] * rates[i + 1:, i + 1:] * back_i[None, :]
+        j, k = np.nonzero(prod > floor)
+        if j.size == 0:
+            continue
+        ii.append(np.full(j.size, i, dtype=np.intp))
+        jj.append(j + i + 1)
+        kk.append(k + i + 1)
+        pp.append(prod[j, k])
+    if not ii:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, np.empty(0, dtype=np.float64)
+    return np.concatenate(ii), np.concatenate(jj), np.concatenate(kk), np.concatenate(pp)
@@ -1,10 +1,29 @@
 # bots/triangular_arbitrage.py
 """
 ATOM Triangular Arbitrage Scanner (Polygon mainnet)
-- Discovers 3-token cycles across QuickSwap & Sushi
+- Discovers 2-5 hop cycles across QuickSwap & Sushi (per-hop DEX choice, so
+  2-hop cycles are cross-DEX round trips) with a bounded-depth route search:
+  upper-bound pruning on the best remaining edge rates, capped by a work budget
+- Signals carry routers[] / tokens[] in the shape the executor's
+  encode_arbitrage_params consumes
+- Optional NumPy mode (TRI_VECTORIZED=1): dense best-rate matrix, all triangles
+  evaluated by broadcasting, thresholds applied as array masks
+- Sizes every candidate with constant-product math (composed getAmountOut over
+  snapshot reserves, closed-form optimum capped by the flash-loan limit)
+- Integer Q112 fixed-point pricing (fixed_point.py) on the hot path; floats only
+  in published fields
+- Warm-starts pairs (with token order) and token metadata from the on-disk
+  pair index; extends it from PairCreated logs on each discovery pass
+- Optional event-driven mode (TRI_EVENT_DRIVEN=1): per new head, Sync logs roll
+  the snapshot forward and an edge -> cycles index re-evaluates only the cycles
+  touching a changed pool; periodic full rescans keep it honest
 - Prices edges from on-chain reserves with proper decimals and DEX fees
+- Reserves are read once per block into a snapshot; edge lookups are in-memory
+- All pair/reserve/metadata reads are batched through Multicall3
 - Estimates net PnL with Chainlink gas costing and Aave flash fee
-- Publishes signals to Redis Stream 'atom:opps:triangular'
+- Publishes signals to Redis Stream 'atom:opps:triangular', change-only: a
+  cycle (tokens + DEX per hop) is re-published when its quantized net profit
+  moves or its TTL lapses, and gets an "expired" entry when it disappears
 - Prometheus metrics on METRICS_PORT
 - Strict: no private keys, no signing, no websockets required
 - Hard fail if not on chain_id=137 (Polygon)
@@ -15,14 +34,25 @@ import asyncio
 import json
 import time
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
+import numpy as np
 import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+import fixed_point as fp
+import multicall as mc
+import pair_index
+from cycle_search import TokenGraph, enumerate_cycles, search_routes
+from reserve_snapshot import MET_SNAP_AGE, ReserveSnapshot
+from signal_publisher import ChangeOnlyPublisher
+from sync_feed import SyncFeed
+from trade_sizing import Leg, size_cycle
+from tri_matrix import RateMatrix, build_rate_matrix, profitable_triangles
+
 # ---------- Env ----------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -37,12 +67,34 @@ REDIS_URL = _env("REDIS_URL", "redis://127.0.0.1:6379/0")
 # Scan cadence & discovery
 SCAN_INTERVAL_SEC = float(_env("TRI_SCAN_INTERVAL_SEC", "3.0"))
 DISCOVERY_INTERVAL_SEC = float(_env("TRI_DISCOVERY_INTERVAL_SEC", "900"))
+USE_PAIR_INDEX = _env("TRI_USE_PAIR_INDEX", "true").lower() in ("1", "true", "yes")
 
 # Economics
-TRADE_SIZE_USD = Decimal(_env("TRI_TRADE_SIZE_USD", "25000"))
+MAX_FLASH_USD = Decimal(_env("TRI_MAX_FLASH_USD", "250000"))  # flash-loan cap per cycle
 AAVE_FLASH_FEE_BPS = Decimal(_env("AAVE_FLASH_FEE_BPS", "9"))
 MIN_NET_PROFIT_USD = Decimal(_env("TRI_MIN_NET_PROFIT_USD", "75"))
+# Q112 fixed-point copies for the hot path
+MAX_FLASH_Q = fp.from_decimal(MAX_FLASH_USD)
+MIN_NET_Q = fp.from_decimal(MIN_NET_PROFIT_USD)
+FLASH_FEE_Q = fp.from_decimal(AAVE_FLASH_FEE_BPS / Decimal(10000))
 GAS_LIMIT_TRI = int(_env("TRI_GAS_LIMIT", "650000"))
+GAS_PER_EXTRA_HOP = int(_env("TRI_GAS_PER_EXTRA_HOP", "150000"))  # per hop above 3 (credited below 3)
+
+# Route search
+MIN_CYCLE_LEN = max(2, min(5, int(_env("TRI_MIN_CYCLE_LEN", "2"))))
+MAX_CYCLE_LEN = max(MIN_CYCLE_LEN, min(5, int(_env("TRI_MAX_CYCLE_LEN", "3"))))
+ROUTE_WORK_BUDGET = int(_env("TRI_ROUTE_WORK_BUDGET", "200000"))  # edge expansions per search; 0 = unbounded
+MAX_SIGNALS = int(_env("TRI_MAX_SIGNALS", "200"))
+# 3-hop only (TRI_MIN_CYCLE_LEN=3): every triangle over a dense NumPy rate matrix instead of the route search
+VECTORIZED = _env("TRI_VECTORIZED", "0").lower() in ("1", "true", "yes")
+
+# Event-driven mode: Sync logs per new head instead of a full rescan every interval
+EVENT_DRIVEN = _env("TRI_EVENT_DRIVEN", "0").lower() in ("1", "true", "yes")
+WSS_URL = _env("POLYGON_WSS_URL", "")                      # newHeads subscription; polling if empty
+BLOCK_POLL_SEC = float(_env("TRI_BLOCK_POLL_SEC", "1.0"))
+FULL_RESCAN_BLOCKS = int(_env("TRI_FULL_RESCAN_BLOCKS", "50"))  # reload reserves + full search every N heads
+MAX_LOG_RANGE = int(_env("TRI_MAX_LOG_RANGE", "50"))            # wider head gaps reload instead of replaying
+MAX_INDEXED_CYCLES = int(_env("TRI_MAX_INDEXED_CYCLES", "200000"))
 
 # Streams/metrics/controls
 METRICS_PORT = int(_env("METRICS_PORT", "9112"))
@@ -72,24 +124,25 @@ TOKENS: Dict[str, str] = {
     "AAVE"  : "0xD6DF932A45C0f255f85145f286eA0b292B21C90B",
     "CRV"   : "0x172370d5Cd63279eFa6d502DAB29171933a610AF",
 }
+# Optional override of the token universe (symbol -> address JSON)
+TOKENS = json.loads(_env("TRI_TOKENS_JSON", json.dumps(TOKENS)))
 # Normalize to checksum
 TOKENS = {s: Web3.to_checksum_address(a) for s, a in TOKENS.items()}
 
 DEXES = {
     "quickswap": {
         "factory": Web3.to_checksum_address("0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32"),
+        "router": Web3.to_checksum_address(_env("QUICKSWAP_V2_ROUTER", "0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff")),
         "fee_bps": 30,  # 0.30%
     },
     "sushiswap": {
         "factory": Web3.to_checksum_address("0xc35DADB65012eC5796536bD9864eD8773aBc74C4"),
+        "router": Web3.to_checksum_address(_env("SUSHI_V2_ROUTER", "0x1b02dA8Cb0d097eB8D57A175b88c7D8b47997506")),
         "fee_bps": 30,  # 0.30%
     },
 }
 
 # ---------- Minimal ABIs ----------
-FACTORY_ABI = json.loads('[{"constant":true,"inputs":[{"name":"tokenA","type":"address"},{"name":"tokenB","type":"address"}],"name":"getPair","outputs":[{"name":"pair","type":"address"}],"stateMutability":"view","type":"function"}]')
-PAIR_ABI = json.loads('[{"constant":true,"inputs":[],"name":"getReserves","outputs":[{"name":"reserve0","type":"uint112"},{"name":"reserve1","type":"uint112"},{"name":"blockTimestampLast","type":"uint32"}],"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"token1","outputs":[{"name":"","type":"address"}],"stateMutability":"view","type":"function"}]')
-ERC20_ABI = json.loads('[{"constant":true,"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"stateMutability":"view","type":"function"},{"constant":true,"inputs":[],"name":"symbol","outputs":[{"name":"","type":"string"}],"stateMutability":"view","type":"function"}]')
 CL_AGG_ABI = json.loads('[{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]')
 
 # ---------- Logging ----------
@@ -108,7 +161,30 @@ MET_SCAN_LAT     = Histogram("atom_tri_scan_latency_seconds", "Scan latency")
 MET_ERRORS       = Counter("atom_tri_errors_total", "Errors")
 MET_OPPS         = Counter("atom_tri_opportunities_total", "Opportunities")
 MET_BEST_NET     = Gauge("atom_tri_best_net_profit_usd", "Best net profit last scan")
-MET_TRIANGLES    = Gauge("atom_tri_triangles_scanned", "Triangles scanned per loop")
+MET_TRIANGLES    = Gauge("atom_tri_triangles_scanned", "Candidate cycles evaluated per loop")
+MET_RELAXATIONS  = Gauge("atom_tri_cycle_relaxations", "Edge expansions in the last route search")
+MET_ROUTE_PRUNED = Gauge("atom_tri_route_pruned", "Partial routes pruned by the profit upper bound in the last search")
+MET_ROUTE_BUDGET = Counter("atom_tri_route_budget_exhausted_total", "Route searches truncated by TRI_ROUTE_WORK_BUDGET")
+MET_GRAPH_EDGES  = Gauge("atom_tri_graph_edges", "Directed best-rate edges in the token graph")
+MET_SEARCH_LAT   = Histogram("atom_tri_cycle_search_seconds", "Cycle search latency")
+MET_INC_EVAL     = Counter("atom_tri_incremental_cycles_evaluated_total", "Indexed cycles re-evaluated after a Sync")
+MET_INC_SKIPPED  = Counter("atom_tri_incremental_cycles_skipped_total", "Indexed cycles skipped: no edge changed")
+MET_INC_SAVED    = Gauge("atom_tri_incremental_work_saved_ratio", "Share of indexed cycles skipped on the last block")
+MET_INC_CHANGED  = Gauge("atom_tri_incremental_changed_pairs", "Pairs whose reserves changed on the last block")
+MET_INDEXED      = Gauge("atom_tri_indexed_cycles", "Cycles in the edge -> cycles index")
+MET_FULL_RESCANS = Counter("atom_tri_full_rescans_total", "Full reserve reloads + searches in event-driven mode")
+MET_SIZE_REJECTS = Counter("atom_tri_sizing_rejects_total", "Candidate cycles with no profitable size after price impact")
+
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
+
+def _route_key(sig: Dict) -> Tuple:
+    """(tokens, dexes) rotated to the smallest (token, dex) leg, so a cycle keeps its key whichever token it borrows."""
+    legs = list(zip(sig["route"], sig["route_dexes"]))
+    i = legs.index(min(legs))
+    legs = legs[i:] + legs[:i]
+    return tuple(t for t, _ in legs), tuple(d for _, d in legs)
 
 # ---------- Models ----------
 @dataclass
@@ -134,19 +210,48 @@ class TriSignal:
     net_profit_usd: float
     amount_usd: float
     ts: int
+    # full cycle (2-5 hops). For hops > 3, a/b/c are the first three tokens, dex_ca is the
+    # closing leg's dex and p_ca is the product of every leg after b->c. For 2 hops, c == a,
+    # dex_bc == dex_ca is the closing leg and p_ca is 1.0.
+    hops: int = 3
+    route: List[str] = field(default_factory=list)
+    route_symbols: List[str] = field(default_factory=list)
+    route_dexes: List[str] = field(default_factory=list)
+    # executor params: router per hop and the tokens after route[0] (encode_arbitrage_params)
+    routers: List[str] = field(default_factory=list)
+    tokens: List[str] = field(default_factory=list)
+    # constant-product sizing, in base units of route[0] (the flash-loaned asset)
+    optimal_amount_in: int = 0
+    expected_amount_out: int = 0
+    amounts_out: List[int] = field(default_factory=list)   # output of every hop
 
 # ---------- Scanner ----------
 class TriangularArbScanner:
     def __init__(self):
         self.w3 = Web3(HTTPProvider(RPC_URL, request_kwargs={"timeout": 10}))
         self.redis: Optional[redis.Redis] = None
-        self.factories = {name: self.w3.eth.contract(info["factory"], abi=FACTORY_ABI) for name, info in DEXES.items()}
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=(), value_field="net_profit_usd",
+            key_fn=_route_key, on_error=_xadd_error,
+        )
         self.matic_usd = self.w3.eth.contract(CHAINLINK_MATIC_USD, abi=CL_AGG_ABI)
 
         # caches
         self.pairs: Dict[str, Dict[Tuple[str, str], str]] = {dex: {} for dex in DEXES.keys()}  # (a,b)->pair
         self.decimals: Dict[str, int] = {}
         self.symbols: Dict[str, str] = {}
+        self.multicall = mc.Multicall(self.w3)
+        self.snapshot = ReserveSnapshot(self.w3, self.multicall)
+        MET_SNAP_AGE.set_function(self.snapshot.age_seconds)
+        self.pair_index: Optional[pair_index.PairIndex] = pair_index.PairIndex() if USE_PAIR_INDEX else None
+
+        # event-driven mode
+        self.feed = SyncFeed(self.w3, WSS_URL, BLOCK_POLL_SEC)
+        self._edges: Dict[Tuple[str, str], Tuple[float, str]] = {}     # best post-fee edge per ordered pair
+        self._cycles: List[Tuple[str, ...]] = []
+        self._edge_cycles: Dict[FrozenSet[str], List[int]] = {}        # token pair -> cycle ids
+        self._index_pairs: Set[str] = set()
+        self._changed_pairs: Set[FrozenSet[str]] = set()                # token pairs touched by the last Sync replay
 
         self._ensure_chain()
 
@@ -163,27 +268,58 @@ class TriangularArbScanner:
              tokens=len(TOKENS), pairs=sum(len(v) for v in self.pairs.values()))
 
     # ---------- Discovery ----------
+    def _index_factories(self) -> Dict[str, Tuple[str, int]]:
+        """dex -> (factory, backfill start block) for the DEXes the pair index can cover."""
+        return {dex: (cfg["factory"], pair_index.FACTORIES[dex][1])
+                for dex, cfg in DEXES.items() if dex in pair_index.FACTORIES}
+
+    async def _pairs_from_index(self) -> bool:
+        """Load self.pairs from the pair index (no RPC). False if any DEX has not been backfilled yet."""
+        if not self.pair_index:
+            return False
+        factories = self._index_factories()
+        if len(factories) != len(DEXES):
+            return False
+        found = await asyncio.to_thread(
+            self.pair_index.warm_pairs_among, {dex: f for dex, (f, _) in factories.items()}, TOKENS.values())
+        if found is None:
+            return False
+        for dex, rows in found.items():
+            m: Dict[Tuple[str, str], str] = {}
+            for addr, t0, t1 in rows:
+                m[(t0, t1)] = addr
+                m[(t1, t0)] = addr
+                self.snapshot.seed_tokens(addr, t0, t1)
+            self.pairs[dex] = m
+        return True
+
+    async def _extend_pair_index(self):
+        if self.pair_index:
+            added = await self.pair_index.sync_all(self.w3, self._index_factories(), backfill=False)
+            if any(added.values()):
+                jlog("info", event="pair_index_extended", added=added)
+
     async def _discover_pairs(self):
         t0 = time.perf_counter()
+        if await self._pairs_from_index():
+            MET_DISCOVER_LAT.observe(time.perf_counter() - t0)
+            return
         tokens = list(TOKENS.values())
-        async def get_pair_once(dex: str, a: str, b: str):
-            try:
-                fa = self.factories[dex]
-                addr = await asyncio.to_thread(fa.functions.getPair(a, b).call)
-                if addr and int(addr, 16) != 0:
-                    self.pairs[dex][(a, b)] = Web3.to_checksum_address(addr)
-                    self.pairs[dex][(b, a)] = Web3.to_checksum_address(addr)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="getPair_error", dex=dex, a=a, b=b, err=str(e))
-
-        tasks = []
+        keys: List[Tuple[str, str, str]] = []
         for i in range(len(tokens)):
             for j in range(i + 1, len(tokens)):
-                a, b = tokens[i], tokens[j]
                 for dex in DEXES.keys():
-                    tasks.append(get_pair_once(dex, a, b))
-        await asyncio.gather(*tasks)
+                    keys.append((dex, tokens[i], tokens[j]))
+
+        res = await self.multicall.acall([mc.get_pair(DEXES[dex]["factory"], a, b) for dex, a, b in keys])
+        for (dex, a, b), addr in zip(keys, res):
+            if addr is None:
+                MET_ERRORS.inc()
+                jlog("error", event="getPair_error", dex=dex, a=a, b=b)
+                continue
+            if int(addr, 16) != 0:
+                self.pairs[dex][(a, b)] = addr
+                self.pairs[dex][(b, a)] = addr
 
         # persist in Redis for visibility
         try:
@@ -197,22 +333,26 @@ class TriangularArbScanner:
         MET_DISCOVER_LAT.observe(time.perf_counter() - t0)
 
     async def _prime_token_metadata(self):
-        async def fetch_one(addr: str):
-            if addr in self.decimals and addr in self.symbols:
-                return
-            try:
-                erc = self.w3.eth.contract(addr, abi=ERC20_ABI)
-                dec = await asyncio.to_thread(erc.functions.decimals().call)
-                sym = await asyncio.to_thread(erc.functions.symbol().call)
+        missing = [a for a in TOKENS.values() if a not in self.decimals or a not in self.symbols]
+        if self.pair_index and missing:
+            for addr, (dec, sym) in (await asyncio.to_thread(self.pair_index.token_meta, missing)).items():
+                self.decimals[addr] = dec
+                self.symbols[addr] = sym
+            missing = [a for a in missing if a not in self.decimals or a not in self.symbols]
+        res = await self.multicall.acall([c for a in missing for c in (mc.decimals(a), mc.symbol(a))])
+        fetched: List[Tuple[str, int, str]] = []
+        for idx, addr in enumerate(missing):
+            dec, sym = res[2 * idx], res[2 * idx + 1]
+            if dec is not None and sym is not None:
                 self.decimals[addr] = int(dec)
                 self.symbols[addr] = str(sym)
-            except Exception:
-                # fallbacks
-                self.decimals.setdefault(addr, 6 if addr in (USDC, USDT) else 18)
-                self.symbols.setdefault(addr, next((s for s,a in TOKENS.items() if a == addr), addr[:6]))
-
-        tasks = [fetch_one(a) for a in TOKENS.values()]
-        await asyncio.gather(*tasks)
+                fetched.append((addr, int(dec), str(sym)))
+                continue
+            # fallbacks
+            self.decimals.setdefault(addr, 6 if addr in (USDC, USDT) else 18)
+            self.symbols.setdefault(addr, next((s for s,a in TOKENS.items() if a == addr), addr[:6]))
+        if self.pair_index and fetched:
+            await asyncio.to_thread(self.pair_index.put_tokens, fetched)
 
         # persist
         try:
@@ -224,125 +364,369 @@ class TriangularArbScanner:
             jlog("error", event="redis_set_meta", err=str(e))
 
     # ---------- Pricing ----------
-    def _edge_price_after_fee(self, pair_addr: str, src: str, dst: str, fee_bps: int) -> Optional[Decimal]:
-        try:
-            pair = self.w3.eth.contract(pair_addr, abi=PAIR_ABI)
-            t0 = Web3.to_checksum_address(pair.functions.token0().call())
-            t1 = Web3.to_checksum_address(pair.functions.token1().call())
-            r0, r1, _ = pair.functions.getReserves().call()
-
-            d0 = self.decimals.get(t0, 18)
-            d1 = self.decimals.get(t1, 18)
-
-            if t0 == src and t1 == dst and r0 > 0:
-                price = (Decimal(r1) / Decimal(10**d1)) / (Decimal(r0) / Decimal(10**d0))
-            elif t0 == dst and t1 == src and r1 > 0:
-                price = (Decimal(r0) / Decimal(10**d0)) / (Decimal(r1) / Decimal(10**d1))
-            else:
-                return None
+    def _pair_addresses(self) -> List[str]:
+        return sorted({addr for m in self.pairs.values() for addr in m.values()})
 
-            return price * (Decimal(10000 - fee_bps) / Decimal(10000))
-        except Exception as e:
-            MET_ERRORS.inc()
-            jlog("error", event="price_error", pair=pair_addr, src=src, dst=dst, err=str(e))
+    def _edge_price_after_fee(self, pair_addr: str, src: str, dst: str, fee_bps: int) -> Optional[int]:
+        """Post-fee spot price of one whole `src` in `dst`, Q112."""
+        st = self.snapshot.get(pair_addr)
+        if st is None:
             return None
+        oriented = st.oriented(src, dst)
+        if oriented is None:
+            return None
+        r_in, r_out = oriented
+        return fp.price(r_in, r_out, self.decimals.get(src, 18), self.decimals.get(dst, 18), fee_bps)
 
-    async def _best_direct_price(self, src: str, dst: str) -> Tuple[Optional[Decimal], Optional[str]]:
-        best: Optional[Decimal] = None
+    def _best_direct_price(self, src: str, dst: str) -> Tuple[Optional[int], Optional[str]]:
+        best: Optional[int] = None
         best_dex: Optional[str] = None
         for dex, m in self.pairs.items():
             pair = m.get((src, dst))
             if not pair:
                 continue
             fee = DEXES[dex]["fee_bps"]
-            p = await asyncio.to_thread(self._edge_price_after_fee, pair, src, dst, fee)
+            p = self._edge_price_after_fee(pair, src, dst, fee)
             if p and p > 0 and (best is None or p > best):
                 best = p
                 best_dex = dex
         return best, best_dex
 
-    async def _matic_usd(self) -> Decimal:
+    async def _matic_usd(self) -> int:
+        """MATIC/USD from Chainlink (8 decimals), Q112."""
         try:
             rd = await asyncio.to_thread(self.matic_usd.functions.latestRoundData().call)
-            return Decimal(rd[1]) / Decimal(10**8)
+            return fp.from_units(int(rd[1]), 8)
         except Exception as e:
             MET_ERRORS.inc()
             jlog("error", event="chainlink_error", err=str(e))
-            return Decimal("0")
-
-    # ---------- Triangle search ----------
-    async def scan_triangles(self) -> List[TriSignal]:
+            return 0
+
+    # ---------- Cycle search ----------
+    def _build_graph(self) -> Tuple[TokenGraph, Dict[Tuple[str, str], Tuple[int, str]]]:
+        """Best post-fee edge (Q112) per ordered token pair, from the current snapshot."""
+        graph = TokenGraph()
+        edges: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        for m in self.pairs.values():
+            for (src, dst) in m.keys():
+                if (src, dst) in edges:
+                    continue
+                p, dex = self._best_direct_price(src, dst)
+                if p and dex:
+                    edges[(src, dst)] = (p, dex)
+                    graph.add_edge(src, dst, fp.to_float(p), dex)
+        return graph, edges
+
+    def _rate_matrix(self) -> RateMatrix:
+        """Vectorized counterpart of _build_graph: one reserve array pass over every snapshot pool."""
         tokens = list(TOKENS.values())
-        triangles_scanned = 0
-        signals: List[TriSignal] = []
+        index = {t: n for n, t in enumerate(tokens)}
+        dexes = list(DEXES.keys())
+        rows: List[Tuple[int, int, int, int, int]] = []
+        for d, dex in enumerate(dexes):
+            for addr in set(self.pairs[dex].values()):
+                st = self.snapshot.get(addr)
+                if st is None or st.token0 not in index or st.token1 not in index:
+                    continue
+                rows.append((d, index[st.token0], index[st.token1], st.reserve0, st.reserve1))
+        cols = list(zip(*rows)) if rows else [(), (), (), (), ()]
+        return build_rate_matrix(
+            tokens, dexes,
+            decimals=np.array([self.decimals.get(t, 18) for t in tokens]),
+            pool_dex=np.array(cols[0], dtype=np.intp),
+            pool_i0=np.array(cols[1], dtype=np.intp),
+            pool_i1=np.array(cols[2], dtype=np.intp),
+            reserve0=np.array(cols[3], dtype=np.float64),
+            reserve1=np.array(cols[4], dtype=np.float64),
+            fee_mult=np.array([(10000 - DEXES[d]["fee_bps"]) / 10000 for d in dexes]),
+        )
+
+    # ---------- Sizing ----------
+    def _usd_price(self, token: str) -> Optional[int]:
+        """Mid price in USD (Q112) from a direct stable pool in the snapshot (stables count as $1)."""
+        if token in (USDC, USDT):
+            return fp.ONE
+        for stable in (USDC, USDT):
+            for m in self.pairs.values():
+                pair = m.get((token, stable))
+                if pair:
+                    p = self._edge_price_after_fee(pair, token, stable, 0)
+                    if p:
+                        return p
+        return None
+
+    def _leg(self, src: str, dst: str, dex: str) -> Optional[Leg]:
+        pair = self.pairs[dex].get((src, dst))
+        st = self.snapshot.get(pair) if pair else None
+        oriented = st.oriented(src, dst) if st else None
+        if not oriented:
+            return None
+        return oriented[0], oriented[1], DEXES[dex]["fee_bps"]
+
+    def _evaluate(self, route: List[str], legs: List[Tuple[float, str]], gas_unit_q: int,
+                  prices: Dict[str, Optional[int]]) -> Optional[TriSignal]:
+        """Size a candidate cycle from snapshot reserves and price it in USD; None if it doesn't clear MIN_NET."""
+        hops = len(route)
+        for t in route:
+            if t not in prices:
+                prices[t] = self._usd_price(t)
+        # borrow a stable when the cycle has one, otherwise the first token with a USD price
+        priced = [n for n, t in enumerate(route) if prices[t] is not None]
+        if not priced:
+            return None
+        start = next((n for n in priced if route[n] in (USDC, USDT)), priced[0])
+        route = route[start:] + route[:start]
+        legs = legs[start:] + legs[:start]
+
+        reserves: List[Leg] = []
+        for n, (_, dex) in enumerate(legs):
+            leg = self._leg(route[n], route[(n + 1) % hops], dex)
+            if leg is None:
+                return None
+            reserves.append(leg)
 
-        matic_usd = await self._matic_usd()
-        gas_price = self.w3.eth.gas_price
-        gas_cost_usd = (Decimal(gas_price) * Decimal(GAS_LIMIT_TRI) / Decimal(1e18)) * matic_usd
-        flash_fee_usd = TRADE_SIZE_USD * (AAVE_FLASH_FEE_BPS / Decimal(10000))
-
-        n = len(tokens)
-        for i in range(n):
-            for j in range(i+1, n):
-                for k in range(j+1, n):
-                    a, b, c = tokens[i], tokens[j], tokens[k]
-
-                    # Try both orientations: a->b->c->a and a->c->b->a
-                    for order in ((a,b,c), (a,c,b)):
-                        x, y, z = order
-                        p_xy, dex_xy = await self._best_direct_price(x, y)
-                        p_yz, dex_yz = await self._best_direct_price(y, z)
-                        p_zx, dex_zx = await self._best_direct_price(z, x)
-                        triangles_scanned += 1
-
-                        if not (p_xy and p_yz and p_zx):
-                            continue
-
-                        product = p_xy * p_yz * p_zx
-                        profit_ratio = product - Decimal(1)
-
-                        if profit_ratio <= Decimal(0):
-                            continue
-
-                        gross = TRADE_SIZE_USD * profit_ratio
-                        net = gross - gas_cost_usd - flash_fee_usd
-                        if net < MIN_NET_PROFIT_USD:
-                            continue
-
-                        sig = TriSignal(
-                            a=x, b=y, c=z,
-                            a_symbol=self.symbols.get(x, x[:6]),
-                            b_symbol=self.symbols.get(y, y[:6]),
-                            c_symbol=self.symbols.get(z, z[:6]),
-                            dex_ab=dex_xy or "unknown",
-                            dex_bc=dex_yz or "unknown",
-                            dex_ca=dex_zx or "unknown",
-                            p_ab=float(p_xy), p_bc=float(p_yz), p_ca=float(p_zx),
-                            product=float(product),
-                            gross_profit_usd=float(gross),
-                            gas_cost_usd=float(gas_cost_usd),
-                            flash_fee_usd=float(flash_fee_usd),
-                            net_profit_usd=float(net),
-                            amount_usd=float(TRADE_SIZE_USD),
-                            ts=int(time.time()),
-                        )
-                        signals.append(sig)
-
-        MET_TRIANGLES.set(triangles_scanned)
+        usd = prices[route[0]]
+        dec = self.decimals.get(route[0], 18)
+        trade = size_cycle(reserves, int(AAVE_FLASH_FEE_BPS), fp.usd_to_units(MAX_FLASH_Q, dec, usd))
+        if trade is None:
+            MET_SIZE_REJECTS.inc()
+            return None
+
+        # Q112 USD throughout; floats only in the published signal
+        gross = fp.units_to_usd(trade.amount_out - trade.amount_in, dec, usd)
+        flash_fee_usd = fp.units_to_usd(trade.flash_fee, dec, usd)
+        gas_cost_usd = gas_unit_q * self._gas_limit(hops)
+        net = gross - gas_cost_usd - flash_fee_usd
+        if net < MIN_NET_Q:
+            return None
+
+        product = 1.0
+        for p, _ in legs:
+            product *= float(p)
+        x, y, z = route[0], route[1], route[2 % hops]
+        return TriSignal(
+            a=x, b=y, c=z,
+            a_symbol=self.symbols.get(x, x[:6]),
+            b_symbol=self.symbols.get(y, y[:6]),
+            c_symbol=self.symbols.get(z, z[:6]),
+            dex_ab=legs[0][1],
+            dex_bc=legs[1][1],
+            dex_ca=legs[-1][1],
+            p_ab=float(legs[0][0]), p_bc=float(legs[1][0]),
+            p_ca=product / (float(legs[0][0]) * float(legs[1][0])),
+            product=product,
+            gross_profit_usd=fp.to_float(gross),
+            gas_cost_usd=fp.to_float(gas_cost_usd),
+            flash_fee_usd=fp.to_float(flash_fee_usd),
+            net_profit_usd=fp.to_float(net),
+            amount_usd=fp.to_float(fp.units_to_usd(trade.amount_in, dec, usd)),
+            ts=int(time.time()),
+            hops=hops,
+            route=list(route),
+            route_symbols=[self.symbols.get(t, t[:6]) for t in route],
+            route_dexes=[dex for _, dex in legs],
+            routers=[DEXES[dex]["router"] for _, dex in legs],
+            tokens=list(route[1:]),
+            optimal_amount_in=trade.amount_in,
+            expected_amount_out=trade.amount_out,
+            amounts_out=trade.amounts_out,
+        )
+
+    # ---------- Candidate search ----------
+    def _candidates_graph(self, min_ratio: float) -> List[Tuple[List[str], List[Tuple[float, str]]]]:
+        graph, edges = self._build_graph()
+        t0 = time.perf_counter()
+        cycles, stats = search_routes(
+            graph, MIN_CYCLE_LEN, MAX_CYCLE_LEN, min_ratio,
+            max_routes=MAX_SIGNALS, work_budget=ROUTE_WORK_BUDGET or None,
+        )
+        MET_SEARCH_LAT.observe(time.perf_counter() - t0)
+        MET_GRAPH_EDGES.set(graph.edge_count())
+        MET_RELAXATIONS.set(stats.expansions)
+        MET_ROUTE_PRUNED.set(stats.pruned)
+        if stats.exhausted:
+            MET_ROUTE_BUDGET.inc()
+        MET_TRIANGLES.set(len(cycles))
+        return [(cyc.tokens, list(zip(cyc.rates, cyc.dexes))) for cyc in cycles]
+
+    def _candidates_vectorized(self, min_ratio: float) -> List[Tuple[List[str], List[Tuple[float, str]]]]:
+        t0 = time.perf_counter()
+        rm = self._rate_matrix()
+        # spot threshold as an array mask; best spot products first
+        ii, jj, kk, prod = profitable_triangles(rm.rates, min_ratio)
+        order = np.argsort(-prod, kind="stable")[:MAX_SIGNALS]
+        MET_SEARCH_LAT.observe(time.perf_counter() - t0)
+        MET_GRAPH_EDGES.set(int(np.count_nonzero(rm.rates)))
+        n = len(rm.tokens)
+        MET_TRIANGLES.set(n * (n - 1) * (n - 2) // 3)
+
+        out: List[Tuple[List[str], List[Tuple[float, str]]]] = []
+        for t in order:
+            idx = (int(ii[t]), int(jj[t]), int(kk[t]))
+            legs = [(float(rm.rates[u, v]), rm.dexes[rm.dex_idx[u, v]])
+                    for u, v in ((idx[0], idx[1]), (idx[1], idx[2]), (idx[2], idx[0]))]
+            out.append(([rm.tokens[v] for v in idx], legs))
+        return out
+
+    @staticmethod
+    def _gas_limit(hops: int) -> int:
+        return max(0, GAS_LIMIT_TRI + GAS_PER_EXTRA_HOP * (hops - 3))
+
+    async def _economics(self, gas_price: int) -> Tuple[int, float]:
+        """(USD cost per gas unit in Q112, spot min_ratio any candidate must clear) at `gas_price` wei."""
+        matic_q = await self._matic_usd()
+        gas_unit_q = gas_price * matic_q // fp.POW10[18]
+
+        # necessary condition for any size up to the flash cap to clear gas + flash fee + min net:
+        # spot product - 1 > flash fee + (gas + min net) / cap
+        floor_q = gas_unit_q * self._gas_limit(MIN_CYCLE_LEN) + MIN_NET_Q
+        ratio_q = FLASH_FEE_Q
+        if MAX_FLASH_Q > 0:
+            ratio_q += fp.div(floor_q, MAX_FLASH_Q)
+        return gas_unit_q, fp.to_float(ratio_q)
+
+    def _size_candidates(self, candidates: Iterable[Tuple[List[str], List[Tuple[float, str]]]],
+                         gas_unit_q: int) -> List[TriSignal]:
+        signals: List[TriSignal] = []
+        prices: Dict[str, Optional[int]] = {}
+        for route, legs in candidates:
+            sig = self._evaluate(route, legs, gas_unit_q, prices)
+            if sig:
+                signals.append(sig)
         signals.sort(key=lambda s: s.net_profit_usd, reverse=True)
         return signals
 
-    # ---------- Publish ----------
-    async def publish(self, signals: List[TriSignal]):
-        if not self.redis:
+    async def scan_triangles(self, block_number: Optional[int] = None, force: bool = False) -> List[TriSignal]:
+        # one reserve read per pair per block; every edge below is served from memory
+        await self.snapshot.refresh(self._pair_addresses(), block_number, force)
+        # one gas price per scan (one scan per head), read off the loop
+        gas_price = await asyncio.to_thread(lambda: self.w3.eth.gas_price)
+        gas_unit_q, min_ratio = await self._economics(gas_price)
+
+        if VECTORIZED and MIN_CYCLE_LEN == MAX_CYCLE_LEN == 3:
+            candidates = self._candidates_vectorized(min_ratio)
+        else:
+            candidates = self._candidates_graph(min_ratio)
+        return self._size_candidates(candidates, gas_unit_q)
+
+    # ---------- Incremental (Sync-driven) ----------
+    def _build_cycle_index(self) -> None:
+        """Enumerate every cycle over the pool topology and index it by its (unordered) token pairs."""
+        topo = TokenGraph()
+        for m in self.pairs.values():
+            for (src, dst) in m.keys():
+                topo.add_edge(src, dst, 1.0, "")
+        cycles = enumerate_cycles(topo, MIN_CYCLE_LEN, MAX_CYCLE_LEN, MAX_INDEXED_CYCLES)
+        self._index_pairs = set(self._pair_addresses())
+        self._edge_cycles = {}
+        if cycles is None:
+            # too many to index: every head falls back to a full rescan
+            self._cycles = []
+            MET_INDEXED.set(0)
+            jlog("warning", event="cycle_index_disabled", limit=MAX_INDEXED_CYCLES)
             return
-        for s in signals:
-            payload = json.dumps(asdict(s), separators=(",", ":"))
+        self._cycles = cycles
+        for cid, cyc in enumerate(cycles):
+            for n in range(len(cyc)):
+                self._edge_cycles.setdefault(frozenset((cyc[n], cyc[(n + 1) % len(cyc)])), []).append(cid)
+        MET_INDEXED.set(len(cycles))
+        jlog("info", event="cycle_index_built", cycles=len(cycles), edges=len(self._edge_cycles))
+
+    def _refresh_edges(self, keys: Iterable[Tuple[str, str]]) -> None:
+        for src, dst in keys:
+            p, dex = self._best_direct_price(src, dst)
+            if p and dex:
+                self._edges[(src, dst)] = (fp.to_float(p), dex)
+            else:
+                self._edges.pop((src, dst), None)
+
+    async def scan_incremental(self, from_block: int, to_block: int) -> List[TriSignal]:
+        """Apply Sync logs for [from_block, to_block] and re-evaluate only cycles touching a changed pool."""
+        logs = await self.feed.fetch(self._pair_addresses(), from_block, to_block)
+        changed = {lg.pair for lg in logs if self.snapshot.apply_sync(lg.pair, lg.reserve0, lg.reserve1)}
+        self.snapshot.advance(to_block)
+        MET_INC_CHANGED.set(len(changed))
+
+        token_pairs: Set[FrozenSet[str]] = set()
+        for pair_addr in changed:
+            toks = self.snapshot.tokens(pair_addr)
+            if toks:
+                token_pairs.add(frozenset(toks))
+        self._refresh_edges([(a, b) for tp in token_pairs for a in tp for b in tp if a != b])
+        self._changed_pairs = token_pairs
+
+        affected: Set[int] = set()
+        for tp in token_pairs:
+            affected.update(self._edge_cycles.get(tp, ()))
+        total = len(self._cycles)
+        MET_INC_EVAL.inc(len(affected))
+        MET_INC_SKIPPED.inc(total - len(affected))
+        MET_INC_SAVED.set(1.0 - len(affected) / total if total else 0.0)
+        if not affected:
+            return []
+
+        gas_price = await asyncio.to_thread(lambda: self.w3.eth.gas_price)
+        gas_unit_q, min_ratio = await self._economics(gas_price)
+        ranked: List[Tuple[float, List[str], List[Tuple[float, str]]]] = []
+        for cid in affected:
+            route = list(self._cycles[cid])
+            legs = [self._edges.get((route[n], route[(n + 1) % len(route)])) for n in range(len(route))]
+            if any(e is None for e in legs):
+                continue
+            product = 1.0
+            for rate, _ in legs:
+                product *= rate
+            if product - 1.0 > min_ratio:
+                ranked.append((product, route, legs))
+        ranked.sort(key=lambda c: c[0], reverse=True)
+        MET_TRIANGLES.set(len(affected))
+        return self._size_candidates(((route, legs) for _, route, legs in ranked[:MAX_SIGNALS]), gas_unit_q)
+
+    async def event_loop(self):
+        synced = -1
+        since_full = 0
+        async for head in self.feed.heads():
+            t0 = time.perf_counter()
             try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
+                if await self.paused():
+                    continue
+                if self._index_pairs != set(self._pair_addresses()):
+                    # discovery changed the pool set: rebuild the index and resync from scratch
+                    self._build_cycle_index()
+                    synced = -1
+                if synced < 0 or not self._cycles or head - synced > MAX_LOG_RANGE or since_full >= FULL_RESCAN_BLOCKS:
+                    signals = await self.scan_triangles(block_number=head, force=True)
+                    self._edges.clear()
+                    self._refresh_edges([k for m in self.pairs.values() for k in m.keys()])
+                    MET_FULL_RESCANS.inc()
+                    since_full = 0
+                    stale = None
+                else:
+                    signals = await self.scan_incremental(synced + 1, head)
+                    since_full += 1
+                    stale = self._touches_changed
+                synced = head
+                await self.publish(signals, stale)
+                if signals:
+                    jlog("info", event="signals", block=head, count=len(signals), best=asdict(signals[0]))
             except Exception as e:
                 MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+                jlog("error", event="event_loop_error", block=head, err=str(e))
+                synced = -1
+            MET_SCAN_LAT.observe(time.perf_counter() - t0)
+
+    # ---------- Publish ----------
+    def _touches_changed(self, key: Tuple) -> bool:
+        """True if a live cycle uses a pool the last incremental scan re-evaluated."""
+        tokens = key[0]
+        return any(frozenset((tokens[n], tokens[(n + 1) % len(tokens)])) in self._changed_pairs
+                   for n in range(len(tokens)))
+
+    async def publish(self, signals: List[TriSignal], stale=None):
+        """`stale(key)` limits expiry to the cycles this batch re-evaluated (incremental scans); None = all."""
+        if not self.redis:
+            return
+        await self.publisher.publish(self.redis, [asdict(s) for s in signals], stale)
         if signals:
             MET_OPPS.inc(len(signals))
             MET_BEST_NET.set(signals[0].net_profit_usd)
@@ -367,10 +751,16 @@ class TriangularArbScanner:
         await self.init()
         jlog("info", event="triangular_scanner_started",
              pairs=sum(len(v) for v in self.pairs.values()),
-             min_net=float(MIN_NET_PROFIT_USD), trade_usd=float(TRADE_SIZE_USD))
+             min_net=float(MIN_NET_PROFIT_USD), max_flash_usd=float(MAX_FLASH_USD))
 
         async def periodic_discovery():
             while True:
+                try:
+                    # PairCreated logs since the checkpoint; the initial backfill is `python bots/pair_index.py`
+                    await self._extend_pair_index()
+                except Exception as e:
+                    MET_ERRORS.inc()
+                    jlog("error", event="pair_index_error", err=str(e))
                 try:
                     await self._discover_pairs()
                     await self._prime_token_metadata()
@@ -380,6 +770,10 @@ class TriangularArbScanner:
                 await asyncio.sleep(DISCOVERY_INTERVAL_SEC)
         asyncio.create_task(periodic_discovery())
 
+        if EVENT_DRIVEN:
+            await self.event_loop()
+            return
+
         while True:
             t0 = time.perf_counter()
             try:
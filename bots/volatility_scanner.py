@@ -2,9 +2,25 @@
 """
 ATOM Volatility Scanner (Polygon mainnet)
 - Tracks top volatile tokens from DEX subgraphs
-- Builds minute-level price/volume history
-- Detects pumps/dumps/oscillations using returns, stddev and volume spikes
+- Builds minute-level price/volume history, persisted to the on-disk price
+  store (price_store.py) and reloaded on start so detection resumes at once
+- Pair discovery and reserve reads are batched through Multicall3
+- 24h token volumes come from aliased subgraph batches (GRAPHQL_BATCH_SIZE
+  tokens per POST, QuickSwap first, SushiSwap for the tokens it lacks)
+- Feed passes run on a fixed VOL_FEED_INTERVAL_SEC cadence with a deadline,
+  one bar timestamp per pass, and a token bucket per endpoint (RPC, each
+  subgraph); pass duration, coverage and overruns are exported
+- Token/USDC pairs warm-start from the on-disk pair index when it is backfilled
+- Price/volume history lives in preallocated NumPy rings (series_ring.py);
+  realized 5m/15m returns are computed for all tokens at once
+- Streaming EWMA estimators per token (ewma_stats.py), updated once per bar
+  and seeded from the price store: return variance, volume baseline/spike and
+  short/long momentum; exported per token as atom_vol_token_stat
+- Detects pumps/dumps/oscillations from those estimators;
+  only tokens whose history changed since the last pass are evaluated, and
+  the feed updater wakes the detect loop as soon as a pass lands
 - Publishes signals to Redis Stream 'atom:opps:volatility'
+  (change-only per token, DEX and pattern; repeats suppressed within PUBLISH_TTL_SEC)
 - Prometheus metrics on METRICS_PORT
 - Strict: no secrets in code, no tx signing, no websockets required
 - Hard fail if not on chain_id=137 (Polygon)
@@ -15,16 +31,25 @@ import asyncio
 import json
 import time
 import logging
-from collections import deque
 from dataclasses import dataclass, asdict
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import aiohttp
+import numpy as np
 import redis.asyncio as redis
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from web3 import Web3, HTTPProvider
 
+import multicall as mc
+from graphql_batch import GraphQLBatcher
+import pair_index
+import price_store
+from rate_limit import TokenBucket
+from ewma_stats import EwmaStats
+from series_ring import SeriesRing, window_change
+from signal_publisher import ChangeOnlyPublisher
+
 # ---------- Env & Constants ----------
 
 def _env(name: str, default: Optional[str] = None, required: bool = False) -> str:
@@ -45,7 +70,13 @@ SU_SUBGRAPH_URL = _env("SU_SUBGRAPH_URL", "https://api.thegraph.com/subgraphs/na
 SCAN_INTERVAL_SEC = float(_env("VOL_SCAN_INTERVAL_SEC", "5.0"))
 DISCOVERY_INTERVAL_SEC = float(_env("VOL_DISCOVERY_INTERVAL_SEC", "600"))
 PRICE_WINDOW = int(_env("VOL_PRICE_WINDOW", "120"))  # minutes kept in memory
+if PRICE_WINDOW < 16:
+    raise RuntimeError("VOL_PRICE_WINDOW must be >= 16 (the 15m return needs 16 bars)")
 TOP_PAIRS = int(_env("VOL_TOP_PAIRS", "100"))        # pull top pairs by volume from subgraphs
+FEED_INTERVAL_SEC = float(_env("VOL_FEED_INTERVAL_SEC", "60"))          # one price/volume bar per pass
+FEED_PASS_TIMEOUT_SEC = float(_env("VOL_FEED_PASS_TIMEOUT_SEC", str(0.8 * FEED_INTERVAL_SEC)))
+RPC_RATE_PER_SEC = float(_env("VOL_RPC_RATE_PER_SEC", "10"))             # <= 0: unlimited
+SUBGRAPH_RATE_PER_SEC = float(_env("VOL_SUBGRAPH_RATE_PER_SEC", "5"))    # per subgraph URL
 
 # Detection thresholds
 VOL_RET_STD_THRESHOLD = float(_env("VOL_RET_STD_THRESHOLD", "0.10"))  # stddev of 1m returns threshold
@@ -54,6 +85,14 @@ DUMP_5M_CHANGE = float(_env("VOL_DUMP_5M_CHANGE", "-0.06"))           # -6% in 5
 VOL_SPIKE_MULTIPLE = float(_env("VOL_VOLUME_SPIKE_MULTIPLE", "3.0"))   # recent vs baseline
 CONF_THRESHOLD = float(_env("VOL_CONF_THRESHOLD", "0.6"))
 
+# Streaming estimators (spans in feed bars)
+EWMA_VAR_SPAN = float(_env("VOL_EWMA_VAR_SPAN", "30"))        # return variance
+EWMA_VOLUME_SPAN = float(_env("VOL_EWMA_VOLUME_SPAN", "15"))  # volume baseline
+MOM_SHORT_SPAN = float(_env("VOL_MOM_SHORT_SPAN", "5"))       # compared against the 5m pump/dump thresholds
+MOM_LONG_SPAN = float(_env("VOL_MOM_LONG_SPAN", "15"))
+EWMA_MIN_BARS = int(_env("VOL_EWMA_MIN_BARS", "5"))           # returns seen before a token can signal
+EXPORT_TOKEN_STATS = _env("VOL_EXPORT_TOKEN_STATS", "true").lower() in ("1", "true", "yes")
+
 # Economic params
 TRADE_SIZE_USD = Decimal(_env("VOL_TRADE_SIZE_USD", "25000"))
 AAVE_FEE_BPS = Decimal(_env("AAVE_FLASH_FEE_BPS", "9"))  # 0.09%
@@ -66,6 +105,7 @@ REDIS_MAXLEN = int(_env("VOL_REDIS_MAXLEN", "1000"))
 # Kill/pause keys
 KILL_SWITCH_KEY = _env("KILL_SWITCH_KEY", "atom:kill_switch")
 PAUSE_KEY = _env("VOL_PAUSE_KEY", "atom:vol:paused")
+USE_PAIR_INDEX = _env("VOL_USE_PAIR_INDEX", "true").lower() in ("1", "true", "yes")
 
 # Chainlink MATIC/USD (Polygon mainnet)
 CHAINLINK_MATIC_USD = Web3.to_checksum_address(_env(
@@ -78,8 +118,6 @@ USDC = Web3.to_checksum_address("0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174")
 QS_FACTORY = Web3.to_checksum_address("0x5757371414417b8C6CAad45bAeF941aBc7d3Ab32")
 SU_FACTORY = Web3.to_checksum_address("0xc35DADB65012eC5796536bD9864eD8773aBc74C4")
 
-PAIR_ABI = json.loads('[{"constant":true,"inputs":[],"name":"getReserves","outputs":[{"name":"reserve0","type":"uint112"},{"name":"reserve1","type":"uint112"},{"name":"blockTimestampLast","type":"uint32"}],"type":"function"},{"constant":true,"inputs":[],"name":"token0","outputs":[{"name":"","type":"address"}],"type":"function"},{"constant":true,"inputs":[],"name":"token1","outputs":[{"name":"","type":"address"}],"type":"function"}]')
-FACTORY_ABI = json.loads('[{"constant":true,"inputs":[{"name":"tokenA","type":"address"},{"name":"tokenB","type":"address"}],"name":"getPair","outputs":[{"name":"pair","type":"address"}],"type":"function"}]')
 CL_AGG_ABI = json.loads('[{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]')
 
 # ---------- Logging ----------
@@ -100,6 +138,18 @@ MET_ERRORS   = Counter("atom_vol_errors_total", "Errors")
 MET_SIGNALS  = Counter("atom_vol_signals_total", "Signals published")
 MET_BEST_CONF= Gauge("atom_vol_best_confidence", "Best confidence last scan")
 MET_BEST_PNL = Gauge("atom_vol_best_net_profit_usd", "Best net profit estimate last scan")
+MET_DETECT_TOKENS = Gauge("atom_vol_detect_tokens", "Tokens evaluated by the last detect pass (dirty set size)")
+MET_TOKEN_STAT = Gauge("atom_vol_token_stat", "Per-token streaming estimator value", ["token", "stat"])
+MET_FEED_LAT = Histogram("atom_vol_feed_pass_seconds", "Price/volume feed pass duration",
+                         buckets=(0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90))
+MET_FEED_COV = Gauge("atom_vol_feed_coverage_ratio", "Share of tracked tokens updated in the last feed pass", ["field"])
+MET_FEED_OVERRUN = Counter("atom_vol_feed_overruns_total", "Feed passes that missed their deadline or slot")
+
+TOKEN_STATS = ("std", "mom_short", "mom_long", "volume_base", "vol_spike")
+
+def _xadd_error(e: Exception):
+    MET_ERRORS.inc()
+    jlog("error", event="redis_xadd_error", err=str(e))
 
 # ---------- Models ----------
 
@@ -111,6 +161,8 @@ class VolSignal:
     price_usd: float
     ret_5m: float
     ret_15m: float
+    mom_short: float
+    mom_long: float
     vol_std: float
     vol_spike: float
     pattern: str  # pump | dump | oscillating | neutral
@@ -127,18 +179,30 @@ class VolatilityScanner:
     def __init__(self):
         self.w3 = Web3(HTTPProvider(RPC_URL, request_kwargs={"timeout": 10}))
         self.redis: Optional[redis.Redis] = None
+        self.publisher = ChangeOnlyPublisher(
+            REDIS_STREAM, REDIS_MAXLEN, key_fields=("token", "source_dex", "pattern"),
+            value_field="net_profit_usd", on_error=_xadd_error,
+        )
         self.session: Optional[aiohttp.ClientSession] = None
-        self.factories = {
-            "quickswap": self.w3.eth.contract(QS_FACTORY, abi=FACTORY_ABI),
-            "sushiswap": self.w3.eth.contract(SU_FACTORY, abi=FACTORY_ABI),
-        }
+        self.graphql: Optional[GraphQLBatcher] = None
+        self.multicall = mc.Multicall(self.w3, limiter=TokenBucket("vol_rpc", RPC_RATE_PER_SEC))
+        self.factories = {"quickswap": QS_FACTORY, "sushiswap": SU_FACTORY}
+        self.pair_index: Optional[pair_index.PairIndex] = pair_index.PairIndex() if USE_PAIR_INDEX else None
         self.matic_usd = self.w3.eth.contract(CHAINLINK_MATIC_USD, abi=CL_AGG_ABI)
 
         # token_addr -> symbol, pair cache per dex
         self.tracked_tokens: Dict[str, Dict] = {}
         self.pairs: Dict[str, Dict[str, str]] = {"quickswap": {}, "sushiswap": {}}
-        self.price_history: Dict[str, deque] = {}   # token -> deque[(ts, price_usd)]
-        self.volume_history: Dict[str, deque] = {}  # token -> deque[(ts, volume_24h_usd)]
+        self.pair_tokens: Dict[str, Tuple[str, str]] = {}  # pair -> (token0, token1), immutable
+        self.prices = SeriesRing(PRICE_WINDOW, rows=max(16, 2 * TOP_PAIRS))   # token row -> (ts, price_usd)
+        self.volumes = SeriesRing(PRICE_WINDOW, rows=max(16, 2 * TOP_PAIRS))  # token row -> (ts, volume_24h_usd)
+        self.ewma = EwmaStats(EWMA_VAR_SPAN, EWMA_VOLUME_SPAN, MOM_SHORT_SPAN, MOM_LONG_SPAN, rows=max(16, 2 * TOP_PAIRS))
+        self._exported: Set[str] = set()   # tokens with atom_vol_token_stat series
+        # tokens with new bars since their last evaluation; the event wakes the detect loop
+        self.dirty: Set[str] = set()
+        self.data_ready = asyncio.Event()
+        self.store: Optional[price_store.PriceStore] = (
+            price_store.PriceStore("volatility", min_bars=PRICE_WINDOW) if price_store.ENABLED else None)
 
         self._ensure_chain()
 
@@ -150,6 +214,10 @@ class VolatilityScanner:
     async def init(self):
         self.redis = await redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
         self.session = aiohttp.ClientSession()
+        self.graphql = GraphQLBatcher(self.session, rate_limits={
+            QS_SUBGRAPH_URL: TokenBucket("vol_subgraph_qs", SUBGRAPH_RATE_PER_SEC),
+            SU_SUBGRAPH_URL: TokenBucket("vol_subgraph_su", SUBGRAPH_RATE_PER_SEC),
+        })
         await self.discover_tokens()
         await self.build_pairs_cache()
         jlog("info", event="init", tokens=len(self.tracked_tokens), rpc=RPC_URL, redis=REDIS_URL)
@@ -202,14 +270,54 @@ class VolatilityScanner:
                     continue
                 addr = Web3.to_checksum_address(tok["id"])
                 seen.setdefault(addr, {"symbol": sym or "UNK", "name": tok.get("name") or "UNK"})
+        for token in self._exported - seen.keys():
+            for stat in TOKEN_STATS:
+                MET_TOKEN_STAT.remove(token, stat)
+        self._exported &= seen.keys()
+        # tokens no longer tracked give their ring/estimator rows back (also rows a late feed pass re-created)
+        self.tracked_tokens = {t: meta for t, meta in self.tracked_tokens.items() if t in seen}
+        for ring in (self.prices, self.volumes, self.ewma):
+            for token in [t for t in ring.rows if t not in seen]:
+                ring.release(token)
+        self.dirty &= seen.keys()
+        # first sight of a token warm-starts its rings and estimators from the price store; only the read runs
+        # in a thread, the rings are filled on the loop before the token is tracked (live bars land after history)
+        new = [addr for addr in seen if addr not in self.prices.rows]
+        if new and self.store:
+            history = await asyncio.to_thread(self._load_history, new)
+            self._warm_start(history)
         self.tracked_tokens = seen
-        # init deques
-        for addr in self.tracked_tokens:
-            self.price_history.setdefault(addr, deque(maxlen=PRICE_WINDOW))
-            self.volume_history.setdefault(addr, deque(maxlen=PRICE_WINDOW))
+        if new and self.store:
+            self._mark_dirty(new)
 
         await self._persist_discovery()
 
+    def _mark_dirty(self, tokens: Iterable[str]):
+        self.dirty.update(tokens)
+        if self.dirty:
+            self.data_ready.set()
+
+    def _load_history(self, tokens: List[str]) -> Dict[str, np.ndarray]:
+        """Stored bars of the last PRICE_WINDOW minutes per token (blocking file reads; no scanner state touched)."""
+        assert self.store is not None
+        since = int(time.time()) - PRICE_WINDOW * 60
+        return {token: self.store.load(token, since=since) for token in tokens}
+
+    def _warm_start(self, history: Dict[str, np.ndarray]):
+        """Fill the history rings with stored bars and seed the estimators from them (on the loop)."""
+        loaded = 0
+        for token, bars in history.items():
+            self.prices.row(token)
+            self.volumes.row(token)
+            for ts, price, vol in zip(bars["ts"].tolist(), bars["price"].tolist(), bars["volume"].tolist()):
+                if price > 0:
+                    self.prices.push(token, ts, price)
+                if vol == vol:  # NaN = no volume that minute
+                    self.volumes.push(token, ts, vol)
+            self.ewma.seed(token, bars["price"].tolist(), bars["volume"].tolist())
+            loaded += bars.size
+        jlog("info", event="price_store_warm_start", tokens=len(history), bars=loaded)
+
     async def _persist_discovery(self):
         try:
             if self.redis:
@@ -218,24 +326,41 @@ class VolatilityScanner:
             MET_ERRORS.inc()
             jlog("error", event="redis_set_error", key="atom:vol:tokens", err=str(e))
 
+    async def _pairs_from_index(self) -> bool:
+        """token/USDC pairs and token order from the pair index (no RPC). False unless both factories are backfilled."""
+        if not self.pair_index:
+            return False
+        tracked = set(self.tracked_tokens.keys())
+        found = await asyncio.to_thread(self.pair_index.warm_pairs_among, dict(self.factories), tracked | {USDC})
+        if found is None:
+            return False
+        for dex, rows in found.items():
+            for pair_addr, t0, t1 in rows:
+                token = t1 if t0 == USDC else t0 if t1 == USDC else None
+                if token in tracked:
+                    self.pairs[dex][token] = pair_addr
+                    self.pair_tokens[pair_addr] = (t0, t1)
+        return True
+
     async def build_pairs_cache(self):
-        """Cache token/USDC pair addresses for both dexes."""
-        async def get_pair(dex: str, token: str) -> Optional[str]:
-            try:
-                fa = self.factories[dex]
-                pair_addr = await asyncio.to_thread(fa.functions.getPair(token, USDC).call)
-                if pair_addr and int(pair_addr, 16) != 0:
-                    self.pairs[dex][token] = Web3.to_checksum_address(pair_addr)
-                    return self.pairs[dex][token]
-            except Exception as e:
+        """Cache token/USDC pair addresses (and their token order) for both dexes."""
+        if await self._pairs_from_index():
+            return
+        keys = [(dex, token) for token in self.tracked_tokens.keys() for dex in ("quickswap", "sushiswap")]
+        found = await self.multicall.acall([mc.get_pair(self.factories[dex], token, USDC) for dex, token in keys])
+        for (dex, token), pair_addr in zip(keys, found):
+            if pair_addr is None:
                 MET_ERRORS.inc()
-                jlog("error", event="getPair_error", dex=dex, token=token, err=str(e))
-            return None
+                jlog("error", event="getPair_error", dex=dex, token=token)
+            elif int(pair_addr, 16) != 0:
+                self.pairs[dex][token] = pair_addr
 
-        tasks = []
-        for token in self.tracked_tokens.keys():
-            tasks += [get_pair("quickswap", token), get_pair("sushiswap", token)]
-        await asyncio.gather(*tasks)
+        unknown = sorted({p for m in self.pairs.values() for p in m.values()} - self.pair_tokens.keys())
+        order = await self.multicall.acall([c for p in unknown for c in (mc.token0(p), mc.token1(p))])
+        for idx, pair_addr in enumerate(unknown):
+            t0, t1 = order[2 * idx], order[2 * idx + 1]
+            if t0 is not None and t1 is not None:
+                self.pair_tokens[pair_addr] = (t0, t1)
 
         try:
             if self.redis:
@@ -246,46 +371,47 @@ class VolatilityScanner:
 
     # ---------- Price/Volume ----------
 
-    def _price_from_reserves(self, pair_addr: str, token: str) -> Optional[Decimal]:
-        try:
-            pair = self.w3.eth.contract(pair_addr, abi=PAIR_ABI)
-            t0 = Web3.to_checksum_address(pair.functions.token0().call())
-            t1 = Web3.to_checksum_address(pair.functions.token1().call())
-            r0, r1, _ = pair.functions.getReserves().call()
-            # USDC has 6 decimals
-            if t0 == token and t1 == USDC and r0 > 0:
-                return Decimal(r1) / Decimal(10**6) / (Decimal(r0) / Decimal(10**18))
-            if t0 == USDC and t1 == token and r1 > 0:
-                return (Decimal(r0) / Decimal(10**6)) / (Decimal(r1) / Decimal(10**18))
-            return None
-        except Exception as e:
-            MET_ERRORS.inc()
-            jlog("error", event="price_reserve_error", pair=pair_addr, token=token, err=str(e))
+    def _price_from_reserves(self, pair_addr: str, token: str, reserves: Tuple[int, int, int]) -> Optional[Decimal]:
+        order = self.pair_tokens.get(pair_addr)
+        if order is None:
             return None
+        t0, t1 = order
+        r0, r1, _ = reserves
+        # USDC has 6 decimals
+        if t0 == token and t1 == USDC and r0 > 0:
+            return Decimal(r1) / Decimal(10**6) / (Decimal(r0) / Decimal(10**18))
+        if t0 == USDC and t1 == token and r1 > 0:
+            return (Decimal(r0) / Decimal(10**6)) / (Decimal(r1) / Decimal(10**18))
+        return None
 
-    async def _price_token_usd(self, token: str) -> Optional[Decimal]:
-        """Try QS first then SU for token/USDc spot via reserves."""
-        for dex in ("quickswap", "sushiswap"):
-            pair = self.pairs[dex].get(token)
-            if not pair:
+    async def _price_tokens_usd(self, tokens: List[str]) -> Dict[str, Decimal]:
+        """token/USDC spot via reserves for every token in one batch; QS preferred, SU as fallback."""
+        legs = [(dex, token, self.pairs[dex][token]) for token in tokens
+                for dex in ("quickswap", "sushiswap") if token in self.pairs[dex]]
+        reserves = await self.multicall.acall([mc.get_reserves(pair) for _, _, pair in legs])
+        out: Dict[str, Decimal] = {}
+        for (dex, token, pair), rs in zip(legs, reserves):
+            if token in out:
                 continue
-            p = await asyncio.to_thread(self._price_from_reserves, pair, token)
+            if rs is None:
+                MET_ERRORS.inc()
+                jlog("error", event="price_reserve_error", pair=pair, token=token)
+                continue
+            p = self._price_from_reserves(pair, token, rs)
             if p and p > 0:
-                return p
-        return None
+                out[token] = p
+        return out
 
-    async def _token_volume_24h(self, url: str, token: str) -> Optional[Decimal]:
-        q = f'{{ token(id: "{token.lower()}") {{ volumeUSD }} }}'
-        try:
-            assert self.session is not None
-            async with self.session.post(url, json={"query": q}, timeout=20) as r:
-                data = await r.json()
-                v = data.get("data", {}).get("token", {}).get("volumeUSD")
-                return Decimal(v) if v is not None else None
-        except Exception as e:
-            MET_ERRORS.inc()
-            jlog("error", event="subgraph_token_error", url=url, token=token, err=str(e))
-            return None
+    async def _token_volumes_24h(self, url: str, tokens: List[str]) -> Dict[str, Decimal]:
+        """volumeUSD for many tokens, one aliased query per GRAPHQL_BATCH_SIZE tokens; missing tokens are omitted."""
+        assert self.graphql is not None
+        rows = await self.graphql.fetch_many(url, tokens, lambda t: f'token(id: "{t.lower()}") {{ volumeUSD }}')
+        out: Dict[str, Decimal] = {}
+        for token, row in rows.items():
+            v = (row or {}).get("volumeUSD")
+            if v is not None:
+                out[token] = Decimal(v)
+        return out
 
     async def _matic_usd_price(self) -> Decimal:
         try:
@@ -296,112 +422,120 @@ class VolatilityScanner:
             jlog("error", event="chainlink_error", err=str(e))
             return Decimal("0")
 
+    async def _feed_pass(self, bar_ts: int) -> Tuple[int, int, int]:
+        """One bar for every tracked token: reserves multicall and QS volumes concurrently, SU for the rest."""
+        tokens = list(self.tracked_tokens.keys())
+        prices, vols = await asyncio.gather(
+            self._price_tokens_usd(tokens), self._token_volumes_24h(QS_SUBGRAPH_URL, tokens))
+        # SushiSwap only for what QuickSwap does not index
+        missing = [t for t in tokens if t not in vols]
+        if missing:
+            vols.update(await self._token_volumes_24h(SU_SUBGRAPH_URL, missing))
+        priced = [t for t in tokens if prices.get(t)]
+        self.prices.push_many(priced, bar_ts, (float(prices[t]) for t in priced))
+        with_vol = [t for t in tokens if vols.get(t) is not None]
+        self.volumes.push_many(with_vol, bar_ts, (float(vols[t]) for t in with_vol))
+        self.ewma.update(priced, (float(prices[t]) for t in priced),
+                         (float(vols[t]) if vols.get(t) is not None else float("nan") for t in priced))
+        unpriced = [t for t in with_vol if not prices.get(t)]
+        self.ewma.update(unpriced, (float("nan") for _ in unpriced), (float(vols[t]) for t in unpriced))
+        self._mark_dirty(priced)
+        self._mark_dirty(with_vol)
+        if self.store:
+            for token in priced:
+                vol = vols.get(token)
+                self.store.append(token, bar_ts, float(prices[token]), float(vol) if vol is not None else float("nan"))
+        if self.store:
+            await asyncio.to_thread(self.store.flush)
+        return len(tokens), sum(1 for t in tokens if t in prices), sum(1 for t in tokens if t in vols)
+
     async def update_feeds(self):
-        """Minute-level price/volume updates."""
+        """Minute-level price/volume bars on a fixed cadence: passes start on the slot, not after the last one."""
+        next_at = time.monotonic()
         while True:
+            t0 = time.perf_counter()
+            bar_ts = int(time.time())
             try:
-                for token in self.tracked_tokens.keys():
-                    price = await self._price_token_usd(token)
-                    if price:
-                        self.price_history[token].append((int(time.time()), float(price)))
-                    # alternate subgraph sources to reduce load
-                    vol = await self._token_volume_24h(QS_SUBGRAPH_URL, token)
-                    if vol is None:
-                        vol = await self._token_volume_24h(SU_SUBGRAPH_URL, token)
-                    if vol is not None:
-                        self.volume_history[token].append((int(time.time()), float(vol)))
-                await asyncio.sleep(60)
+                n, priced, with_vol = await asyncio.wait_for(self._feed_pass(bar_ts), timeout=FEED_PASS_TIMEOUT_SEC)
+                MET_FEED_COV.labels("price").set(priced / n if n else 0.0)
+                MET_FEED_COV.labels("volume").set(with_vol / n if n else 0.0)
+            except asyncio.TimeoutError:
+                MET_FEED_OVERRUN.inc()
+                MET_FEED_COV.labels("price").set(0.0)
+                MET_FEED_COV.labels("volume").set(0.0)
+                jlog("error", event="feed_pass_timeout", timeout=FEED_PASS_TIMEOUT_SEC)
             except Exception as e:
                 MET_ERRORS.inc()
                 jlog("error", event="update_feeds_error", err=str(e))
-                await asyncio.sleep(60)
+            MET_FEED_LAT.observe(time.perf_counter() - t0)
+            next_at += FEED_INTERVAL_SEC
+            now = time.monotonic()
+            if next_at < now:
+                # slot(s) missed: realign instead of firing back-to-back catch-up passes
+                MET_FEED_OVERRUN.inc()
+                next_at = now
+            await asyncio.sleep(next_at - now)
 
     # ---------- Detection ----------
 
-    @staticmethod
-    def _returns(series: List[float]) -> List[float]:
-        out = []
-        for i in range(1, len(series)):
-            a, b = series[i-1], series[i]
-            if a > 0:
-                out.append((b - a) / a)
-        return out
-
-    def _vol_std(self, prices: List[float]) -> float:
-        rets = self._returns(prices[-30:])  # last ~30 minutes
-        if not rets:
-            return 0.0
-        # simple stddev
-        mean = sum(rets) / len(rets)
-        var = sum((r - mean) ** 2 for r in rets) / len(rets)
-        return var ** 0.5
-
-    def _change(self, prices: List[float], wnd: int) -> float:
-        if len(prices) < wnd + 1:
-            return 0.0
-        a = prices[-wnd-1]
-        b = prices[-1]
-        return (b - a) / a if a > 0 else 0.0
-
-    def _vol_spike(self, vols: List[float]) -> float:
-        if len(vols) < 20:
-            return 1.0
-        recent = sum(vols[-5:]) / 5.0
-        base = sum(vols[-20:-5]) / 15.0 if sum(vols[-20:-5]) > 0 else 0.0
-        if base <= 0.0:
-            return 1.0
-        return recent / base
-
-    async def detect(self) -> List[VolSignal]:
+    def _features(self, tokens: List[str]) -> Dict[str, np.ndarray]:
+        """Per-token detection inputs as vectors aligned with `tokens`: estimator state plus realized 5m/15m returns."""
+        f = self.ewma.stats(self.ewma.rows_of(tokens))
+        P = self.prices.tail(16, self.prices.rows_of(tokens))
+        f["ret5"] = window_change(P, 5)
+        f["ret15"] = window_change(P, 15)
+        return f
+
+    def _export_stats(self, tokens: List[str], f: Dict[str, np.ndarray]):
+        for i, token in enumerate(tokens):
+            for stat in TOKEN_STATS:
+                MET_TOKEN_STAT.labels(token, stat).set(float(f[stat][i]))
+        self._exported.update(tokens)
+
+    async def detect(self, tokens: Optional[List[str]] = None) -> List[VolSignal]:
+        """Evaluate `tokens` (default: every tracked token)."""
         signals: List[VolSignal] = []
+        tokens = list(self.tracked_tokens.keys()) if tokens is None else tokens
+        MET_DETECT_TOKENS.set(len(tokens))
+        if not tokens:
+            return signals
         matic_usd = await self._matic_usd_price()
-        gas_price = self.w3.eth.gas_price
+        gas_price = await asyncio.to_thread(lambda: self.w3.eth.gas_price)
         # assume 450k budget for a quick two-hop execution
         gas_cost_usd = (Decimal(gas_price) * Decimal(450000) / Decimal(1e18)) * matic_usd
         flash_fee_usd = TRADE_SIZE_USD * (AAVE_FEE_BPS / Decimal(10000))
-
-        for token, meta in self.tracked_tokens.items():
-            ph = [p for _, p in self.price_history.get(token, [])]
-            vh = [v for _, v in self.volume_history.get(token, [])]
-            if len(ph) < 20:
-                continue
-
-            ret5 = self._change(ph, 5)
-            ret15 = self._change(ph, 15)
-            vstd = self._vol_std(ph)
-            vspike = self._vol_spike(vh)
-
-            pattern = "neutral"
-            if ret5 >= PUMP_5M_CHANGE and vspike >= VOL_SPIKE_MULTIPLE:
-                pattern = "pump"
-            elif ret5 <= DUMP_5M_CHANGE and vspike >= 2.0:
-                pattern = "dump"
-            elif abs(ret5) >= 0.04 and vstd >= VOL_RET_STD_THRESHOLD:
-                pattern = "oscillating"
-
-            if pattern == "neutral" and vstd < VOL_RET_STD_THRESHOLD:
-                continue
-
-            conf = min(0.95, max(0.0, (abs(ret5) * 4) + (vstd * 2) + (max(0.0, vspike - 1) * 0.1)))
-            if conf < CONF_THRESHOLD:
-                continue
-
-            price = Decimal(str(ph[-1]))
+        f = self._features(tokens)
+        if EXPORT_TOKEN_STATS:
+            self._export_stats(tokens, f)
+        mom, vstd, vspike = f["mom_short"], f["std"], f["vol_spike"]
+
+        pump = (mom >= PUMP_5M_CHANGE) & (vspike >= VOL_SPIKE_MULTIPLE)
+        dump = ~pump & (mom <= DUMP_5M_CHANGE) & (vspike >= 2.0)
+        osc = ~pump & ~dump & (np.abs(mom) >= 0.04) & (vstd >= VOL_RET_STD_THRESHOLD)
+        pattern = np.select([pump, dump, osc], ["pump", "dump", "oscillating"], "neutral")
+        conf = np.minimum(0.95, np.maximum(0.0, (np.abs(mom) * 4) + (vstd * 2) + (np.maximum(0.0, vspike - 1) * 0.1)))
+        keep = (f["bars"] >= EWMA_MIN_BARS) & ~((pattern == "neutral") & (vstd < VOL_RET_STD_THRESHOLD)) & (conf >= CONF_THRESHOLD)
+
+        for i in np.nonzero(keep)[0]:
+            token = tokens[i]
+            m = float(mom[i])
             # crude expected pnl from a 1-leg move size
-            gross = TRADE_SIZE_USD * Decimal(abs(ret5))
+            gross = TRADE_SIZE_USD * Decimal(abs(m))
             net = gross - gas_cost_usd - flash_fee_usd
 
             sig = VolSignal(
                 token=token,
-                symbol=meta["symbol"],
+                symbol=self.tracked_tokens[token]["symbol"],
                 source_dex="quickswap" if token in self.pairs["quickswap"] else "sushiswap" if token in self.pairs["sushiswap"] else "unknown",
-                price_usd=float(price),
-                ret_5m=float(ret5),
-                ret_15m=float(ret15),
-                vol_std=float(vstd),
-                vol_spike=float(vspike),
-                pattern=pattern,
-                confidence=float(conf),
+                price_usd=float(f["price"][i]),
+                ret_5m=float(f["ret5"][i]),
+                ret_15m=float(f["ret15"][i]),
+                mom_short=m,
+                mom_long=float(f["mom_long"][i]),
+                vol_std=float(vstd[i]),
+                vol_spike=float(vspike[i]),
+                pattern=str(pattern[i]),
+                confidence=float(conf[i]),
                 gas_cost_usd=float(gas_cost_usd),
                 flash_fee_usd=float(flash_fee_usd),
                 net_profit_usd=float(net),
@@ -414,16 +548,12 @@ class VolatilityScanner:
         signals.sort(key=lambda s: s.confidence * max(0.0, s.net_profit_usd), reverse=True)
         return signals
 
-    async def publish(self, signals: List[VolSignal]):
+    async def publish(self, signals: List[VolSignal], evaluated: Optional[Set[str]] = None):
+        """`evaluated`: tokens this batch re-checked; live signals of other tokens are left alone."""
         if not self.redis:
             return
-        for s in signals:
-            payload = json.dumps(asdict(s), separators=(",", ":"))
-            try:
-                await self.redis.xadd(REDIS_STREAM, {"data": payload}, maxlen=REDIS_MAXLEN, approximate=True)
-            except Exception as e:
-                MET_ERRORS.inc()
-                jlog("error", event="redis_xadd_error", err=str(e))
+        stale = (lambda k: k[0] in evaluated) if evaluated is not None else None
+        await self.publisher.publish(self.redis, [asdict(s) for s in signals], stale=stale)
         if signals:
             MET_SIGNALS.inc(len(signals))
             MET_BEST_CONF.set(signals[0].confidence)
@@ -469,22 +599,31 @@ class VolatilityScanner:
         asyncio.create_task(periodic_discovery())
 
         while True:
+            # woken by the feed updater when bars land; SCAN_INTERVAL_SEC only bounds the idle wait
+            try:
+                await asyncio.wait_for(self.data_ready.wait(), timeout=SCAN_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                continue
             t0 = time.perf_counter()
+            batch: Set[str] = set()
             try:
                 if await self.paused():
-                    await asyncio.sleep(1.0)
+                    await asyncio.sleep(1.0)   # dirty tokens stay queued until resumed
                     continue
-                signals = await self.detect()
-                await self.publish(signals)
+                self.data_ready.clear()
+                batch, self.dirty = self.dirty, set()
+                tokens = [t for t in self.tracked_tokens if t in batch]
+                signals = await self.detect(tokens)
+                await self.publish(signals, evaluated=set(tokens))
                 if signals:
                     jlog("info", event="signals", count=len(signals), best=asdict(signals[0]))
             except Exception as e:
                 MET_ERRORS.inc()
                 jlog("error", event="main_loop_error", err=str(e))
+                # the batch was not evaluated: requeue it (merged with anything that ticked meanwhile)
+                self._mark_dirty(batch)
                 await asyncio.sleep(1.0)
-            dur = time.perf_counter() - t0
-            MET_SCAN_LAT.observe(dur)
-            await asyncio.sleep(max(0.0, SCAN_INTERVAL_SEC - dur))
+            MET_SCAN_LAT.observe(time.perf_counter() - t0)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+ATOM stat-arb walk-forward backtest
+Replays price bars through the scanner's own code path: each bar goes
+through StatisticalArbScanner.apply_prices (history + ratio windows), then
+the mean_reversion / pairs / ml engines run exactly as in run_once. The ML
+engine is refit walk-forward (only on bars already seen) every --retrain-bars.
+
+Each signal opens a position per (engine, pair) at entry_ref, in the
+direction of target_ref. The position closes on the first bar whose ratio
+reaches the target or the stop, or after --max-hold bars, at the ratio of
+that bar (a gap through the target or stop is not filled at the level). PnL = position_size_usd * direction
+* (exit / entry - 1) - round-trip cost. Per-bar engine latency is the time
+of the three engine calls for all pairs on one bar.
+
+Parameter sets (MIN_ZSCORE x LOOKBACK x EXIT_ZSCORE) run in parallel, one
+per worker process.
+
+Data: bars from the on-disk price store (bots/price_store.py, namespace
+stat_arb_<chain>), or --synthetic N bars of a cointegrated random walk
+over STAT_ARB_TOKENS.
+
+    python scripts/backtest_stat_arb.py --synthetic 3000
+    python scripts/backtest_stat_arb.py --since 2026-09-01 --min-z 1.5,2,2.5 --lookback 120,180 --exit-z 0.5,1
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+# the scanner module reads env at import: never write into the live store from a replay
+os.environ["PRICE_STORE_ENABLED"] = "false"
+os.environ.setdefault("POLYGON_RPC_URL", "http://127.0.0.1:8545")
+os.environ.setdefault("ETHEREUM_RPC_URL", "http://127.0.0.1:8545")
+
+import price_store  # noqa: E402
+import statistical_arbitrage as sa  # noqa: E402
+
+ENGINES = ("mean_reversion", "pairs", "ml")
+
+
+# ---------- data ----------
+
+def load_store(root: str, since, until, bar_sec: int):
+    """{token: (bar index array, price array)} on a common bar grid, plus the grid length."""
+    store = price_store.PriceStore(f"stat_arb_{sa.CHAIN}", root=root)
+    raw = {addr: store.load(addr, since=since, until=until) for addr in dict.fromkeys(sa.TOKENS.values())}
+    raw = {a: b for a, b in raw.items() if b.size}
+    if not raw:
+        return {}, 0
+    t0 = min(int(b["ts"][0]) for b in raw.values())
+    t1 = max(int(b["ts"][-1]) for b in raw.values())
+    data = {a: ((b["ts"] - t0) // bar_sec, b["price"].astype(float)) for a, b in raw.items()}
+    return data, int((t1 - t0) // bar_sec) + 1
+
+
+def make_synthetic(bars: int, seed: int):
+    """Random walks on shared factors; every PAIRS base mean-reverts around its quote."""
+    rng = np.random.default_rng(seed)
+    addrs = list(dict.fromkeys(sa.TOKENS.values()))
+    factor = rng.normal(0, 0.004, bars).cumsum()
+    L = {a: factor * rng.uniform(0.5, 1.5) + rng.normal(0, 0.003, bars).cumsum() + rng.uniform(0, 8) for a in addrs}
+    for pair in sa.PAIRS:
+        base, quote = pair.split("/")
+        ba, qa = sa.TOKENS.get(base), sa.TOKENS.get(quote)
+        if not ba or not qa:
+            continue
+        s = np.zeros(bars)
+        shocks = rng.normal(0, 0.01, bars)
+        for t in range(1, bars):
+            s[t] = 0.97 * s[t - 1] + shocks[t]
+        L[ba] = L[qa] + s + rng.uniform(-2, 2)
+    idx = np.arange(bars)
+    return {a: (idx, np.exp(v)) for a, v in L.items()}, bars
+
+
+# ---------- replay ----------
+
+def run_params(params, data, n_bars, args):
+    """One parameter set, start to end; runs in a worker process."""
+    min_z, lookback, exit_z = params
+    sa.MIN_ZSCORE, sa.LOOKBACK, sa.EXIT_ZSCORE = min_z, lookback, exit_z
+    scanner = sa.StatisticalArbScanner()
+    scanner.store = None
+
+    # per-bar updates: bar -> {addr: price}
+    updates = [{} for _ in range(n_bars)]
+    for addr, (bars, prices) in data.items():
+        for b, p in zip(bars.tolist(), prices.tolist()):
+            updates[b][addr] = p
+
+    open_pos = {}      # (engine, pair) -> (direction, entry, target, stop, size, opened_bar)
+    trades = {e: [] for e in ENGINES}
+    lat = []
+    version = 0
+
+    def ratio(pair):
+        base, quote = pair.split("/")
+        a, b = scanner.price_history[sa.TOKENS[base]], scanner.price_history[sa.TOKENS[quote]]
+        return a[-1] / b[-1] if a and b and b[-1] > 0 else None
+
+    def close(key, px):
+        d, entry, _, _, size, _ = open_pos.pop(key)
+        trades[key[0]].append(size * d * (px / entry - 1.0) - size * args.cost_bps / 10_000)
+
+    for bar in range(n_bars):
+        scanner.apply_prices(updates[bar])
+
+        # exits on this bar's ratio
+        for key in list(open_pos):
+            r = ratio(key[1])
+            if r is None:
+                continue
+            d, _, target, stop, _, opened = open_pos[key]
+            # filled at the bar's ratio, not the level: a bar that gaps through target or stop keeps the gap
+            if (r - target) * d >= 0 or (r - stop) * d <= 0 or bar - opened >= args.max_hold:
+                close(key, r)
+
+        # walk-forward ML refit on history seen so far
+        if sa.SKLEARN_AVAILABLE and args.retrain_bars > 0 and bar and bar % args.retrain_bars == 0:
+            version += 1
+            for pair in scanner.active_pairs:
+                base, quote = pair.split("/")
+                art = sa._fit_pair(pair, np.array(scanner.price_history[sa.TOKENS[base]], dtype=float),
+                                   np.array(scanner.price_history[sa.TOKENS[quote]], dtype=float), version, False)
+                if art:
+                    scanner.models[pair] = sa.PairModel(**art)
+
+        t0 = time.perf_counter()
+        signals = []
+        for pair in scanner.active_pairs:
+            for fn in (scanner._engine_mean_reversion, scanner._engine_pairs_spread, scanner._engine_ml):
+                sig = fn(pair)
+                if sig:
+                    signals.append(sig)
+        lat.append(time.perf_counter() - t0)
+
+        for sig in signals:
+            key = (sig.engine, sig.pair)
+            d = float(np.sign(sig.target_ref - sig.entry_ref))
+            if key in open_pos or d == 0:
+                continue
+            open_pos[key] = (d, sig.entry_ref, sig.target_ref, sig.stop_ref, sig.position_size_usd, bar)
+
+    for key in list(open_pos):
+        r = ratio(key[1])
+        if r is not None:
+            close(key, r)
+
+    lat_us = np.array(lat) * 1e6
+    return params, {e: trades[e] for e in ENGINES}, (float(np.percentile(lat_us, 50)), float(np.percentile(lat_us, 99)))
+
+
+# ---------- main ----------
+
+def _floats(s):
+    return [float(x) for x in s.split(",") if x]
+
+
+def _ts(s):
+    if not s:
+        return None
+    return int(s) if s.isdigit() else int(datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--store-dir", default=price_store.STORE_DIR)
+    ap.add_argument("--since", default="", help="unix ts or ISO date")
+    ap.add_argument("--until", default="")
+    ap.add_argument("--bar-sec", type=int, default=int(sa.SCAN_INTERVAL_SEC), help="replay bar = one scan interval")
+    ap.add_argument("--synthetic", type=int, default=0, help="N synthetic bars instead of the store")
+    ap.add_argument("--seed", type=int, default=3)
+    ap.add_argument("--min-z", default=str(sa.MIN_ZSCORE))
+    ap.add_argument("--lookback", default=str(sa.LOOKBACK))
+    ap.add_argument("--exit-z", default=str(sa.EXIT_ZSCORE))
+    ap.add_argument("--max-hold", type=int, default=240, help="bars before a position is closed at market")
+    ap.add_argument("--cost-bps", type=float, default=10.0, help="round-trip cost per trade")
+    ap.add_argument("--retrain-bars", type=int, default=240)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    if args.synthetic:
+        data, n_bars = make_synthetic(args.synthetic, args.seed)
+    else:
+        data, n_bars = load_store(args.store_dir, _ts(args.since), _ts(args.until), max(1, args.bar_sec))
+    if not n_bars:
+        print("no bars in range")
+        return
+
+    grid = list(itertools.product(_floats(args.min_z), [int(x) for x in _floats(args.lookback)], _floats(args.exit_z)))
+    print(f"{n_bars} bars, {len(data)} tokens, pairs {','.join(sa.PAIRS)}, {len(grid)} parameter sets, "
+          f"ml {'on' if sa.SKLEARN_AVAILABLE else 'off (no sklearn)'}")
+    print(f"{'min_z':>5} {'lookback':>8} {'exit_z':>6} | {'engine':>14} | {'trades':>6} | {'hit':>5} | "
+          f"{'pnl usd':>10} | {'avg usd':>8} | {'bar p50 us':>10} | {'bar p99 us':>10}")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(grid)))) as pool:
+        futures = [pool.submit(run_params, p, data, n_bars, args) for p in grid]
+        for fut in futures:
+            (min_z, lookback, exit_z), trades, (p50, p99) = fut.result()
+            for engine in ENGINES:
+                t = trades[engine]
+                hit = sum(1 for x in t if x > 0) / len(t) if t else 0.0
+                print(f"{min_z:>5} {lookback:>8} {exit_z:>6} | {engine:>14} | {len(t):>6} | {hit:>5.0%} | "
+                      f"{sum(t):>10.0f} | {(sum(t) / len(t) if t else 0):>8.0f} | {p50:>10.1f} | {p99:>10.1f}")
+    print(f"wall {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
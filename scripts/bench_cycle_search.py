@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+ATOM cycle-search benchmark
+Compares the legacy O(n^3) triangle loop and a K-best hop-bounded Bellman-Ford
+negative-cycle search (reference implementation, kept here) against the
+pruned 2-5 hop route search the scanner uses (bots/cycle_search.py) on
+synthetic dense graphs.
+
+    python scripts/bench_cycle_search.py [--sizes 10,50,100,200] [--density 0.6] [--work-budget N]
+"""
+
+import argparse
+import math
+from bisect import insort
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+from cycle_search import Cycle, TokenGraph, search_routes  # noqa: E402
+
+FEE = 0.997
+
+
+def build_market(n: int, density: float, noise: float, seed: int):
+    """Two DEXes quoting around a hidden fair price vector; returns best-edge map + graph."""
+    rnd = random.Random(seed)
+    fair = [math.exp(rnd.uniform(-3, 3)) for _ in range(n)]
+    tokens = [f"T{i}" for i in range(n)]
+    edges = {}
+    graph = TokenGraph()
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rnd.random() > density:
+                continue
+            for dex in ("quickswap", "sushiswap"):
+                if rnd.random() < 0.3:
+                    continue
+                mid = fair[i] / fair[j] * (1 + rnd.uniform(-noise, noise))
+                for (a, b, r) in ((i, j, mid * FEE), (j, i, FEE / mid)):
+                    key = (tokens[a], tokens[b])
+                    if r > edges.get(key, (0.0, ""))[0]:
+                        edges[key] = (r, dex)
+                    graph.add_edge(tokens[a], tokens[b], r, dex)
+    return tokens, edges, graph
+
+
+def legacy_triangles(tokens, edges, min_ratio: float):
+    """The pre-graph scanner: every ordered triangle, both orientations, Decimal product."""
+    found = 0
+    evaluated = 0
+    n = len(tokens)
+    one = Decimal(1)
+    thr = Decimal(str(min_ratio))
+    for i in range(n):
+        for j in range(i + 1, n):
+            for k in range(j + 1, n):
+                x, y, z = tokens[i], tokens[j], tokens[k]
+                for (a, b, c) in ((x, y, z), (x, z, y)):
+                    evaluated += 1
+                    e1, e2, e3 = edges.get((a, b)), edges.get((b, c)), edges.get((c, a))
+                    if not (e1 and e2 and e3):
+                        continue
+                    prod = Decimal(e1[0]) * Decimal(e2[0]) * Decimal(e3[0])
+                    if prod - one > thr:
+                        found += 1
+    return found, evaluated
+
+
+def find_negative_cycles(
+    graph: TokenGraph,
+    min_len: int = 3,
+    max_len: int = 5,
+    min_profit_ratio: float = 0.0,
+    max_cycles: int = 1000,
+    paths_per_node: int = 4,
+) -> Tuple[List[Cycle], int]:
+    """
+    Return (cycles, relaxations). A cycle qualifies when product(rates) - 1 > min_profit_ratio.
+    Cycles are simple, reported once (rotated to start at their lowest-index node), best first.
+    Each (hop, node) keeps its `paths_per_node` best partial paths, so where many cycles
+    overlap only the most profitable ones through each node are guaranteed to surface.
+    """
+    n = len(graph)
+    min_len = max(2, min_len)
+    if n < min_len or max_len < min_len:
+        return [], 0
+
+    phi = graph._potentials()
+    # reweighted adjacency: w'(u,v) = -log(rate) + phi(u) - phi(v)
+    radj: List[List[Tuple[int, float]]] = []
+    w_min = 0.0
+    for u in range(n):
+        row = []
+        for v, (rate, _) in graph.adj[u].items():
+            w = -math.log(rate) + phi[u] - phi[v]
+            row.append((v, w))
+            w_min = min(w_min, w)
+        radj.append(row)
+
+    threshold = -math.log1p(max(min_profit_ratio, 0.0)) - 1e-12
+    relaxations = 0
+    found: Dict[Tuple[int, ...], float] = {}
+
+    for s in range(n):
+        # label-correcting: each node keeps its `paths_per_node` best simple paths from s
+        frontier: Dict[int, List[Tuple[float, Tuple[int, ...]]]] = {s: [(0.0, (s,))]}
+        for hop in range(1, max_len + 1):
+            nxt: Dict[int, List[Tuple[float, Tuple[int, ...]]]] = {}
+            # best case for the legs still to come (at least the closing one)
+            remaining_lb = w_min * (max_len - hop)
+            for u, labels in frontier.items():
+                for v, w in radj[u]:
+                    if v == s:
+                        if hop < min_len:
+                            continue
+                        for du, path in labels:
+                            relaxations += 1
+                            nd = du + w
+                            if nd < threshold and nd < found.get(path, math.inf):
+                                found[path] = nd
+                        continue
+                    if v < s or hop == max_len:
+                        continue
+                    for du, path in labels:
+                        relaxations += 1
+                        nd = du + w
+                        if nd + remaining_lb >= threshold:
+                            continue
+                        bucket = nxt.get(v)
+                        if bucket is not None and len(bucket) >= paths_per_node and nd >= bucket[-1][0]:
+                            continue
+                        if v in path:
+                            continue
+                        entry = (nd, path + (v,))
+                        if bucket is None:
+                            nxt[v] = [entry]
+                        else:
+                            insort(bucket, entry)
+                            if len(bucket) > paths_per_node:
+                                bucket.pop()
+            if not nxt:
+                break
+            frontier = nxt
+
+    cycles: List[Cycle] = []
+    for key, weight in sorted(found.items(), key=lambda kv: kv[1])[:max_cycles]:
+        legs = [graph.adj[key[i]][key[(i + 1) % len(key)]] for i in range(len(key))]
+        cycles.append(Cycle(
+            tokens=[graph.tokens[i] for i in key],
+            dexes=[dex for _, dex in legs],
+            rates=[rate for rate, _ in legs],
+            product=math.exp(-weight),
+        ))
+    return cycles, relaxations
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,50,100,200")
+    ap.add_argument("--density", type=float, default=0.6)
+    ap.add_argument("--noise", type=float, default=0.01)
+    ap.add_argument("--min-ratio", type=float, default=0.001)
+    ap.add_argument("--paths-per-node", type=int, default=4)
+    ap.add_argument("--work-budget", type=int, default=200000, help="route search edge expansions (0 = unbounded)")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"{'N':>5} {'edges':>7} | {'legacy s':>9} {'tri':>6} | "
+          f"{'graph3 s':>9} {'cyc3':>6} | {'graph5 s':>9} {'cyc5':>6} {'relax5':>9} | "
+          f"{'route5 s':>9} {'cyc2-5':>6} {'expand':>9} {'pruned':>9} {'cut':>4}")
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        tokens, edges, graph = build_market(n, args.density, args.noise, args.seed)
+
+        t0 = time.perf_counter()
+        legacy_found, _ = legacy_triangles(tokens, edges, args.min_ratio)
+        t_legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        c3, _ = find_negative_cycles(graph, 3, 3, args.min_ratio, max_cycles=10**9,
+                                     paths_per_node=args.paths_per_node)
+        t_g3 = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        c5, relax5 = find_negative_cycles(graph, 3, 5, args.min_ratio, max_cycles=10**9,
+                                          paths_per_node=args.paths_per_node)
+        t_g5 = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        r5, stats = search_routes(graph, 2, 5, args.min_ratio, max_routes=10**9,
+                                  work_budget=args.work_budget or None)
+        t_r5 = time.perf_counter() - t0
+
+        print(f"{n:>5} {graph.edge_count():>7} | {t_legacy:>9.3f} {legacy_found:>6} | "
+              f"{t_g3:>9.3f} {len(c3):>6} | {t_g5:>9.3f} {len(c5):>6} {relax5:>9} | "
+              f"{t_r5:>9.3f} {len(r5):>6} {stats.expansions:>9} {stats.pruned:>9} {'yes' if stats.exhausted else 'no':>4}")
+
+
+if __name__ == "__main__":
+    main()
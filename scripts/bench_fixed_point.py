@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+ATOM fixed-point microbenchmark
+Per-quote cost of the legacy Decimal pricing paths vs the Q112 integer core
+(bots/fixed_point.py), plus the largest relative deviation between them.
+
+- tri:     post-fee edge price + USD valuation of a raw amount (triangular scanner)
+- stables: stable/stable spot price + spread bps + gross on a trade size (stablecoin monitor)
+- mev:     allowed-slippage bps + notional/gross/flash-fee/gas USD (MEV scanner)
+
+    python scripts/bench_fixed_point.py [--quotes 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+import fixed_point as fp  # noqa: E402
+
+FEE_BPS = 30
+FLASH_FEE_BPS = 9
+TRADE_SIZE_USD = 25000
+GAS_LIMIT = 450_000
+
+
+def make_quotes(n: int, seed: int):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        d_in, d_out = rnd.choice((6, 8, 18)), rnd.choice((6, 8, 18))
+        r_in = int(rnd.uniform(1e4, 1e7) * 10 ** d_in)
+        r_out = int(rnd.uniform(1e4, 1e7) * 10 ** d_out)
+        amount = int(rnd.uniform(1, 1e4) * 10 ** d_in)
+        out.append((r_in, r_out, d_in, d_out, amount))
+    return out
+
+
+# ---------- tri ----------
+
+def tri_decimal(quotes):
+    fee = Decimal(10000 - FEE_BPS) / Decimal(10000)
+    usd = Decimal("1.37")
+    res = []
+    for r_in, r_out, d_in, d_out, amount in quotes:
+        p = (Decimal(r_out) / Decimal(10 ** d_out)) / (Decimal(r_in) / Decimal(10 ** d_in)) * fee
+        res.append(p * Decimal(amount) / Decimal(10 ** d_in) * usd)
+    return res
+
+
+def tri_fixed(quotes):
+    usd = fp.from_ratio(137, 100)
+    res = []
+    for r_in, r_out, d_in, d_out, amount in quotes:
+        p = fp.price(r_in, r_out, d_in, d_out, FEE_BPS)
+        res.append(fp.mul(p, fp.units_to_usd(amount, d_in, usd)))
+    return res
+
+
+# ---------- stables ----------
+
+def stables_decimal(quotes):
+    size = Decimal(TRADE_SIZE_USD)
+    res = []
+    for r_in, r_out, d_in, d_out, _ in quotes:
+        s = (Decimal(r_out) / Decimal(10 ** d_out)) / (Decimal(r_in) / Decimal(10 ** d_in))
+        b = (Decimal(r_in) / Decimal(10 ** d_in)) / (Decimal(r_out) / Decimal(10 ** d_out))
+        mid = (s + b) / 2
+        spread = abs(s - b) / mid
+        bps = int(spread * 10000)
+        res.append((bps, size * spread))
+    return res
+
+
+def stables_fixed(quotes):
+    size = fp.from_int(TRADE_SIZE_USD)
+    res = []
+    for r_in, r_out, d_in, d_out, _ in quotes:
+        s = fp.price(r_in, r_out, d_in, d_out)
+        b = fp.price(r_out, r_in, d_out, d_in)
+        total = s + b
+        spread2 = 2 * abs(s - b)
+        res.append((spread2 * fp.BPS // total, size * spread2 // total))
+    return res
+
+
+# ---------- mev ----------
+
+def mev_decimal(quotes):
+    fraction = Decimal("0.25")
+    flash = Decimal(FLASH_FEE_BPS) / Decimal(10000)
+    native = Decimal("0.70")
+    gas_price = 80 * 10 ** 9
+    res = []
+    for r_in, r_out, d_in, d_out, amount in quotes:
+        expected = r_out // 1000
+        min_out = expected * 995 // 1000
+        slip = (Decimal(expected) - Decimal(min_out)) / Decimal(expected)
+        s_bps = int((slip * Decimal(10000)).quantize(Decimal("1")))
+        notional = Decimal(amount) / Decimal(10 ** d_in)
+        gross = notional * (Decimal(s_bps) / Decimal(10000) * Decimal("0.5") * fraction)
+        gas = Decimal(gas_price) * Decimal(GAS_LIMIT) / Decimal(1e18) * native
+        res.append(gross - notional * flash - gas)
+    return res
+
+
+def mev_fixed(quotes):
+    fraction = fp.from_ratio(25, 100)
+    flash = fp.from_ratio(FLASH_FEE_BPS, fp.BPS)
+    native = fp.from_ratio(70, 100)
+    gas_price = 80 * 10 ** 9
+    res = []
+    for r_in, r_out, d_in, d_out, amount in quotes:
+        expected = r_out // 1000
+        min_out = expected * 995 // 1000
+        s_bps = ((expected - min_out) * 20000 + expected) // (2 * expected)
+        notional = fp.from_units(amount, d_in)
+        gross = fp.mul(notional, s_bps * fraction // (2 * fp.BPS))
+        gas = gas_price * GAS_LIMIT * native // fp.POW10[18]
+        res.append(gross - fp.mul(notional, flash) - gas)
+    return res
+
+
+# ---------- harness ----------
+
+def _num(x) -> float:
+    return float(x[1] if isinstance(x, tuple) else x)
+
+
+def max_rel_err(dec_out, fix_out) -> float:
+    worst = 0.0
+    for d, q in zip(dec_out, fix_out):
+        a = _num(d)
+        b = (q[1] if isinstance(q, tuple) else q) / fp.Q112
+        if a:
+            worst = max(worst, abs(a - b) / abs(a))
+    return worst
+
+
+def best_of(fn, repeat, quotes):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(quotes)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--quotes", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    quotes = make_quotes(args.quotes, args.seed)
+    print(f"{'path':>8} | {'decimal ns/q':>12} | {'q112 ns/q':>10} | {'speedup':>7} | {'max rel err':>11}")
+    for name, dec_fn, fix_fn in (
+        ("tri", tri_decimal, tri_fixed),
+        ("stables", stables_decimal, stables_fixed),
+        ("mev", mev_decimal, mev_fixed),
+    ):
+        t_dec, out_dec = best_of(dec_fn, args.repeat, quotes)
+        t_fix, out_fix = best_of(fix_fn, args.repeat, quotes)
+        n = len(quotes)
+        print(f"{name:>8} | {t_dec / n * 1e9:>12.0f} | {t_fix / n * 1e9:>10.0f} | {t_dec / t_fix:>6.1f}x | "
+              f"{max_rel_err(out_dec, out_fix):>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
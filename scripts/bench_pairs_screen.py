@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+ATOM universe pairs-screen benchmark
+Wall time of the vectorized screen (bots/pairs_screen.py) over every token pair
+for universes of increasing size, against a per-pair Python loop doing the same
+statistics, plus the largest deviation between the two on the DF t-stat.
+
+Synthetic universe: a few latent factors drive correlated random-walk prices;
+a slice of the tokens are built as mean-reverting spreads around a partner so
+the screen has real candidates to find.
+
+    python scripts/bench_pairs_screen.py [--tokens 50,100,200] [--bars 360] [--repeat 3]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+from pairs_screen import PriceMatrix, screen_pairs  # noqa: E402
+
+
+def make_universe(n: int, bars: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.02, size=(4, bars)).cumsum(axis=1)
+    load = rng.uniform(0.2, 1.2, size=(n, 4))
+    L = load @ factors + rng.normal(0, 0.01, size=(n, bars)).cumsum(axis=1)
+    # every 5th token: partner + AR(1) spread (phi 0.8-0.95)
+    for i in range(0, n - 1, 5):
+        phi = rng.uniform(0.8, 0.95)
+        s = np.zeros(bars)
+        for t in range(1, bars):
+            s[t] = phi * s[t - 1] + rng.normal(0, 0.01)
+        L[i] = L[i + 1] + s
+    P = np.exp(L + rng.uniform(0, 8, size=(n, 1)))
+    # ragged starts: a few tokens listed late
+    for i in rng.choice(n, size=max(1, n // 20), replace=False):
+        P[i, :rng.integers(bars // 4, bars // 2)] = np.nan
+    return P
+
+
+def screen_loop(P: np.ndarray, min_bars: int = 40):
+    """Reference: the same DF t-stat computed pair by pair with np.polyfit."""
+    valid = np.isfinite(P) & (P > 0)
+    keep = [i for i in range(P.shape[0]) if valid[i, -min_bars:].all()]
+    runs = []
+    for i in keep:
+        r = 0
+        for v in valid[i, ::-1]:
+            if not v:
+                break
+            r += 1
+        runs.append(r)
+    bars = min(runs)
+    L = np.log(P[keep, -bars:])
+    out = {}
+    for a in range(len(keep)):
+        for b in range(a + 1, len(keep)):
+            S = L[a] - L[b]
+            x, y = S[:-1], np.diff(S)
+            (slope, icpt), res, *_ = np.polyfit(x, y, 1, full=True)
+            xm = x - x.mean()
+            se = math.sqrt(float(res[0]) / (len(x) - 2) / float(xm @ xm)) if len(res) else 0.0
+            out[(a, b)] = slope / se if se else 0.0
+    return out, keep
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tokens", default="50,100,200")
+    ap.add_argument("--bars", type=int, default=360)
+    ap.add_argument("--top-k", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=11)
+    ap.add_argument("--no-loop", action="store_true", help="skip the per-pair loop reference")
+    args = ap.parse_args()
+
+    print(f"{'tokens':>6} | {'pairs':>6} | {'vector ms':>9} | {'loop ms':>8} | {'speedup':>7} | "
+          f"{'found':>5} | {'max |dt|':>8} | best pair")
+    for n in (int(x) for x in args.tokens.split(",")):
+        P = make_universe(n, args.bars, args.seed)
+        syms = [f"T{i}" for i in range(n)]
+        # through the ring, as the scanner feeds it
+        m = PriceMatrix(syms, args.bars)
+        m.seed([[v for v in row if np.isfinite(v)] for row in P])
+        view = m.view()
+
+        best, scores = float("inf"), []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            scores = screen_pairs(view, syms, top_k=args.top_k, window=60)
+            best = min(best, time.perf_counter() - t0)
+
+        loop_ms, speed, dev = float("nan"), float("nan"), float("nan")
+        if not args.no_loop:
+            t0 = time.perf_counter()
+            ref, keep = screen_loop(view)
+            loop_s = time.perf_counter() - t0
+            loop_ms, speed = loop_s * 1000, loop_s / best
+            # deviation on the full screen (no filters)
+            full = screen_pairs(view, syms, top_k=10 ** 9, min_corr=-2, max_half_life=float("inf"), max_df_tstat=float("inf"))
+            pos = {syms[k]: j for j, k in enumerate(keep)}
+            dev = 0.0
+            for s in full:
+                a, b = (pos[x] for x in s.pair.split("/"))
+                dev = max(dev, abs(s.df_tstat - ref[(a, b)]))
+        top = f"{scores[0].pair} t={scores[0].df_tstat:.1f} hl={scores[0].half_life:.1f}" if scores else "-"
+        print(f"{n:>6} | {n * (n - 1) // 2:>6} | {best * 1000:>9.1f} | {loop_ms:>8.0f} | {speed:>6.1f}x | "
+              f"{len(scores):>5} | {dev:>8.1e} | {top}")
+
+
+if __name__ == "__main__":
+    main()
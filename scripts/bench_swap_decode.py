@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+ATOM swap-decoder benchmark
+Decodes/sec of the memoryview decoder (bots/swap_decode.py) vs the legacy
+path (hex slice + bytes.fromhex + eth_abi.decode + checksummed path) on
+valid calldata for all five selectors. The equivalence/fuzz check of the
+two decoders is tests/test_swap_decode.py, which reuses legacy_decode and
+random_call from here.
+
+    python scripts/bench_swap_decode.py [--calls 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+from eth_abi import decode as abi_decode, encode as abi_encode  # noqa: E402
+from web3 import Web3  # noqa: E402
+
+import swap_decode as sd  # noqa: E402
+
+# selector -> (abi types, amount_in index or None, min_out index, path index)
+SIGNATURES = {
+    sd.SEL_swapExactTokensForTokens: (["uint256", "uint256", "address[]", "address", "uint256"], 0, 1, 2),
+    sd.SEL_swapExactTokensForETH:    (["uint256", "uint256", "address[]", "address", "uint256"], 0, 1, 2),
+    sd.SEL_swapTokensForExactTokens: (["uint256", "uint256", "address[]", "address", "uint256"], 1, 0, 2),
+    sd.SEL_swapExactETHForTokens:    (["uint256", "address[]", "address", "uint256"], None, 0, 1),
+    sd.SEL_swapETHForExactTokens:    (["uint256", "address[]", "address", "uint256"], None, 0, 1),
+}
+
+
+def legacy_decode(tx_input: str, checksum: bool = True):
+    """The pre-memoryview decoder (extended to the exact-out selectors)."""
+    if not tx_input or len(tx_input) < 10:
+        return None
+    sig = SIGNATURES.get(tx_input[:10])
+    if sig is None:
+        return None
+    types, in_i, out_i, path_i = sig
+    try:
+        vals = abi_decode(types, bytes.fromhex(tx_input[10:]))
+    except Exception:
+        return None
+    path = [Web3.to_checksum_address(p) if checksum else p.lower() for p in vals[path_i]]
+    return tx_input[:10], 0 if in_i is None else int(vals[in_i]), int(vals[out_i]), path
+
+
+def random_call(rnd: random.Random) -> bytes:
+    sel = rnd.choice(list(SIGNATURES))
+    types = SIGNATURES[sel][0]
+    addr = lambda: "0x" + rnd.getrandbits(160).to_bytes(20, "big").hex()
+    uint = lambda: rnd.getrandbits(rnd.choice((8, 64, 128, 256)))
+    args = [[addr() for _ in range(rnd.choice((2, 2, 3, 4)))] if t == "address[]" else
+            addr() if t == "address" else uint() for t in types]
+    return bytes.fromhex(sel[2:]) + abi_encode(types, args)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed + 1)
+    raw = [random_call(rnd) for _ in range(args.calls)]
+    hexes = ["0x" + r.hex() for r in raw]
+    n = len(raw)
+    rows = (
+        ("legacy (eth_abi + checksum)", lambda: [legacy_decode(h) for h in hexes]),
+        ("memoryview, hex str input", lambda: [sd.decode_swap(h) for h in hexes]),
+        ("memoryview, bytes input", lambda: [sd.decode_swap(r) for r in raw]),
+    )
+    base = None
+    print(f"{'decoder':>28} | {'decodes/s':>10} | {'us/decode':>9} | {'speedup':>7}")
+    for name, fn in rows:
+        t = best_of(fn, args.repeat)
+        base = base or t
+        print(f"{name:>28} | {n / t:>10.0f} | {t / n * 1e6:>9.2f} | {base / t:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
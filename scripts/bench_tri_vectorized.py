@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+ATOM vectorized triangle microbenchmark
+Per-triangle Decimal loop (legacy) vs NumPy broadcasting (bots/tri_matrix.py)
+over synthetic two-DEX pool sets, including rate-matrix construction.
+
+    python scripts/bench_tri_vectorized.py [--sizes 10,50,200] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bots"))
+
+from tri_matrix import build_rate_matrix, profitable_triangles  # noqa: E402
+
+DEXES = ["quickswap", "sushiswap"]
+FEE_BPS = 30
+
+
+def make_pools(n: int, density: float, noise: float, seed: int):
+    rnd = random.Random(seed)
+    usd = [rnd.uniform(0.5, 3000) for _ in range(n)]
+    dec = [rnd.choice((6, 8, 18)) for _ in range(n)]
+    pools = []  # (dex, i0, i1, r0, r1)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rnd.random() > density:
+                continue
+            for d in range(len(DEXES)):
+                liq = rnd.uniform(2e5, 5e6)
+                r0 = int(liq / usd[i] * 10 ** dec[i])
+                r1 = int(liq / usd[j] * rnd.uniform(1 - noise, 1 + noise) * 10 ** dec[j])
+                pools.append((d, i, j, r0, r1))
+    return dec, pools
+
+
+def legacy(n, dec, pools, min_ratio):
+    """Decimal edge prices and a Decimal product per ordered triangle, like the original scanner."""
+    fee = Decimal(10000 - FEE_BPS) / Decimal(10000)
+    best = {}
+    for d, i, j, r0, r1 in pools:
+        h0 = Decimal(r0) / Decimal(10 ** dec[i])
+        h1 = Decimal(r1) / Decimal(10 ** dec[j])
+        for key, p in (((i, j), h1 / h0 * fee), ((j, i), h0 / h1 * fee)):
+            if p > best.get(key, Decimal(0)):
+                best[key] = p
+    thr = Decimal(1) + Decimal(str(min_ratio))
+    hits = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            for k in range(j + 1, n):
+                for (a, b, c) in ((i, j, k), (i, k, j)):
+                    e1, e2, e3 = best.get((a, b)), best.get((b, c)), best.get((c, a))
+                    if e1 and e2 and e3 and e1 * e2 * e3 > thr:
+                        hits += 1
+    return hits
+
+
+def vectorized(n, dec, pools, min_ratio):
+    cols = list(zip(*pools))
+    rm = build_rate_matrix(
+        [f"T{i}" for i in range(n)], DEXES,
+        decimals=np.array(dec),
+        pool_dex=np.array(cols[0], dtype=np.intp),
+        pool_i0=np.array(cols[1], dtype=np.intp),
+        pool_i1=np.array(cols[2], dtype=np.intp),
+        reserve0=np.array(cols[3], dtype=np.float64),
+        reserve1=np.array(cols[4], dtype=np.float64),
+        fee_mult=np.full(len(DEXES), (10000 - FEE_BPS) / 10000),
+    )
+    ii, _, _, _ = profitable_triangles(rm.rates, min_ratio)
+    return int(ii.size)
+
+
+def best_of(fn, repeat, *args):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10,50,200")
+    ap.add_argument("--density", type=float, default=0.8)
+    ap.add_argument("--noise", type=float, default=0.01)
+    ap.add_argument("--min-ratio", type=float, default=0.004)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=11)
+    args = ap.parse_args()
+
+    print(f"{'N':>5} {'pools':>7} {'triangles':>10} | {'legacy ms':>10} {'hits':>7} | "
+          f"{'numpy ms':>9} {'hits':>7} | {'speedup':>7}")
+    for n in [int(x) for x in args.sizes.split(",") if x]:
+        dec, pools = make_pools(n, args.density, args.noise, args.seed)
+        t_leg, h_leg = best_of(legacy, args.repeat, n, dec, pools, args.min_ratio)
+        t_vec, h_vec = best_of(vectorized, args.repeat, n, dec, pools, args.min_ratio)
+        tri = n * (n - 1) * (n - 2) // 3
+        print(f"{n:>5} {len(pools):>7} {tri:>10} | {t_leg * 1e3:>10.2f} {h_leg:>7} | "
+              f"{t_vec * 1e3:>9.2f} {h_vec:>7} | {t_leg / t_vec:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
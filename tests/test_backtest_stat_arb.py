@@ -0,0 +1,20 @@
+"""
+Stat-arb replay smoke test: a synthetic run must reach the engines (ratio
+windows filled through StatisticalArbScanner.apply_prices) and trade.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import backtest_stat_arb as bt  # noqa: E402
+
+
+def test_synthetic_run_trades():
+    data, n_bars = bt.make_synthetic(1500, seed=3)
+    args = argparse.Namespace(max_hold=240, cost_bps=10.0, retrain_bars=0)
+    _, trades, _ = bt.run_params((bt.sa.MIN_ZSCORE, bt.sa.LOOKBACK, bt.sa.EXIT_ZSCORE), data, n_bars, args)
+    assert len(trades["mean_reversion"]) > 0
+    assert len(trades["pairs"]) > 0
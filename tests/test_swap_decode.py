@@ -0,0 +1,124 @@
+"""
+Equivalence of the memoryview swap decoder (bots/swap_decode.py) and the
+eth_abi reference decoder (legacy_decode in scripts/bench_swap_decode.py):
+both must accept the same calldata and return the same values, for valid,
+boundary and fuzzed inputs over all five selectors.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+import bench_swap_decode as bench  # noqa: E402
+
+sd = bench.sd
+
+FUZZ_INPUTS = int(os.getenv("SWAP_DECODE_FUZZ", "20000"))
+
+
+def _check(raw: bytes, mismatches: list) -> bool:
+    """Compare both input forms against eth_abi; returns whether eth_abi accepted the input."""
+    hex_in = "0x" + raw.hex()
+    want = bench.legacy_decode(hex_in, checksum=False)
+    for got in (sd.decode_swap(raw), sd.decode_swap(hex_in)):
+        if got != want:
+            mismatches.append((hex_in, want, got))
+    return want is not None
+
+
+def _corrupt(rnd: random.Random, raw: bytes) -> bytes:
+    b = bytearray(raw)
+    kind = rnd.randrange(8)
+    if kind == 7:                                   # path offset aimed into the head or near the end
+        sig = bench.SIGNATURES["0x" + raw[:4].hex()]
+        word = 4 + 32 * sig[3]
+        v = rnd.choice((rnd.randrange(32 * len(sig[0]) + 33), len(b) - 4 - rnd.randrange(64)))
+        b[word:word + 32] = max(v, 0).to_bytes(32, "big")
+        return bytes(b)
+    if kind == 0:                                   # truncate
+        return bytes(b[:rnd.randrange(len(b))])
+    if kind == 1:                                   # trailing junk
+        return bytes(b) + rnd.randbytes(rnd.randrange(1, 64))
+    if kind == 2:                                   # random byte flips
+        for _ in range(rnd.randrange(1, 4)):
+            b[rnd.randrange(4, len(b))] = rnd.randrange(256)
+        return bytes(b)
+    word = 4 + 32 * rnd.randrange((len(b) - 4) // 32)
+    if kind == 3:                                   # small word value (offsets, lengths)
+        v = rnd.choice((0, 1, 2, 31, 32, 33, 64, 96, 128, 160, 192, 224, 256, 2 ** 64, 2 ** 255))
+    elif kind == 4:                                 # dirty high bytes (address padding)
+        v = int.from_bytes(b[word:word + 32], "big") | (rnd.randrange(1, 256) << (8 * rnd.randrange(20, 32)))
+    elif kind == 5:                                 # random word
+        v = rnd.getrandbits(256)
+    else:                                           # unsupported selector
+        b[:4] = rnd.getrandbits(32).to_bytes(4, "big")
+        return bytes(b)
+    b[word:word + 32] = (v % 2 ** 256).to_bytes(32, "big")
+    return bytes(b)
+
+
+def fuzz(n: int, seed: int):
+    rnd = random.Random(seed)
+    accepted = mismatches = 0
+    for i in range(n):
+        raw = random_call(rnd)
+        if i % 4:
+            raw = corrupt(rnd, raw)
+        hex_in = "0x" + raw.hex()
+        want = legacy_decode(hex_in, checksum=False)
+        for got in (sd.decode_swap(raw), sd.decode_swap(hex_in)):
+            if got != want:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  mismatch: {hex_in}\n    want {want}\n    got  {got}")
+        accepted += want is not None
+    return accepted, mismatches
+
+
+def test_valid_calls_match_abi():
+    rnd = random.Random(1)
+    mismatches: list = []
+    for _ in range(500):
+        assert _check(bench.random_call(rnd), mismatches)
+    assert not mismatches, mismatches[:3]
+
+
+def test_path_offset_boundaries_match_abi():
+    # every path-offset value around the head/tail boundary and the end of the data, per selector
+    rnd = random.Random(2)
+    mismatches: list = []
+    for sel, (types, _, _, path_i) in bench.SIGNATURES.items():
+        raw = bench.random_call(rnd)
+        while "0x" + raw[:4].hex() != sel:
+            raw = bench.random_call(rnd)
+        word = 4 + 32 * path_i
+        size = len(raw) - 4
+        for off in list(range(0, 32 * (len(types) + 2))) + list(range(size - 96, size + 33)):
+            b = bytearray(raw)
+            b[word:word + 32] = max(off, 0).to_bytes(32, "big")
+            _check(bytes(b), mismatches)
+        # offsets into the head landing on a word small enough to read as an array length
+        for off in range(0, 32 * len(types), 32):
+            if off == 32 * path_i:
+                continue
+            for n in (0, 1, 2):
+                b = bytearray(raw)
+                b[word:word + 32] = off.to_bytes(32, "big")
+                b[4 + off:4 + off + 32] = n.to_bytes(32, "big")
+                _check(bytes(b), mismatches)
+    assert not mismatches, mismatches[:3]
+
+
+def test_fuzz_matches_abi():
+    rnd = random.Random(7)
+    mismatches: list = []
+    accepted = 0
+    for i in range(FUZZ_INPUTS):
+        raw = bench.random_call(rnd)
+        if i % 4:
+            raw = _corrupt(rnd, raw)
+        accepted += _check(raw, mismatches)
+    assert not mismatches, f"{len(mismatches)} mismatches, first: {mismatches[:3]}"
+    assert 0 < accepted < FUZZ_INPUTS      # both accept and reject paths were exercised